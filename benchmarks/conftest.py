@@ -0,0 +1,127 @@
+"""Benchmarks of lymph.schema hot paths, run with pytest-benchmark.
+
+Usage:
+
+    pip install -r requirements/bench.txt
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare
+
+The size of the synthetic registry is set with ``--schema-services``,
+``--schema-versions``, ``--schema-methods`` and ``--schema-depth``, it's
+saved with the results along with the peak memory of each benchmark.
+
+"""
+import os
+import resource
+
+import pytest
+
+from lymph.schema.schema import Schema
+
+import synthetic
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('schema', 'synthetic schema size')
+    group.addoption('--schema-services', type=int, default=10, help='number of services (default: 10)')
+    group.addoption('--schema-versions', type=int, default=3, help='number of versions per service (default: 3)')
+    group.addoption('--schema-methods', type=int, default=10, help='number of methods per interface (default: 10)')
+    group.addoption('--schema-depth', type=int, default=3, help='nesting depth of returned schemas (default: 3)')
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    machine_info['schema_size'] = _get_size(config)._asdict()
+
+
+def _get_size(config):
+    return synthetic.Size(
+        services=config.getoption('schema_services'),
+        versions=config.getoption('schema_versions'),
+        methods=config.getoption('schema_methods'),
+        depth=config.getoption('schema_depth'),
+    )
+
+
+@pytest.fixture(scope='session')
+def size(request):
+    return _get_size(request.config)
+
+
+@pytest.fixture(scope='session')
+def raw(size):
+    return synthetic.make_registry(size)
+
+
+@pytest.fixture
+def schema(raw):
+    return Schema(raw)
+
+
+@pytest.fixture(scope='session')
+def service_name(size):
+    """Name of a service version in the middle of the registry."""
+    return '%s@%s' % (synthetic.service_name(size.services // 2), synthetic.version_name(size.versions // 2))
+
+
+@pytest.fixture
+def measure(benchmark):
+    """Benchmark ``func`` and record the peak memory of one call.
+
+    With ``setup``, it's called before each call of ``func`` and returns its
+    ``(args, kwargs)``, only ``func`` is timed.
+
+    """
+    def measure(func, *args, **kwargs):
+        setup = kwargs.pop('setup', None)
+        if setup is None:
+            result = benchmark(func, *args, **kwargs)
+        else:
+            result = benchmark.pedantic(func, setup=setup, rounds=kwargs.pop('rounds', 20))
+            args, kwargs = setup()
+        benchmark.extra_info.update(_peak_memory(func, args, kwargs))
+        return result
+    return measure
+
+
+def _peak_memory(func, args, kwargs):
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            return {'peak_memory': tracemalloc.get_traced_memory()[1], 'peak_memory_source': 'tracemalloc'}
+        finally:
+            tracemalloc.stop()
+    return {'peak_memory': _peak_rss_growth(func, args, kwargs), 'peak_memory_source': 'maxrss'}
+
+
+def _peak_rss_growth(func, args, kwargs):
+    """Return how much the resident memory peaks over a call, in bytes.
+
+    The call is made in a forked child, the peak resident memory of a child
+    starts at the resident memory at the time of the fork.
+
+    """
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read)
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            func(*args, **kwargs)
+            growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+            # KiB on Linux.
+            os.write(write, str(growth * 1024).encode('ascii'))
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write)
+    with os.fdopen(read, 'rb') as f:
+        out = f.read()
+    os.waitpid(pid, 0)
+    return int(out) if out else None
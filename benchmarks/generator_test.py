@@ -0,0 +1,40 @@
+from lymph.schema import _jsonschema, decorator, generator
+
+import synthetic
+
+
+def _clear_caches():
+    _jsonschema._SCHEMAS.clear()
+    decorator._CACHE.clear()
+
+
+def test_generate(measure, size):
+    interface = synthetic.make_interface(size.methods, size.depth)
+    measure(generator.generate, interface, 'service@1.0.0')
+
+
+def test_generate_cold(measure, size):
+    """Generate the schema of interfaces never generated before."""
+    def setup():
+        _clear_caches()
+        return (synthetic.make_interface(size.methods, size.depth), 'service@1.0.0'), {}
+    measure(generator.generate, setup=setup)
+
+
+def test_generate_refs(measure, size):
+    interface = synthetic.make_interface(size.methods, size.depth)
+    measure(generator.generate, interface, 'service@1.0.0', refs=True)
+
+
+def test_dump_schema(measure, size):
+    message = synthetic.make_message_schema(size.depth)()
+    measure(_jsonschema.dump_schema, message)
+
+
+def test_dump_schema_cold(measure, size):
+    message = synthetic.make_message_schema(size.depth)()
+
+    def setup():
+        _clear_caches()
+        return (message,), {}
+    measure(_jsonschema.dump_schema, setup=setup)
@@ -0,0 +1,58 @@
+"""Measure the import time and memory of ``lymph.schema`` and its submodules.
+
+Each module is imported in a fresh interpreter, the time and peak resident
+memory of the bare ``lymph`` namespace package are reported as a baseline.
+
+Usage:
+
+    python benchmarks/import_bench.py [repeat]
+
+"""
+from __future__ import print_function
+
+import json
+import subprocess
+import sys
+
+
+MODULES = [
+    'lymph',
+    'lymph.schema',
+    'lymph.schema.datastructure',
+    'lymph.schema.cache',
+    'lymph.schema.decorator',
+    'lymph.schema.schema',
+    'lymph.schema.message',
+    'lymph.schema.static',
+    'lymph.schema.generator',
+    'lymph.schema.fake',
+    'lymph.schema.testcase',
+]
+
+SCRIPT = """
+import json, resource, time
+start = time.time()
+import %s
+elapsed = time.time() - start
+print(json.dumps([elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))
+"""
+
+
+def measure(module, repeat):
+    times, rss = [], []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', SCRIPT % module])
+        elapsed, maxrss = json.loads(out.decode('utf-8'))
+        times.append(elapsed)
+        rss.append(maxrss)
+    return min(times), min(rss)
+
+
+def main(repeat):
+    for module in MODULES:
+        elapsed, maxrss = measure(module, repeat)
+        print('%-28s %8.1f ms %8d KiB' % (module, elapsed * 1000, maxrss))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
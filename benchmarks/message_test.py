@@ -0,0 +1,61 @@
+import decimal
+import uuid
+
+import pytest
+
+from lymph.schema import fake, message
+from lymph.schema.datastructure import JsonSchemaDict
+
+
+def test_message_build(measure, schema, service_name):
+    measure(message.build, schema, service_name, 'method0')
+
+
+def test_fake_build(measure, raw, service_name):
+    measure(fake.build, raw, service_name)
+
+
+def _get_properties(schema, service_name):
+    return schema.build_service(service_name).methods['method0']['returns']['properties']
+
+
+def test_jsonschema_dict_get(measure, schema, service_name):
+    d = message.build(schema, service_name, 'method0')
+    measure(d.__getitem__, 'name')
+
+
+# Key -> a valid value, by kind of type check.
+VALUES = {
+    'format': ('id', uuid.uuid4()),
+    'type': ('name', 'joe'),
+    'type list': ('children', None),
+}
+
+
+@pytest.mark.parametrize('kind', sorted(VALUES))
+def test_jsonschema_dict_set(measure, schema, service_name, kind):
+    properties = _get_properties(schema, service_name)
+    key, value = VALUES[kind]
+    if key not in properties:
+        pytest.skip('%s needs a nesting depth of at least 1' % key)
+    d = JsonSchemaDict(properties, {})
+    measure(d.__setitem__, key, value)
+
+
+def test_jsonschema_dict_set_all(measure, schema, service_name):
+    d = JsonSchemaDict(_get_properties(schema, service_name), {})
+    id_ = uuid.uuid4()
+    price = decimal.Decimal(10)
+
+    def set_all():
+        d['id'] = id_
+        d['name'] = 'joe'
+        d['price'] = price
+        d['quantity'] = 1
+        d['active'] = True
+    measure(set_all)
+
+
+def test_jsonschema_dict_construct(measure, schema, service_name):
+    properties = _get_properties(schema, service_name)
+    measure(JsonSchemaDict, properties, {})
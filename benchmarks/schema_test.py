@@ -0,0 +1,24 @@
+from lymph.schema.schema import Schema
+
+
+def test_build_service(measure, schema, service_name):
+    measure(schema.build_service, service_name)
+
+
+def test_build_service_cold(measure, raw, service_name):
+    """Build a service from a new schema, nothing is resolved yet."""
+    def setup():
+        return (Schema(raw).build_service, service_name), {}
+    measure(lambda build, name: build(name), setup=setup)
+
+
+def test_service_call(measure, schema, service_name):
+    service = schema.build_service(service_name)
+    measure(service.method0, id=1)
+
+
+def test_service_first_call(measure, raw, service_name):
+    """Call a method of a new service, its message is built on the call."""
+    def setup():
+        return (Schema(raw).build_service(service_name),), {}
+    measure(lambda service: service.method0(id=1), setup=setup)
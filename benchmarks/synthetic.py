@@ -0,0 +1,90 @@
+"""Synthetic interfaces and schemas for the benchmarks.
+
+The size of a registry is given by a :class:`Size`: the number of services,
+of versions per service, of rpc methods per interface and the nesting depth
+of the marshmallow schemas the methods return.
+
+"""
+import collections
+import itertools
+
+import lymph
+from marshmallow import fields, Schema
+
+from lymph.schema import generator
+from lymph.schema.decorator import spec
+
+
+Size = collections.namedtuple('Size', 'services versions methods depth')
+
+_COUNTER = itertools.count()
+
+
+def make_message_schema(depth):
+    """Return a new marshmallow schema class nested ``depth`` levels deep.
+
+    Each level has scalar fields, one nested object and a list of nested
+    objects, so fake messages have ``4 ** depth`` objects.
+
+    """
+    attrs = {
+        'id': fields.UUID(required=True),
+        'name': fields.String(),
+        'price': fields.Decimal(),
+        'quantity': fields.Integer(),
+        'created': fields.DateTime(),
+        'active': fields.Boolean(),
+    }
+    if depth > 0:
+        nested = make_message_schema(depth - 1)
+        attrs['child'] = fields.Nested(nested)
+        attrs['children'] = fields.Nested(nested, many=True)
+    return type('Message%d' % next(_COUNTER), (Schema,), attrs)
+
+
+def make_interface(methods, depth):
+    """Return a new interface class with ``methods`` rpc methods.
+
+    Methods share the same return schema, like the methods of a real
+    interface returning the same resource.
+
+    """
+    message = make_message_schema(depth)
+    attrs = {}
+    for i in range(methods):
+        name = 'method%d' % i
+        attrs[name] = lymph.rpc()(spec(returns=message())(_make_method(name)))
+    return type('Interface%d' % next(_COUNTER), (lymph.Interface,), attrs)
+
+
+def _make_method(name):
+    def method(self, id, limit=10):
+        pass
+    method.__name__ = name
+    method.__doc__ = 'Synthetic rpc method %s.' % name
+    return method
+
+
+def service_name(i):
+    return 'service%d' % i
+
+
+def version_name(i):
+    return '1.%d.0' % i
+
+
+def make_registry(size):
+    """Return a raw registry of the given :class:`Size`.
+
+    The versions of a service are generated from the same interface.
+
+    """
+    raw = {}
+    for i in range(size.services):
+        interface = make_interface(size.methods, size.depth)
+        name = service_name(i)
+        raw[name] = {}
+        for j in range(size.versions):
+            versioned = '%s@%s' % (name, version_name(j))
+            raw[name].update(generator.generate(interface, versioned).todict()[name])
+    return raw
@@ -1,5 +1,40 @@
-from lymph.schema.decorator import spec  # noqa
-from lymph.schema.generator import generate_from_config, generate_from_interface, generate  # noqa
+import importlib
+import sys
+import types
 
 
 __version__ = '0.4.0-dev'
+
+
+# Names exported by the package and the submodule they come from, submodules
+# are only imported the first time one of their names is accessed.
+_LAZY_ATTRIBUTES = {
+    'spec': 'lymph.schema.decorator',
+    'generate_from_config': 'lymph.schema.generator',
+    'generate_from_configs': 'lymph.schema.generator',
+    'generate_from_interface': 'lymph.schema.generator',
+    'generate': 'lymph.schema.generator',
+}
+
+
+class _LazyModule(types.ModuleType):
+
+    def __getattr__(self, name):
+        try:
+            module = _LAZY_ATTRIBUTES[name]
+        except KeyError:
+            raise AttributeError("'module' object has no attribute %r" % name)
+        value = getattr(importlib.import_module(module), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES))
+
+
+_lazy = _LazyModule(__name__, __doc__)
+_lazy.__dict__.update(sys.modules[__name__].__dict__)
+# Keep the original module alive, Python 2 clears the globals of collected
+# modules and _LazyModule relies on them.
+_lazy._module = sys.modules[__name__]
+sys.modules[__name__] = _lazy
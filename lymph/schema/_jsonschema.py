@@ -8,10 +8,17 @@ from marshmallow import fields, missing
 from marshmallow.compat import text_type, binary_type
 
 
-__all__ = ['dump_schema']
+__all__ = ['dump_schema', 'Definitions']
 
 
 _RECURSIVE_NESTED = 'self'
+
+# Inlined schemas by schema class and options, cleared when full.
+_SCHEMAS = {}
+_SCHEMAS_MAXSIZE = 1024
+# (schema class, field class) -> python type or None.
+_PYTYPES = {}
+
 TYPE_MAP = {
     dict: {
         'type': 'object',
@@ -69,35 +76,96 @@ TYPE_MAP = {
 }
 
 
-def dump_schema(schema_obj):
+class Definitions(object):
+    """Schemas dumped once and referenced with ``$ref``.
+
+    Each schema class is stored once per ``only`` and ``exclude`` options,
+    so a schema nested in itself just references its own definition.
+
+    Example:
+
+        >>> from marshmallow import Schema
+        >>> class Node(Schema):
+        ...     name = fields.String()
+        ...     children = fields.Nested('self', many=True)
+        ...
+        >>> definitions = Definitions()
+        >>> definitions.ref(Node())
+        {'$ref': '#/definitions/Node'}
+        >>> definitions.schemas['Node']['properties']['children']['items']
+        {'$ref': '#/definitions/Node'}
+
+    """
+
+    def __init__(self):
+        self.schemas = {}
+        self.__names = {}
+
+    def ref(self, schema_obj):
+        """Return a ``$ref`` to the definition of ``schema_obj``."""
+        key = (schema_obj.__class__, _freeze(schema_obj.only), _freeze(schema_obj.exclude))
+        try:
+            name = self.__names[key]
+        except KeyError:
+            name = self.__names[key] = self._get_free_name(schema_obj.__class__.__name__)
+            # Reserve the name first, nested references to it are recursive.
+            self.schemas[name] = {}
+            self.schemas[name] = dump_schema(schema_obj, self)
+        return {'$ref': '#/definitions/%s' % name}
+
+    def _get_free_name(self, name):
+        candidate, i = name, 1
+        while candidate in self.schemas:
+            i += 1
+            candidate = '%s%d' % (name, i)
+        return candidate
+
+
+def _freeze(names):
+    # Both None and an empty sequence mean all fields.
+    return tuple(sorted(names)) if names else None
+
+
+def dump_schema(schema_obj, definitions=None):
+    """Dump a marshmallow schema instance to JSON schema.
+
+    Inlined schemas are cached per schema class and ``only``, ``exclude``
+    and ``many`` options, the returned schema must not be mutated.
+
+    :param definitions: A :class:`Definitions`, if given nested schemas are
+        stored there and referenced with ``$ref`` instead of being inlined.
+
+    """
+    if definitions is not None:
+        return _dump_schema(schema_obj, definitions)
+
+    key = (schema_obj.__class__, _freeze(schema_obj.only), _freeze(schema_obj.exclude), schema_obj.many)
+    try:
+        return _SCHEMAS[key]
+    except KeyError:
+        pass
+
+    json_schema = _dump_schema(schema_obj)
+    if len(_SCHEMAS) >= _SCHEMAS_MAXSIZE:
+        _SCHEMAS.clear()
+    _SCHEMAS[key] = json_schema
+    return json_schema
+
+
+def _dump_schema(schema_obj, definitions=None):
     json_schema = {
         "type": "object",
         "properties": {},
         "required": [],
     }
-    mapping = {v: k for k, v in schema_obj.TYPE_MAPPING.items()}
-    mapping[fields.Email] = text_type
-    mapping[fields.Dict] = dict
-    mapping[fields.List] = list
-    mapping[fields.Url] = text_type
-    mapping[fields.LocalDateTime] = datetime.datetime
 
     for field_name, field in sorted(schema_obj.fields.items()):
-        schema = None
-
-        if field.__class__ in mapping:
-            pytype = mapping[field.__class__]
+        pytype = _get_pytype(schema_obj.__class__, field.__class__)
+        if pytype is not None:
             schema = _from_python_type(field, pytype)
         elif isinstance(field, fields.Nested):
-            schema = _from_nested_schema(field)
-        elif issubclass(field.__class__, fields.Field):
-            for cls in mapping.keys():
-                if issubclass(field.__class__, cls):
-                    pytype = mapping[cls]
-                    schema = _from_python_type(field, pytype)
-                    break
-
-        if schema is None:
+            schema = _from_nested_schema(field, definitions)
+        else:
             raise ValueError('unsupported field type %s' % field)
 
         field_name = field.dump_to or field.name
@@ -107,6 +175,29 @@ def dump_schema(schema_obj):
     return json_schema
 
 
+def _get_pytype(schema_class, field_class):
+    """Return the python type that ``field_class`` maps to or None.
+
+    The closest mapped class in the field class hierarchy wins.
+
+    """
+    try:
+        return _PYTYPES[schema_class, field_class]
+    except KeyError:
+        pass
+
+    mapping = {v: k for k, v in schema_class.TYPE_MAPPING.items()}
+    mapping[fields.Email] = text_type
+    mapping[fields.Dict] = dict
+    mapping[fields.List] = list
+    mapping[fields.Url] = text_type
+    mapping[fields.LocalDateTime] = datetime.datetime
+
+    pytype = next((mapping[c] for c in field_class.__mro__ if c in mapping), None)
+    _PYTYPES[schema_class, field_class] = pytype
+    return pytype
+
+
 def _from_python_type(field, pytype):
     json_schema = {
         'title': field.attribute or field.name,
@@ -119,14 +210,17 @@ def _from_python_type(field, pytype):
     return json_schema
 
 
-def _from_nested_schema(field):
+def _from_nested_schema(field, definitions=None):
     if field.nested == _RECURSIVE_NESTED:
         parent_class = field.parent.__class__
         nested = parent_class(many=field.many, only=field.only, exclude=field.exclude)
     else:
         nested = field.nested()
 
-    schema = dump_schema(nested)
+    if definitions is None:
+        schema = dump_schema(nested)
+    else:
+        schema = definitions.ref(nested)
     if field.many:
         schema = {
             'type': ["array"] if field.required else ['array', 'null'],
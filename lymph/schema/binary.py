@@ -0,0 +1,236 @@
+"""Compact binary serialization of schemas.
+
+Layout of a file, integers are little endian:
+
+    magic            8 bytes, ``LSCHEMA1``
+    string count     uint32
+    string offsets   uint32, offset of the string offsets table
+    index offset     uint32, offset of the service/version index
+    data             interned strings then encoded service versions
+    string offsets   one uint32 per string plus the end of the last one
+    index            encoded ``{service: {version: offset}}``
+
+Every string (keys and values) is stored once in the strings table and
+values refer to it by index. Values are encoded as a one byte tag followed
+by, depending on the tag, a varint (string index, integer, length) or an
+IEEE 754 double.
+
+:func:`load` only decodes the index, service versions are decoded the first
+time they are accessed, see :mod:`lymph.schema.lazy`.
+
+"""
+import collections
+import mmap
+import struct
+
+import six
+
+from lymph.schema.lazy import LazyRegistry
+
+
+MAGIC = b'LSCHEMA1'
+_HEADER = struct.Struct('<8sIII')
+_OFFSET = struct.Struct('<I')
+_DOUBLE = struct.Struct('<d')
+
+_NONE, _TRUE, _FALSE, _INT, _NEG_INT, _FLOAT, _STRING, _LIST, _DICT = range(9)
+
+
+def dumps(raw):
+    """Serialize a schema, as returned by ``Schema.todict``, to bytes."""
+    return _Writer().write(raw)
+
+
+def dump(raw, fp):
+    """Serialize a schema to the binary file object ``fp``."""
+    fp.write(dumps(raw))
+
+
+def load(buf, maxbytes=None):
+    """Return the schema encoded in ``buf`` as a :class:`LazyRegistry`.
+
+    :param buf: Bytes or a memory map of a file written by :func:`dump`.
+    :param maxbytes: See :class:`LazyRegistry`.
+
+    :raises ValueError: In case ``buf`` isn't a binary schema.
+
+    """
+    if len(buf) < _HEADER.size:
+        raise ValueError('not a binary schema')
+    magic, count, strings_offset, index_offset = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError('not a binary schema')
+
+    reader = _Reader(buf, count, strings_offset)
+    index, _ = reader.read(index_offset)
+
+    def decode(offset):
+        spec, end = reader.read(offset)
+        return spec, end - offset
+
+    return LazyRegistry(index, decode, maxbytes)
+
+
+def open_mmap(path, maxbytes=None):
+    """Memory map the binary schema file at ``path`` and :func:`load` it."""
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return load(buf, maxbytes)
+
+
+class _Writer(object):
+
+    def __init__(self):
+        self.strings = {}
+
+    def write(self, raw):
+        # The strings table must be complete before anything after it is
+        # written, so the names used by the index are interned first and
+        # the versions are encoded to a separate buffer.
+        for service, versions in raw.items():
+            self._intern(service)
+            for version in versions:
+                self._intern(version)
+
+        data = bytearray()
+        offsets = {}
+        for service, versions in raw.items():
+            offsets[service] = {}
+            for version, spec in versions.items():
+                offsets[service][version] = len(data)
+                self._write_value(data, spec)
+
+        out = bytearray(_HEADER.size)
+        string_offsets = []
+        for s in sorted(self.strings, key=self.strings.get):
+            string_offsets.append(len(out))
+            out.extend(_to_bytes(s))
+        string_offsets.append(len(out))
+
+        base = len(out)
+        out.extend(data)
+        for versions in offsets.values():
+            for version in versions:
+                versions[version] += base
+
+        strings_offset = len(out)
+        for offset in string_offsets:
+            out.extend(_OFFSET.pack(offset))
+
+        index_offset = len(out)
+        self._write_value(out, offsets)
+        _HEADER.pack_into(out, 0, MAGIC, len(self.strings), strings_offset, index_offset)
+        return bytes(out)
+
+    def _intern(self, s):
+        try:
+            return self.strings[s]
+        except KeyError:
+            i = self.strings[s] = len(self.strings)
+            return i
+
+    def _write_value(self, out, value):
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, six.integer_types):
+            if value >= 0:
+                out.append(_INT)
+                _write_varint(out, value)
+            else:
+                out.append(_NEG_INT)
+                _write_varint(out, -value)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out.extend(_DOUBLE.pack(value))
+        elif isinstance(value, six.string_types):
+            out.append(_STRING)
+            _write_varint(out, self._intern(value))
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self._write_value(out, item)
+        elif isinstance(value, collections.Mapping):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                _write_varint(out, self._intern(key))
+                self._write_value(out, item)
+        else:
+            raise TypeError('cannot encode %r' % (value,))
+
+
+class _Reader(object):
+
+    def __init__(self, buf, count, strings_offset):
+        self.buf = buf
+        self.strings_offset = strings_offset
+        self.strings = [None] * count
+
+    def string(self, i):
+        s = self.strings[i]
+        if s is None:
+            start, end = struct.unpack_from('<II', self.buf, self.strings_offset + 4 * i)
+            s = self.strings[i] = self.buf[start:end].decode('utf-8')
+        return s
+
+    def read(self, offset):
+        """Decode the value at ``offset``, return it and the next offset."""
+        buf = self.buf
+        tag = six.indexbytes(buf, offset)
+        offset += 1
+        if tag == _STRING:
+            i, offset = _read_varint(buf, offset)
+            return self.string(i), offset
+        elif tag == _DICT:
+            n, offset = _read_varint(buf, offset)
+            value = {}
+            for _ in range(n):
+                i, offset = _read_varint(buf, offset)
+                value[self.string(i)], offset = self.read(offset)
+            return value, offset
+        elif tag == _LIST:
+            n, offset = _read_varint(buf, offset)
+            value = []
+            for _ in range(n):
+                item, offset = self.read(offset)
+                value.append(item)
+            return value, offset
+        elif tag == _INT or tag == _NEG_INT:
+            n, offset = _read_varint(buf, offset)
+            return (n if tag == _INT else -n), offset
+        elif tag == _FLOAT:
+            return _DOUBLE.unpack_from(buf, offset)[0], offset + _DOUBLE.size
+        elif tag == _NONE:
+            return None, offset
+        elif tag == _TRUE:
+            return True, offset
+        elif tag == _FALSE:
+            return False, offset
+        raise ValueError('corrupted binary schema')
+
+
+def _write_varint(out, n):
+    while n > 0x7f:
+        out.append(0x80 | (n & 0x7f))
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, offset):
+    n = shift = 0
+    while True:
+        byte = six.indexbytes(buf, offset)
+        offset += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, offset
+        shift += 7
+
+
+def _to_bytes(s):
+    return s if isinstance(s, bytes) else s.encode('utf-8')
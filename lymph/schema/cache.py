@@ -0,0 +1,190 @@
+import collections
+import hashlib
+import json
+import os
+import tempfile
+
+
+class LRUCache(object):
+    """A mapping that only keeps its ``maxsize`` most recently used items.
+
+    Example:
+
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache['a'] = 1
+        >>> cache['b'] = 2
+        >>> cache['a']
+        1
+        >>> cache['c'] = 3
+        >>> sorted(cache.keys())
+        ['a', 'c']
+        >>> 'b' in cache
+        False
+
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.__data = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        value = self.__data.pop(key)
+        self.__data[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.__data:
+            del self.__data[key]
+        elif len(self.__data) >= self.maxsize:
+            self.__data.popitem(last=False)
+        self.__data[key] = value
+
+    def __delitem__(self, key):
+        del self.__data[key]
+
+    def __contains__(self, key):
+        return key in self.__data
+
+    def __len__(self):
+        return len(self.__data)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self.__data)
+
+    def clear(self):
+        self.__data.clear()
+
+
+class SizedLRUCache(object):
+    """A mapping that only keeps its most recently used items whose sizes add
+    up to at most ``maxbytes``.
+
+    Example:
+
+        >>> cache = SizedLRUCache(maxbytes=10)
+        >>> cache.set('a', 1, size=6)
+        >>> cache.set('b', 2, size=3)
+        >>> cache['a']
+        1
+        >>> cache.set('c', 3, size=4)
+        >>> sorted(cache.keys())
+        ['a', 'c']
+        >>> cache.size
+        10
+
+    :param maxbytes: Maximum total size of the items, None for no limit.
+
+    """
+
+    def __init__(self, maxbytes=None):
+        self.maxbytes = maxbytes
+        self.size = 0
+        # Key -> (value, size).
+        self.__data = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        item = self.__data.pop(key)
+        self.__data[key] = item
+        return item[0]
+
+    def set(self, key, value, size):
+        """Store ``value`` of ``size`` bytes, an item bigger than
+        ``maxbytes`` is not stored.
+
+        """
+        if key in self.__data:
+            self.size -= self.__data.pop(key)[1]
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        self.__data[key] = (value, size)
+        self.size += size
+        while self.maxbytes is not None and self.size > self.maxbytes:
+            _, (_, evicted) = self.__data.popitem(last=False)
+            self.size -= evicted
+
+    def __contains__(self, key):
+        return key in self.__data
+
+    def __len__(self):
+        return len(self.__data)
+
+    def keys(self):
+        return list(self.__data)
+
+    def clear(self):
+        self.__data.clear()
+        self.size = 0
+
+
+class InterfaceCache(object):
+    """An on disk cache of generated interface schemas.
+
+    An entry stays valid as long as the lymph-schema ``version`` and the
+    content of the source files recorded with it don't change.
+
+    :param path: Directory where to store the cache, created if missing.
+    :param version: Version of lymph-schema that generated the entries.
+
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+
+    def get(self, name, class_path):
+        """Return the cached schema of the interface or None."""
+        try:
+            with open(self._get_filename(name, class_path)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if entry.get('version') != self.version:
+            return None
+        for filename, digest in entry['files'].items():
+            if _hash_file(filename) != digest:
+                return None
+        return entry['schema']
+
+    def set(self, name, class_path, schema, filenames):
+        """Cache the ``schema`` of the interface that depends on ``filenames``.
+
+        Schemas that can't be serialized to JSON are not cached.
+
+        """
+        entry = {
+            'version': self.version,
+            'name': name,
+            'class': class_path,
+            'files': {f: _hash_file(f) for f in filenames},
+            'schema': schema,
+        }
+        try:
+            data = json.dumps(entry)
+        except (TypeError, ValueError):
+            return
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.rename(tmp, self._get_filename(name, class_path))
+
+    def _get_filename(self, name, class_path):
+        key = hashlib.sha1(('%s\0%s' % (name, class_path)).encode('utf-8'))
+        return os.path.join(self.path, '%s.json' % key.hexdigest())
+
+
+def _hash_file(filename):
+    try:
+        with open(filename, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError):
+        return None
@@ -0,0 +1,35 @@
+import json
+
+from lymph.cli.base import Command
+
+from lymph.schema.schema import Schema
+
+
+class SchemaDiff(Command):
+    """
+    Usage: lymph schema-diff <old> <new> [options]
+
+    Show the changes between two schemas, exit with status 1 if any of them
+    breaks the consumers of the old schema.
+
+    Options:
+      --breaking                   Only show breaking changes.
+
+    {COMMON_OPTIONS}
+
+    """
+
+    needs_config = False
+    short_description = 'Show the changes between two schemas'
+
+    def run(self):
+        with open(self.args['<old>']) as f:
+            old = Schema(json.load(f))
+        with open(self.args['<new>']) as f:
+            new = Schema(json.load(f))
+
+        changes = old.diff(new)
+        for change in changes:
+            if change.breaking or not self.args['--breaking']:
+                print(change)
+        return 1 if any(c.breaking for c in changes) else 0
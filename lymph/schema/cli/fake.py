@@ -0,0 +1,46 @@
+import json
+import sys
+
+from lymph.cli.base import Command
+
+from lymph.schema import fake
+
+
+class FakeGenerator(Command):
+    """
+    Usage: lymph gen-fake <schema> <name> <method> [options]
+
+    Stream fake responses of a service method as newline delimited JSON.
+
+    Options:
+      --count=<n>                  Number of responses, infinite if not set.
+      --seed=<seed>                Seed of the random generator.
+      --output=<file>, -o <file>   Write to the given file instead of stdout.
+
+    {COMMON_OPTIONS}
+
+    """
+
+    needs_config = False
+    short_description = 'Generate fake responses from schema'
+
+    def run(self):
+        with open(self.args['<schema>']) as f:
+            schema = json.load(f)
+
+        count = self.args['--count']
+        if count is not None:
+            count = int(count)
+        seed = self.args['--seed']
+        if seed is not None:
+            seed = int(seed)
+
+        output = self.args['--output']
+        fp = open(output, 'w') if output else sys.stdout
+        try:
+            fake.dump_ndjson(
+                schema, self.args['<name>'], self.args['<method>'], fp,
+                count=count, seed=seed)
+        finally:
+            if output:
+                fp.close()
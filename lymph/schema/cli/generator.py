@@ -1,26 +1,74 @@
 import json
+import sys
 
 from lymph.cli.base import Command
 
-from lymph.schema import generator as gen
+from lymph.schema import generator as gen, profiling
 
 
 class SchemaGenerator(Command):
     """
-    Usage: lymph gen-schema <config> [options]
+    Usage: lymph gen-schema <config>... [options]
 
-    Generate rpc schema from service configuration.
+    Generate rpc schema from service configurations.
+
+    Options:
+      --jobs=<n>, -j <n>           Generate the configurations in parallel
+                                   using the given number of processes.
+                                   [default: 1]
+      --cache-dir=<dir>            Cache interface schemas in the given
+                                   directory and only regenerate the ones
+                                   whose source changed.
+      --static                     Read the interfaces from their source
+                                   without importing them when possible.
+      --refs                       Output each marshmallow schema once in
+                                   the service definitions and reference it
+                                   with $ref.
+      --binary=<file>              Write the schema in binary format to the
+                                   given file instead of printing it.
+      --profile                    Report the time and memory spent in each
+                                   phase and the slowest interfaces on
+                                   stderr.
+      --cprofile=<file>            Write cProfile stats to the given file.
+      --trace=<file>               Write the phases to the given file in
+                                   Chrome trace format.
 
     {COMMON_OPTIONS}
 
     """
 
     needs_config = False
-    short_description = 'Generate schema from service configuration'
+    short_description = 'Generate schema from service configurations'
 
     def run(self):
-        config_file = self.args['<config>']
+        if not (self.args['--profile'] or self.args['--cprofile'] or self.args['--trace']):
+            return self._generate()
+
+        # Phases run by --jobs worker processes aren't recorded.
+        profiler = profiling.Profiler(cprofile=bool(self.args['--cprofile']))
+        with profiler:
+            self._generate()
+        if self.args['--profile']:
+            profiler.report(sys.stderr)
+        if self.args['--cprofile']:
+            profiler.dump_stats(self.args['--cprofile'])
+        if self.args['--trace']:
+            with open(self.args['--trace'], 'w') as f:
+                profiler.dump_trace(f)
+
+    def _generate(self):
+        config_files = self.args['<config>']
 
-        schema = gen.generate_from_config(config_file)
-        print json.dumps(schema.todict(), indent=4)
+        schema = gen.generate_from_configs(
+            config_files,
+            jobs=int(self.args['--jobs']),
+            cache_dir=self.args['--cache-dir'],
+            static=self.args['--static'],
+            refs=self.args['--refs'])
+        with profiling.phase('dump'):
+            if self.args['--binary']:
+                with open(self.args['--binary'], 'wb') as f:
+                    schema.dump(f)
+                return
+            print json.dumps(schema.todict(), indent=4, sort_keys=True)
 
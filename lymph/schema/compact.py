@@ -0,0 +1,225 @@
+"""Compact in-memory representation of schema registries.
+
+A registry holding many versions of the same services stores the same method
+specs and return types again for every version. :func:`compact` returns a
+copy of a registry where:
+
+- equal strings are the same object,
+- structurally equal dicts and lists are the same object (hash-consing),
+- method specs are :class:`MethodSpec` records instead of dicts.
+
+Example:
+
+    >>> raw = {'users': {'1.0.0': {'methods': {}}, '1.1.0': {'methods': {}}}}
+    >>> registry = compact(raw)
+    >>> registry['users']['1.0.0'] is registry['users']['1.1.0']
+    True
+    >>> registry.todict() == raw
+    True
+
+Since subtrees are shared, a compacted registry must not be modified.
+
+"""
+import collections
+import json
+
+import six
+
+
+_FIELDS = ('name', 'args', 'kwargs', 'doc', 'raises', 'returns')
+
+
+class MethodSpec(object):
+    """A read-only mapping of the spec of an rpc method.
+
+    Fields are stored in slots, which takes a fraction of the memory of a
+    dict with the same keys.
+
+    """
+    __slots__ = _FIELDS
+
+    def __init__(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key not in _FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in _FIELDS and hasattr(self, key)
+
+    def keys(self):
+        return [key for key in _FIELDS if hasattr(self, key)]
+
+    def values(self):
+        return [getattr(self, key) for key in self.keys()]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    if six.PY2:
+        def iteritems(self):
+            return iter(self.items())
+
+        def itervalues(self):
+            return iter(self.values())
+
+        def iterkeys(self):
+            return iter(self.keys())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'MethodSpec(%s)' % ', '.join('%s=%r' % item for item in self.items())
+
+
+collections.Mapping.register(MethodSpec)
+
+
+class CompactRegistry(dict):
+    """A compacted registry, see :func:`compact`."""
+
+    def todict(self):
+        """Return the registry with the method specs as dicts."""
+        return {
+            name: {version: _version_todict(spec) for version, spec in versions.items()}
+            for name, versions in self.items()
+        }
+
+
+def compact(raw):
+    """Return a :class:`CompactRegistry` equal to the registry ``raw``."""
+    return _Compactor().registry(raw)
+
+
+def load(fp):
+    """Read a JSON schema from the file object ``fp`` and :func:`compact` it.
+
+    Objects are shared while the file is parsed, so the whole registry is
+    never in memory uncompacted.
+
+    """
+    compactor = _Compactor()
+    raw = json.load(fp, object_hook=compactor.parsed)
+    # Values are already shared, only method specs are left to convert.
+    compactor.value = _identity
+    return compactor.registry(raw)
+
+
+def _version_todict(spec):
+    spec = dict(spec)
+    if 'methods' in spec:
+        spec['methods'] = {name: dict(method) for name, method in spec['methods'].items()}
+    return spec
+
+
+class _Compactor(object):
+
+    def __init__(self):
+        self.strings = {}
+        # Structural key -> the shared node, children of a node are shared
+        # before the node itself so its key can refer to them by identity.
+        self.nodes = {}
+
+    def registry(self, raw):
+        registry = CompactRegistry()
+        for name, versions in raw.items():
+            registry[self.string(name)] = {
+                self.string(version): self.version(spec) for version, spec in versions.items()
+            }
+        return registry
+
+    def version(self, spec):
+        result = {}
+        for key, value in spec.items():
+            if key == 'methods':
+                value = self.node({self.string(k): self.method(v) for k, v in value.items()})
+            else:
+                value = self.value(value)
+            result[self.string(key)] = value
+        return self.node(result)
+
+    def method(self, spec):
+        if not set(spec).issubset(_FIELDS):
+            return self.value(spec)
+        return self.node(MethodSpec(**{str(k): self.value(v) for k, v in spec.items()}))
+
+    def value(self, obj):
+        if isinstance(obj, six.string_types):
+            return self.string(obj)
+        elif isinstance(obj, dict):
+            return self.node({self.string(k): self.value(v) for k, v in obj.items()})
+        elif isinstance(obj, list):
+            return self.node([self.value(v) for v in obj])
+        return obj
+
+    def parsed(self, obj):
+        """Share a dict just parsed, dicts in it already are."""
+        # Keys are already shared by the JSON decoder.
+        strings = self.strings
+        for key, value in obj.items():
+            type_ = type(value)
+            if type_ in _STRING_TYPES:
+                obj[key] = strings.setdefault(value, value)
+            elif type_ is list:
+                obj[key] = self._parsed_list(value)
+        return self.node(obj)
+
+    def _parsed_list(self, obj):
+        return self.node([
+            self.string(v) if type(v) in _STRING_TYPES else self._parsed_list(v) if type(v) is list else v
+            for v in obj
+        ])
+
+    def string(self, s):
+        return self.strings.setdefault(s, s)
+
+    def node(self, obj):
+        if isinstance(obj, list):
+            key = (list, tuple([_key(v) for v in obj]))
+        else:
+            key = (type(obj), frozenset([(k, _key(v)) for k, v in obj.items()]))
+        return self.nodes.setdefault(key, obj)
+
+
+def _key(value):
+    type_ = type(value)
+    if type_ in _STRING_TYPES:
+        return value
+    elif type_ in _NODE_TYPES or isinstance(value, (dict, list)):
+        return id(value)
+    # e.g. don't mix up 1, 1.0 and True.
+    return (type_, value)
+
+
+def _identity(obj):
+    return obj
+
+
+_STRING_TYPES = frozenset(six.string_types + (six.text_type, bytes))
+_NODE_TYPES = frozenset([dict, list, MethodSpec])
@@ -14,11 +14,21 @@ _TYPES = {
     'uuid': uuid.UUID,
     'string': (str, unicode),
     'boolean': bool,
-    'object': dict,
+    # e.g. nested JsonSchemaDict.
+    'object': collections.Mapping,
     'array': list,
     'null': type(None),
 }
 
+# Compiled key -> type tables, shared by every JsonSchemaDict built from the
+# same ``properties`` mapping. Keyed by identity, the mapping is kept in the
+# value so that its id can't be reused while the entry is alive.
+_COMPILED = {}
+_COMPILED_MAXSIZE = 1024
+
+# Marker for keys whose schema has no known type or format.
+_MALFORMED = object()
+
 
 # TODO: Figure out how to deal with nested data.
 class JsonSchemaDict(collections.MutableMapping):
@@ -62,32 +72,20 @@ class JsonSchemaDict(collections.MutableMapping):
     def __init__(self, properties, values):
         self.__values = values
         self.__properties = properties
+        self.__types = _compile(properties)
 
     def __setitem__(self, key, value):
         try:
-            schema = self.__properties[key]
+            vtype = self.__types[key]
         except KeyError:
             raise KeyError('unknown key %r' % key)
-        self.__check_type_match(key, value, schema)
-
-        self.__values[key] = value
-
-    def __check_type_match(self, key, value, schema):
         # FIXME: How about nested object checking ? object, array ?
-        vtype = self.__get_type(value, schema)
+        if vtype is _MALFORMED:
+            raise RuntimeError('malformed schema')
         if not isinstance(value, vtype):
             raise TypeError("cannot set %r (type %s) to %r" % (key, vtype, value))
 
-    @staticmethod
-    def __get_type(value, schema):
-        if 'format' in schema:
-            return _TYPES[schema['format']]
-        elif 'type' in schema:
-            if isinstance(schema['type'], list):
-                return tuple(_TYPES[t] for t in schema['type'])
-            return _TYPES[schema['type']]
-        else:
-            raise RuntimeError('malformed schema')
+        self.__values[key] = value
 
     def __getitem__(self, key):
         return self.__values[key]
@@ -100,3 +98,55 @@ class JsonSchemaDict(collections.MutableMapping):
 
     def __len__(self):
         return len(self.__values)
+
+
+def _compile(properties):
+    """Return the key -> type table of ``properties``.
+
+    The table is computed once per ``properties`` mapping and reused by every
+    :class:`JsonSchemaDict` sharing it, so schemas must not be mutated once
+    used.
+
+    Example:
+
+        >>> properties = {'id': {'type': 'string', 'format': 'uuid'}, 'tags': {'type': ['array', 'null']}}
+        >>> types = _compile(properties)
+        >>> types['id'] is uuid.UUID, types['tags'] == (list, type(None))
+        (True, True)
+        >>> _compile(properties) is types
+        True
+
+    """
+    try:
+        compiled_properties, types = _COMPILED[id(properties)]
+    except KeyError:
+        pass
+    else:
+        if compiled_properties is properties:
+            return types
+
+    types = {key: _get_type(schema) for key, schema in properties.items()}
+    if len(_COMPILED) >= _COMPILED_MAXSIZE:
+        _COMPILED.clear()
+    _COMPILED[id(properties)] = (properties, types)
+    return types
+
+
+def _get_type(schema):
+    if '$ref' in schema:
+        # Definitions are marshmallow schemas, i.e. objects, fake messages
+        # cut recursive references with None.
+        return (collections.Mapping, type(None))
+    elif 'anyOf' in schema:
+        types = tuple(_get_type(s) for s in schema['anyOf'])
+        return _MALFORMED if _MALFORMED in types else types
+    try:
+        if 'format' in schema:
+            return _TYPES[schema['format']]
+        elif 'type' in schema:
+            if isinstance(schema['type'], list):
+                return tuple(_TYPES[t] for t in schema['type'])
+            return _TYPES[schema['type']]
+    except KeyError:
+        pass
+    return _MALFORMED
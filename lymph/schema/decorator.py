@@ -1,3 +1,5 @@
+import collections
+import copy
 import datetime
 import decimal
 import uuid
@@ -7,13 +9,11 @@ import typing
 import marshmallow
 
 from lymph.schema import _jsonschema
+from lymph.schema.cache import LRUCache
 
 
 # TODO: Add support of passing jsonschema directly.
-# TODO: Allow to annotate function argument too.
-# @spec(returns=int, values=dict)
-# def create(self, values): pass
-def spec(returns):
+def spec(returns, **params):
     """Annotate an RPC function with return type.
 
     This decorator is only needed with Python 2.x, with Python 3.x
@@ -36,51 +36,282 @@ def spec(returns):
 
     The ``spec`` decorator support using ``typing`` library types.
 
+    Marshmallow schemas and ``typing`` generics are only converted to JSON
+    schema the first time the annotation is read, so that decorating a
+    function stays cheap when the schema of the service is never asked for.
+
+    Types of the arguments can be given by keyword, e.g.
+    ``@spec(returns=int, values=dict)``. They aren't part of the schema yet,
+    :func:`lymph.schema.validation.validate_args` checks calls against them.
+
     """
     def wrapper(func):
-        func.__annotations__ = {
-            'return': _to_jsonschema(returns)
-        }
+        annotations = _Annotations()
+        for key, type_ in [('return', returns)] + list(params.items()):
+            annotations.types[key] = type_
+            if isinstance(type_, marshmallow.Schema) or _get_generic(type_) is not None:
+                annotations[key] = _Deferred(type_)
+            else:
+                annotations[key] = _to_jsonschema(type_)
+        func.__annotations__ = annotations
         return func
     return wrapper
 
 
-# TODO: Add support for typing.Mapping[K, V]
+def _get_annotation(func, key, definitions=None):
+    """Return the JSON schema of the ``key`` annotation of ``func``.
+
+    :param definitions: See :func:`_to_jsonschema`.
+
+    """
+    annotations = getattr(func, '__annotations__', None) or {}
+    if key not in annotations:
+        return {}
+    if definitions is None or key not in getattr(annotations, 'types', ()):
+        return annotations[key]
+    return _to_jsonschema(annotations.types[key], definitions)
+
+
+class _Deferred(object):
+
+    __slots__ = ('type_',)
+
+    def __init__(self, type_):
+        self.type_ = type_
+
+
+# Python 3 requires function annotations to be a dict, while Python 2 copies
+# dicts (e.g. ``dict(annotations)`` in ``typing.get_type_hints``) without
+# calling any of their methods, so annotations are only a dict in Python 3.
+# Both read them through the methods of the mapping.
+if six.PY3:
+    _AnnotationsBase = type('_AnnotationsBase', (collections.MutableMapping, dict), {})
+else:
+    _AnnotationsBase = collections.MutableMapping
+
+
+class _Annotations(_AnnotationsBase):
+    """Function annotations converting deferred types on first read.
+
+        >>> annotations = _Annotations(
+        ...     {'return': _Deferred(typing.List[int])})
+        >>> dict(annotations) == {'return': {
+        ...     'type': 'array', 'items': {'type': 'number', 'format': 'integer'}}}
+        True
+        >>> annotations['return'] is annotations.get('return')
+        True
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.__values = dict(*args, **kwargs)
+        # Annotated types as given to ``spec``.
+        self.types = {}
+
+    def __getitem__(self, key):
+        value = self.__values[key]
+        if isinstance(value, _Deferred):
+            value = self.__values[key] = _to_jsonschema(value.type_)
+        return value
+
+    def __setitem__(self, key, value):
+        self.__values[key] = value
+
+    def __delitem__(self, key):
+        del self.__values[key]
+
+    def __contains__(self, key):
+        return key in self.__values
+
+    def __iter__(self):
+        return iter(self.__values)
+
+    def __len__(self):
+        return len(self.__values)
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 # TODO: For marshmallow schema will be great if we also have field descriptions.
-def _to_jsonschema(type_):
+def _to_jsonschema(type_, definitions=None):
+    """Convert ``type_`` to JSON schema.
+
+    Conversions are memoized, each call returns a copy of the memoized
+    schema so that callers can't change it for the next ones.
+
+    :param definitions: A :class:`_jsonschema.Definitions`, if given
+        marshmallow schemas are stored there and referenced with ``$ref``.
+
+        >>> _to_jsonschema(typing.Optional[int]) == {
+        ...     'anyOf': [{'type': 'number', 'format': 'integer'}, {'type': 'null'}]}
+        True
+        >>> _to_jsonschema(typing.Mapping[str, float]) == {
+        ...     'type': 'object', 'additionalProperties': {'type': 'number', 'format': 'float'}}
+        True
+
+    """
+    return copy.deepcopy(_get_jsonschema(type_, definitions))
+
+
+def _get_jsonschema(type_, definitions=None):
+    """Return the memoized JSON schema of ``type_``, it must not be mutated."""
     if isinstance(type_, marshmallow.Schema):
+        if definitions is not None:
+            return definitions.ref(type_)
         return _jsonschema.dump_schema(type_)
-    elif type_ in six.integer_types:
-        return {'type': 'number', 'format': 'integer'}
-    elif type_ == float:
-        return {'type': 'number', 'format': 'float'}
-    elif type_ == decimal.Decimal:
-        return {'type': 'string', 'format': 'decimal'}
-    elif type_ == uuid.UUID:
-        return {'type': 'string', 'format': 'uuid'}
-    elif type_ == datetime.datetime:
-        return {'type': 'string', 'format': 'date-time'}
-    elif type_ == datetime.date:
-        return {'type': 'string', 'format': 'date'}
-    elif type_ == datetime.time:
-        return {'type': 'string', 'format': 'time'}
-    elif type_ == dict:
-        return {'type': 'object'}
-    elif type_ == six.text_type or type_ == six.binary_type:
-        return {'type': 'string'}
-    elif type_ is None:
-        return {'type': 'null'}
-    elif type_ == list:
-        return {'type': 'array'}
-    elif type_ == bool:
-        return {'type': 'boolean'}
-    elif issubclass(type_, typing.MutableSequence[typing.T]):
-        items_type = type_.__parameters__[0]
-        if issubclass(items_type, marshmallow.Schema):
-            items_type = items_type()
-        return {
-            'type': 'array',
-            'items': _to_jsonschema(items_type),
-        }
-    else:
+    try:
+        return _TYPES[type_]
+    except KeyError:
+        pass
+    except TypeError:  # Unhashable, e.g. an instance.
+        return _convert(type_)
+    if definitions is not None:
+        # Not memoized, the definitions must be filled on each conversion.
+        return _convert(type_, definitions)
+    try:
+        return _CACHE[type_]
+    except KeyError:
+        pass
+    schema = _CACHE[type_] = _convert(type_)
+    return schema
+
+
+def register_type(type_, schema):
+    """Register the JSON schema of a return type.
+
+    Usage:
+
+        register_type(money.Money, {'type': 'string', 'format': 'decimal'})
+
+        @lymph.rpc()
+        @spec(returns=typing.List[money.Money])
+        def prices(self):
+            ...
+
+    :param type_: The type, only matched exactly (not its subclasses).
+    :param schema: JSON schema of values of ``type_``, it's copied.
+
+    """
+    _TYPES[type_] = copy.deepcopy(schema)
+    _CACHE.clear()
+
+
+def _convert(type_, definitions=None):
+    generic = _get_generic(type_)
+    if generic is None:
         raise ValueError('unsupported return type: %s' % type_)
+    origin, params = generic
+    return _GENERICS[origin](params, definitions)
+
+
+def _get_generic(type_):
+    """Return the origin and the parameters of a ``typing`` generic or None.
+
+    The origin is one of ``list``, ``dict``, ``tuple`` or ``typing.Union``,
+    parameters are empty for a bare generic (e.g. ``typing.List``).
+
+        >>> _get_generic(typing.Dict[str, int]) == (dict, (str, int))
+        True
+        >>> _get_generic(typing.Tuple[int, ...]) == (tuple, (int, Ellipsis))
+        True
+        >>> _get_generic(int) is None
+        True
+
+    """
+    # typing < 3.5.2 has dedicated attributes for unions and tuples.
+    params = getattr(type_, '__union_params__', None)
+    if params is not None:
+        return typing.Union, params
+    params = getattr(type_, '__tuple_params__', None)
+    if params is not None:
+        if getattr(type_, '__tuple_use_ellipsis__', False):
+            params += (Ellipsis,)
+        return tuple, params
+
+    origin = getattr(type_, '__origin__', None)
+    if origin is None and not isinstance(getattr(type_, '__extra__', None), type):
+        return None
+    if origin is typing.Union:
+        return typing.Union, type_.__args__
+
+    # typing < 3.5.2 stores parameters in __parameters__, later versions in
+    # __args__ and their __origin__ is the builtin type.
+    params = getattr(type_, '__args__', None) or type_.__parameters__ or ()
+    if any(isinstance(p, typing.TypeVar) for p in params):
+        params = ()
+    base = getattr(type_, '__extra__', None) or origin
+    if not isinstance(base, type):
+        return None
+    elif issubclass(base, tuple):
+        return tuple, params
+    elif issubclass(base, collections.Mapping):
+        return dict, params
+    elif issubclass(base, collections.Sequence) and not issubclass(base, six.string_types):
+        return list, params
+    return None
+
+
+def _to_jsonschema_param(type_, definitions):
+    if isinstance(type_, type) and issubclass(type_, marshmallow.Schema):
+        type_ = type_()
+    # The whole converted schema is copied by _to_jsonschema.
+    return _get_jsonschema(type_, definitions)
+
+
+def _list_schema(params, definitions):
+    schema = {'type': 'array'}
+    if params:
+        schema['items'] = _to_jsonschema_param(params[0], definitions)
+    return schema
+
+
+def _dict_schema(params, definitions):
+    schema = {'type': 'object'}
+    if params:
+        schema['additionalProperties'] = _to_jsonschema_param(params[1], definitions)
+    return schema
+
+
+def _tuple_schema(params, definitions):
+    schema = {'type': 'array'}
+    if len(params) == 2 and params[1] is Ellipsis:
+        schema['items'] = _to_jsonschema_param(params[0], definitions)
+    elif params:
+        schema['items'] = [_to_jsonschema_param(p, definitions) for p in params]
+    return schema
+
+
+def _union_schema(params, definitions):
+    return {'anyOf': [_to_jsonschema_param(p, definitions) for p in params]}
+
+
+_TYPES = {
+    float: {'type': 'number', 'format': 'float'},
+    decimal.Decimal: {'type': 'string', 'format': 'decimal'},
+    uuid.UUID: {'type': 'string', 'format': 'uuid'},
+    datetime.datetime: {'type': 'string', 'format': 'date-time'},
+    datetime.date: {'type': 'string', 'format': 'date'},
+    datetime.time: {'type': 'string', 'format': 'time'},
+    dict: {'type': 'object'},
+    six.text_type: {'type': 'string'},
+    six.binary_type: {'type': 'string'},
+    None: {'type': 'null'},
+    type(None): {'type': 'null'},
+    list: {'type': 'array'},
+    bool: {'type': 'boolean'},
+}
+_TYPES.update((t, {'type': 'number', 'format': 'integer'}) for t in six.integer_types)
+
+# Origin of a typing generic -> function converting its parameters.
+_GENERICS = {
+    list: _list_schema,
+    dict: _dict_schema,
+    tuple: _tuple_schema,
+    typing.Union: _union_schema,
+}
+
+_CACHE = LRUCache(maxsize=1024)
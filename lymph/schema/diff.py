@@ -0,0 +1,321 @@
+"""Structural diff of two schema registries.
+
+Changes are classified from the point of view of a consumer of the old
+schema: a change is breaking when a call or a response handling that worked
+with the old schema may fail with the new one (e.g. a required argument was
+added or a returned field was removed).
+
+Unchanged services, versions and methods are skipped without being walked.
+They are compared by fingerprint when both schemas already computed it, and
+by plain equality otherwise, which is much cheaper than hashing them from
+scratch.
+
+"""
+import collections
+import json
+
+
+class Change(collections.namedtuple('Change', 'service method path message breaking')):
+    """A change between two schemas.
+
+    :param service: Versioned name of the service in the old schema.
+    :param method: Name of the method, None for service level changes.
+    :param path: Where in the method spec the change is, e.g. ``args`` or
+        ``returns.properties.id``.
+    :param message: Description of the change.
+    :param breaking: True if the change breaks consumers of the old schema.
+
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        location = self.service
+        if self.method:
+            location = '%s.%s' % (location, self.method)
+        if self.path:
+            location = '%s (%s)' % (location, self.path)
+        return '%s %s: %s' % ('BREAKING' if self.breaking else 'compatible', location, self.message)
+
+
+def diff_schemas(old, new):
+    """Return the list of :class:`Change` from ``old`` to ``new``.
+
+    Versions are compared one to one. A version that was removed is compared
+    to the version ``name@version`` now resolves to, i.e. the version its
+    consumers now get.
+
+    :param old: :class:`lymph.schema.schema.Schema` before the changes.
+    :param new: :class:`lymph.schema.schema.Schema` after the changes.
+
+    """
+    old_raw, new_raw = old._registry, new._registry
+    if _unchanged(old, new, (), (), old_raw, new_raw):
+        return []
+
+    changes = []
+    for name in sorted(set(old_raw) | set(new_raw)):
+        if name not in new_raw:
+            changes.append(Change(name, None, None, 'service removed', True))
+        elif name not in old_raw:
+            changes.append(Change(name, None, None, 'service added', False))
+        elif not _unchanged(old, new, (name,), (name,), old_raw[name], new_raw[name]):
+            changes.extend(_diff_service(old, new, name))
+    return changes
+
+
+def _unchanged(old, new, old_path, new_path, old_value, new_value):
+    old_fingerprint = old._get_known_fingerprint(old_path)
+    new_fingerprint = new._get_known_fingerprint(new_path)
+    if old_fingerprint is not None and new_fingerprint is not None:
+        return old_fingerprint == new_fingerprint
+    return old_value == new_value
+
+
+def _diff_service(old, new, name):
+    old_versions, new_versions = old._registry[name], new._registry[name]
+    changes = []
+    matched = set()
+    for version in sorted(old_versions):
+        versioned_name = '%s@%s' % (name, version) if version else name
+        if version in new_versions:
+            new_version = version
+        else:
+            try:
+                new_version = new._resolve(versioned_name)[1]
+            except ValueError:
+                changes.append(Change(versioned_name, None, None, 'version removed', True))
+                continue
+            changes.append(Change(
+                versioned_name, None, None, 'version removed, resolves to %s' % new_version, False))
+        matched.add(new_version)
+
+        if not _unchanged(
+                old, new, (name, version), (name, new_version),
+                old_versions[version], new_versions[new_version]):
+            changes.extend(_diff_version(old, new, name, version, new_version))
+
+    for version in sorted(set(new_versions) - matched):
+        versioned_name = '%s@%s' % (name, version) if version else name
+        changes.append(Change(versioned_name, None, None, 'version added', False))
+    return changes
+
+
+def _diff_version(old, new, name, old_version, new_version):
+    old_spec = old._registry[name][old_version]
+    new_spec = new._registry[name][new_version]
+    versioned_name = '%s@%s' % (name, old_version) if old_version else name
+    old_definitions = old_spec.get('definitions', {})
+    new_definitions = new_spec.get('definitions', {})
+
+    changes = []
+    old_methods, new_methods = old_spec['methods'], new_spec['methods']
+    for method in sorted(set(old_methods) | set(new_methods)):
+        if method not in new_methods:
+            changes.append(Change(versioned_name, method, None, 'method removed', True))
+            continue
+        elif method not in old_methods:
+            changes.append(Change(versioned_name, method, None, 'method added', False))
+            continue
+
+        differ = _MethodDiffer(versioned_name, method, old_definitions, new_definitions)
+        if not _unchanged(
+                old, new, (name, old_version, method), (name, new_version, method),
+                old_methods[method], new_methods[method]):
+            changes.extend(differ.diff(old_methods[method], new_methods[method]))
+        elif not differ.same_definitions:
+            # Same spec but the definitions it refers to may have changed.
+            changes.extend(differ.diff_returns(old_methods[method]['returns'], new_methods[method]['returns']))
+    return changes
+
+
+class _MethodDiffer(object):
+
+    def __init__(self, service, method, old_definitions, new_definitions):
+        self.service = service
+        self.method = method
+        self.old_definitions = old_definitions
+        self.new_definitions = new_definitions
+        self.same_definitions = old_definitions == new_definitions
+        self.changes = []
+
+    def diff(self, old, new):
+        self._diff_args(old, new)
+        self._diff_raises(old, new)
+        return self.diff_returns(old['returns'], new['returns'])
+
+    def diff_returns(self, old, new):
+        self._diff_type('returns', old, new, frozenset())
+        return self.changes
+
+    def _add(self, path, message, breaking):
+        self.changes.append(Change(self.service, self.method, path, message, breaking))
+
+    def _diff_args(self, old, new):
+        old_args, new_args = set(old['args']), set(new['args'])
+        old_kwargs, new_kwargs = old['kwargs'], new['kwargs']
+
+        for arg in sorted(new_args - old_args):
+            if arg in old_kwargs:
+                self._add('args', 'optional argument %r became required' % arg, True)
+            else:
+                self._add('args', 'required argument %r added' % arg, True)
+        for arg in sorted(old_args - new_args):
+            if arg in new_kwargs:
+                self._add('args', 'required argument %r became optional' % arg, False)
+            else:
+                self._add('args', 'required argument %r removed' % arg, True)
+
+        for kwarg in sorted(set(old_kwargs) | set(new_kwargs)):
+            if kwarg in old_args or kwarg in new_args:
+                continue  # Reported above.
+            elif kwarg not in new_kwargs:
+                self._add('kwargs', 'optional argument %r removed' % kwarg, True)
+            elif kwarg not in old_kwargs:
+                self._add('kwargs', 'optional argument %r added' % kwarg, False)
+            elif old_kwargs[kwarg] != new_kwargs[kwarg]:
+                self._add('kwargs', 'default of %r changed from %r to %r' % (
+                    kwarg, old_kwargs[kwarg], new_kwargs[kwarg]), False)
+
+    def _diff_raises(self, old, new):
+        old_raises, new_raises = set(old['raises']), set(new['raises'])
+        for exc in sorted(new_raises - old_raises):
+            self._add('raises', 'may raise %s' % exc, True)
+        for exc in sorted(old_raises - new_raises):
+            self._add('raises', 'no longer raises %s' % exc, False)
+
+    def _diff_type(self, path, old, new, seen):
+        if old == new and (self.same_definitions or '"$ref"' not in _canonical(old)):
+            return
+        if not old:
+            if new:
+                self._add(path, 'type specified', False)
+            return
+        if not new:
+            self._add(path, 'type no longer specified', True)
+            return
+
+        if '$ref' in old or '$ref' in new:
+            key = (old.get('$ref'), new.get('$ref'))
+            if key in seen:  # Recursive schema, already being compared.
+                return
+            seen = seen | set([key])
+            old = _resolve(old, self.old_definitions)
+            new = _resolve(new, self.new_definitions)
+            if old == new and (self.same_definitions or '"$ref"' not in _canonical(old)):
+                return
+
+        if 'anyOf' in old or 'anyOf' in new:
+            self._diff_any_of(path, old, new)
+            return
+
+        old_types, new_types = _get_types(old), _get_types(new)
+        if not new_types <= old_types:
+            self._add(path, 'type changed from %s to %s' % (_format_types(old), _format_types(new)), True)
+            return
+        if new_types != old_types:
+            self._add(path, 'type narrowed from %s to %s' % (_format_types(old), _format_types(new)), False)
+        if old.get('format') != new.get('format'):
+            self._add(path, 'format changed from %s to %s' % (old.get('format'), new.get('format')), True)
+            return
+
+        if 'object' in new_types:
+            self._diff_object(path, old, new, seen)
+        if 'array' in new_types:
+            self._diff_array(path, old, new, seen)
+
+    def _diff_any_of(self, path, old, new):
+        old_options = old.get('anyOf', [old])
+        new_options = new.get('anyOf', [new])
+        old_keys = set(_canonical(o) for o in old_options)
+        for option in new_options:
+            if _canonical(option) not in old_keys:
+                self._add(path, 'may return %s' % _format_types(option), True)
+        new_keys = set(_canonical(o) for o in new_options)
+        for option in old_options:
+            if _canonical(option) not in new_keys:
+                self._add(path, 'no longer returns %s' % _format_types(option), False)
+
+    def _diff_object(self, path, old, new, seen):
+        old_props = old.get('properties', {})
+        new_props = new.get('properties', {})
+        for prop in sorted(set(old_props) | set(new_props)):
+            prop_path = '%s.properties.%s' % (path, prop)
+            if prop not in new_props:
+                self._add(prop_path, 'field removed', True)
+            elif prop not in old_props:
+                self._add(prop_path, 'field added', False)
+            else:
+                self._diff_type(prop_path, old_props[prop], new_props[prop], seen)
+
+        old_required = set(old.get('required', ()))
+        new_required = set(new.get('required', ()))
+        for prop in sorted(old_required - new_required):
+            if prop in new_props:
+                self._add('%s.properties.%s' % (path, prop), 'field no longer required', True)
+
+        if 'additionalProperties' in old or 'additionalProperties' in new:
+            self._diff_type(
+                '%s.additionalProperties' % path,
+                old.get('additionalProperties', {}), new.get('additionalProperties', {}), seen)
+
+    def _diff_array(self, path, old, new, seen):
+        old_items, new_items = old.get('items', {}), new.get('items', {})
+        if isinstance(old_items, list) or isinstance(new_items, list):
+            if not (isinstance(old_items, list) and isinstance(new_items, list)) or len(old_items) != len(new_items):
+                self._add('%s.items' % path, 'items changed', True)
+                return
+            for i, (o, n) in enumerate(zip(old_items, new_items)):
+                self._diff_type('%s.items.%d' % (path, i), o, n, seen)
+        else:
+            self._diff_type('%s.items' % path, old_items, new_items, seen)
+
+
+def _resolve(schema, definitions):
+    if '$ref' not in schema:
+        return schema
+    return definitions.get(schema['$ref'].rpartition('/')[2], {})
+
+
+def _get_types(schema):
+    type_ = schema.get('type')
+    if isinstance(type_, list):
+        return frozenset(type_)
+    return frozenset([type_])
+
+
+def _format_types(schema):
+    if 'anyOf' in schema:
+        return ' or '.join(_format_types(s) for s in schema['anyOf'])
+    if '$ref' in schema:
+        return schema['$ref'].rpartition('/')[2]
+    types = '/'.join(sorted(t for t in _get_types(schema) if t))
+    if schema.get('format'):
+        return '%s (%s)' % (types, schema['format'])
+    return types or 'any'
+
+
+def _canonical(obj):
+    """Return a canonical JSON encoding of ``obj``.
+
+    It's the same in every process, values that can't be encoded
+    deterministically raise :class:`TypeError`.
+
+        >>> _canonical({'b': (1, 2), u'a': None, 'c': set(['y', 'x'])})
+        '{"a":null,"b":[1,2],"c":["x","y"]}'
+        >>> _canonical([object()])
+        Traceback (most recent call last):
+            ...
+        TypeError: cannot encode <type 'object'> values canonically
+
+    """
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+
+def _json_default(obj):
+    if isinstance(obj, collections.Mapping):  # e.g. compact.MethodSpec.
+        return dict(obj)
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=_canonical)
+    elif isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError('cannot encode %s values canonically' % type(obj))
@@ -1,17 +1,78 @@
+import collections
+import datetime
+import decimal
+import json
+import uuid
+
+from lymph.schema import message
 from lymph.schema.schema import Schema
 
 
-def build(schema, name):
+# Encoders of the non JSON types that fake messages contain.
+_JSON_ENCODERS = {
+    uuid.UUID: str,
+    decimal.Decimal: str,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+}
+
+
+def build(schema, name, hook=None):
     """Build a service stub.
 
     :param schema: Service schema generated by ``lymph schema-gen``.
     :param name: Name of service to stub, accept also ``name@version`` form.
+    :param hook: Called after each call of the stub, see
+        :mod:`lymph.schema.metrics`.
 
     :return: An object that emulate the service contract.
 
     :raises ValueError: In case given service name or version doesn't exist.
 
     """
-    schema = Schema(schema)
+    schema = Schema(schema, hook=hook)
     return schema.build_service(name)
 
+
+def iter_ndjson(schema, name, method, count=None, seed=None):
+    """Yield fake responses of a service method as NDJSON lines.
+
+    Responses are generated lazily, so memory usage stays the same whatever
+    the ``count``.
+
+    :param schema: Service schema generated by ``lymph schema-gen``.
+    :param name: Name of service, accept also ``name@version`` form.
+    :param method: Name of the rpc function.
+    :param count: Number of responses to generate, infinite if None.
+    :param seed: Seed of the random generator.
+
+    :return: An iterator of JSON encoded responses ending with a newline.
+
+    :raises ValueError: In case given service name, version or method
+        doesn't exist.
+
+    """
+    messages = message.iter_many(schema, name, method, count, seed=seed)
+    encode = json.JSONEncoder(separators=(',', ':'), default=_json_default).encode
+    return (encode(msg) + '\n' for msg in messages)
+
+
+def dump_ndjson(schema, name, method, fp, count=None, seed=None):
+    """Write fake responses of a service method as NDJSON to ``fp``.
+
+    See :func:`iter_ndjson` for the arguments.
+
+    """
+    for line in iter_ndjson(schema, name, method, count, seed=seed):
+        fp.write(line)
+
+
+def _json_default(obj):
+    try:
+        return _JSON_ENCODERS[type(obj)](obj)
+    except KeyError:
+        pass
+    if isinstance(obj, collections.Mapping):
+        return dict(obj)
+    raise TypeError('%r is not JSON serializable' % obj)
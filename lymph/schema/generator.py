@@ -1,10 +1,27 @@
+import ast
 import collections
+import gzip
+import hashlib
 import inspect
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from six.moves import cPickle as pickle
 
 from lymph.core.versioning import parse_versioned_name
 from lymph.config import Configuration
 from lymph.utils import import_object
 
+from lymph.schema import decorator, profiling, static as static_
+from lymph.schema._jsonschema import Definitions
+from lymph.schema.cache import InterfaceCache
 from lymph.schema.schema import Schema
 
 
@@ -12,31 +29,228 @@ from lymph.schema.schema import Schema
 # TODO: Add emit (for events emitted).
 RPCSpec = collections.namedtuple('RPCSpec', 'name args kwargs doc raises returns')
 
+# A generated interface schema along with its JSON encoding, the gzip
+# compressed JSON and the ETag (SHA-1 of the JSON) identifying it.
+CachedSchema = collections.namedtuple('CachedSchema', 'schema json gzip etag')
+
+# Modules installed under these prefixes (stdlib, site-packages) aren't
+# tracked as dependencies of cached interfaces.
+_SYSTEM_PREFIXES = tuple(set(os.path.abspath(p) for p in (
+    sys.prefix,
+    sys.exec_prefix,
+    getattr(sys, 'base_prefix', sys.prefix),
+    getattr(sys, 'real_prefix', sys.prefix),
+)))
+
+# (interface class, name) -> Schema
+_INTERFACE_SCHEMAS = {}
+# (interface class, name) -> CachedSchema
+_SERIALIZED_SCHEMAS = {}
+
 
 def generate_from_interface(interface):
-    """Generate schema from interface instance."""
+    """Generate schema from interface instance.
+
+    Schemas are generated once per interface class and name and shared by
+    all their instances.
+
+    """
+    key = _get_interface_key(interface)
+    try:
+        return _INTERFACE_SCHEMAS[key]
+    except KeyError:
+        schema = _INTERFACE_SCHEMAS[key] = generate(*key)
+        return schema
+
+
+def get_cached_schema(interface):
+    """Return the :class:`CachedSchema` of an interface instance.
+
+    Like :func:`generate_from_interface` it's computed once per interface
+    class and name.
+
+    :raises TypeError: In case the schema can't be serialized to JSON.
+
+    """
+    key = _get_interface_key(interface)
+    try:
+        return _SERIALIZED_SCHEMAS[key]
+    except KeyError:
+        pass
+
+    schema = generate_from_interface(interface)
+    data = json.dumps(schema.todict(), sort_keys=True, separators=(',', ':')).encode('utf-8')
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as f:
+        f.write(data)
+    cached = _SERIALIZED_SCHEMAS[key] = CachedSchema(
+        schema=schema,
+        json=data,
+        gzip=buf.getvalue(),
+        etag=hashlib.sha1(data).hexdigest(),
+    )
+    return cached
+
+
+def get_schema_response(interface, etag=None, compress=False):
+    """Return the reply of a ``get_schema`` rpc of ``interface``.
+
+    :param etag: ETag of the schema the caller already has.
+    :param compress: Return the schema compressed with gzip.
+
+    :return: A dict with the ``etag`` of the current schema and its JSON
+        encoded ``schema``, which is None if it matches the given ``etag``.
+
+    """
+    cached = get_cached_schema(interface)
+    if etag == cached.etag:
+        data = None
+    else:
+        data = cached.gzip if compress else cached.json
+    return {'etag': cached.etag, 'schema': data}
+
+
+def _get_interface_key(interface):
     if interface.version:
         name = '%s@%s' % (interface.name, interface.version)
     else:
         name = interface.name
-    return generate(interface.__class__, name)
+    return interface.__class__, name
+
 
+def generate_from_config(config_file, cache_dir=None, static=False, refs=False):
+    """Generate schema from config file path.
 
-# TODO: Generate schema from multiple configs
-def generate_from_config(config_file):
-    """Generate schema from config file path."""
+    :param config_file: Path of the service configuration.
+    :param cache_dir: Directory where to cache the interface schemas, only
+        interfaces whose source changed since are then imported again.
+    :param static: Extract the interface schemas from their source without
+        importing them when possible, see :mod:`lymph.schema.static`.
+    :param refs: Store each marshmallow schema once in the ``definitions``
+        of the service version and reference it with ``$ref`` instead of
+        inlining it everywhere it's used.
+
+    """
     config = Configuration()
-    config.load_file(config_file)
+    with profiling.phase('config', config_file):
+        config.load_file(config_file)
+
+    cache = None
+    if cache_dir:
+        from lymph.schema import __version__
+        if refs:
+            cache_dir = os.path.join(cache_dir, 'refs')
+        cache = InterfaceCache(cache_dir, __version__)
+
+    return Schema(_get_interfaces(config, cache, static, refs))
+
+
+def generate_from_configs(config_files, jobs=1, cache_dir=None, static=False, refs=False):
+    """Generate one schema from many config file paths.
+
+    :param config_files: Paths of the services configurations.
+    :param jobs: Number of worker processes, with more than one job each
+        config is generated in a fresh process.
+    :param cache_dir: See :func:`generate_from_config`.
+    :param static: See :func:`generate_from_config`.
+    :param refs: See :func:`generate_from_config`.
+
+    :raises ValueError: In case two configs define the same ``name@version``
+        differently.
+
+    """
+    if jobs > 1:
+        schemas = _generate_in_processes(config_files, jobs, cache_dir, static, refs)
+    else:
+        schemas = [generate_from_config(f, cache_dir, static, refs).todict() for f in config_files]
+    with profiling.phase('merge'):
+        return Schema(_merge_schemas(zip(config_files, schemas)))
+
+
+def _generate_in_processes(config_files, jobs, cache_dir, static, refs):
+    # XXX: Results are passed through files rather than a multiprocessing
+    # pool, the pool's threads and queues hang once gevent monkey patched.
+    tmpdir = tempfile.mkdtemp()
+    pending = list(enumerate(config_files))
+    running = []
+    outputs = []
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                i, config_file = pending.pop(0)
+                output = os.path.join(tmpdir, str(i))
+                proc = multiprocessing.Process(
+                    target=_generate_to_file, args=(config_file, cache_dir, static, refs, output))
+                proc.start()
+                running.append((proc, config_file))
+                outputs.append(output)
+
+            finished = False
+            for proc, config_file in list(running):
+                if proc.is_alive():
+                    continue
+                proc.join()
+                if proc.exitcode != 0:
+                    raise RuntimeError('cannot generate schema from %s' % config_file)
+                running.remove((proc, config_file))
+                finished = True
+            if not finished:
+                time.sleep(0.01)
+
+        schemas = []
+        for output in outputs:
+            with open(output, 'rb') as f:
+                schemas.append(pickle.load(f))
+        return schemas
+    finally:
+        for proc, _ in running:
+            proc.terminate()
+        shutil.rmtree(tmpdir)
+
+
+def _generate_to_file(config_file, cache_dir, static, refs, output):
+    schema = generate_from_config(config_file, cache_dir, static, refs).todict()
+    with open(output, 'wb') as f:
+        pickle.dump(schema, f, pickle.HIGHEST_PROTOCOL)
+
+
+def _merge_schemas(schemas):
+    """Merge ``(origin, schema)`` pairs into one schema.
 
-    return Schema(_get_interfaces(config))
+    Example:
+
+        >>> a = {'users': {'1.0.0': {'methods': {}}}}
+        >>> b = {'users': {'1.1.0': {'methods': {}}}}
+        >>> sorted(_merge_schemas([('a.yml', a), ('b.yml', b)])['users'])
+        ['1.0.0', '1.1.0']
+        >>> c = {'users': {'1.0.0': {'methods': {'get': {}}}}}
+        >>> _merge_schemas([('a.yml', a), ('c.yml', c)])
+        Traceback (most recent call last):
+            ...
+        ValueError: users@1.0.0 is defined differently in a.yml and c.yml
+
+    """
+    merged = {}
+    origins = {}
+    for origin, schema in schemas:
+        for name, versions in schema.items():
+            service = merged.setdefault(name, {})
+            for version, spec in versions.items():
+                if version in service and service[version] != spec:
+                    versioned_name = '%s@%s' % (name, version) if version else name
+                    raise ValueError(
+                        '%s is defined differently in %s and %s'
+                        % (versioned_name, origins[name, version], origin))
+                service[version] = spec
+                origins.setdefault((name, version), origin)
+    return merged
 
 
-def _get_interfaces(config):
+def _get_interfaces(config, cache=None, static=False, refs=False):
     interfaces = {}
     for name, attrs in config.get('interfaces', {}).items():
-        cls = import_object(attrs['class'])
-        schema = generate(cls, name)
-        schema = schema.todict()
+        with profiling.phase('interface', attrs['class']):
+            schema = _get_interface(name, attrs['class'], cache, static, refs)
         for k in schema:
             if k in interfaces:
                 interfaces[k].update(schema[k])
@@ -45,30 +259,166 @@ def _get_interfaces(config):
     return interfaces
 
 
-def generate(cls, name):
+def _get_interface(name, class_path, cache, static=False, refs=False):
+    if static:
+        try:
+            return _build_schema(name, static_.get_rpc_methods(class_path)).todict()
+        except static_.Unresolvable:
+            pass
+
+    if cache is None:
+        return generate(_import_interface(class_path), name, refs).todict()
+
+    schema = cache.get(name, class_path)
+    if schema is None:
+        cls = _import_interface(class_path)
+        schema = generate(cls, name, refs).todict()
+        cache.set(name, class_path, schema, _get_source_files(cls))
+    return schema
+
+
+def _import_interface(class_path):
+    with profiling.phase('import', class_path):
+        return import_object(class_path)
+
+
+def _get_source_files(cls):
+    """Return the source files that ``cls`` interface depends on.
+
+    Those are the files of the modules of ``cls`` and its base classes and,
+    recursively, of the modules they import or refer to. They don't depend on
+    which modules were already imported, e.g. by other interfaces. Modules of
+    the stdlib and site-packages are skipped along with their imports.
+
+    """
+    pending = [sys.modules.get(c.__module__) for c in cls.__mro__]
+    seen = set()
+    files = set()
+    while pending:
+        module = pending.pop()
+        if module is None or module.__name__ in seen:
+            continue
+        seen.add(module.__name__)
+        filename = _get_source_file(module)
+        if filename is None:
+            continue
+        files.add(filename)
+        pending.extend(_get_dependencies(module, filename))
+    return sorted(files)
+
+
+def _get_source_file(module):
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return None
+    if filename.endswith(('.pyc', '.pyo')):
+        filename = filename[:-1]
+    filename = os.path.abspath(filename)
+    if filename.startswith(_SYSTEM_PREFIXES):
+        return None
+    return filename
+
+
+def _get_dependencies(module, filename):
+    """Return the modules that ``module`` imports or refers to."""
+    name = module.__name__
+    # Importing a module runs the __init__ of its packages.
+    parts = name.split('.')
+    names = ['.'.join(parts[:i]) for i in range(1, len(parts))]
+    package = name if filename.endswith('__init__.py') else name.rpartition('.')[0]
+    for imported in _get_imported_names(filename, package):
+        names.append(imported)
+        if package:
+            # Python 2 implicit relative imports.
+            names.append('%s.%s' % (package, imported))
+
+    modules = [sys.modules.get(n) for n in names]
+    for obj in vars(module).values():
+        if isinstance(obj, types.ModuleType):
+            modules.append(obj)
+        elif isinstance(obj, (type, types.FunctionType)):
+            modules.append(sys.modules.get(obj.__module__))
+    return modules
+
+
+# (filename, mtime) -> names of the modules imported by the file.
+_IMPORTS = {}
+
+
+def _get_imported_names(filename, package):
+    """Return the dotted names the source ``filename`` imports, anywhere in it.
+
+    Names imported from a module (``from a import b``) are returned both as
+    ``a`` and ``a.b``, the latter may be a submodule.
+
+    """
+    try:
+        key = filename, os.path.getmtime(filename)
+        return _IMPORTS[key]
+    except KeyError:
+        pass
+    except OSError:
+        return []
+
+    try:
+        with open(filename, 'rb') as f:
+            tree = ast.parse(f.read(), filename)
+    except (IOError, SyntaxError, TypeError, ValueError):
+        return []
+
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                parts = alias.name.split('.')
+                names.extend('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package.split('.')
+                if node.level > 1:
+                    base = base[:-(node.level - 1)]
+                module = '.'.join(base + ([node.module] if node.module else []))
+            else:
+                module = node.module
+            names.append(module)
+            names.extend('%s.%s' % (module, alias.name) for alias in node.names)
+    _IMPORTS[key] = names
+    return names
+
+
+def generate(cls, name, refs=False):
+    definitions = Definitions() if refs else None
+    methods = _get_rpc_methods(cls, definitions)
+    return _build_schema(name, methods, definitions)
+
+
+def _build_schema(name, methods, definitions=None):
     name, version = parse_versioned_name(name)
+    spec = {'methods': methods}
+    if definitions is not None and definitions.schemas:
+        spec['definitions'] = definitions.schemas
     return Schema({
         name: {
-            str(version or ''): {
-                'methods': _get_rpc_methods(cls),
-            },
+            str(version or ''): spec,
         }
     })
 
 
-def _get_rpc_methods(obj):
+def _get_rpc_methods(obj, definitions=None):
     methods = {}
     for _, meth in obj.methods.items():
-        spec = _get_rpc_spec(meth)
+        spec = _get_rpc_spec(meth, definitions)
         methods[spec.name] = spec._asdict()
     return methods
 
 
-def _get_rpc_spec(rpc_wrapper):
-    meth = rpc_wrapper.original
-    args, kwargs = _get_args(meth)
-    raises = _get_raises(rpc_wrapper)
-    returns = _get_returns(meth)
+def _get_rpc_spec(rpc_wrapper, definitions=None):
+    meth = _unwrap(rpc_wrapper.original)
+    with profiling.phase('inspect', meth.__name__):
+        args, kwargs = _get_args(meth)
+        raises = _get_raises(rpc_wrapper)
+    with profiling.phase('jsonschema', meth.__name__):
+        returns = _get_returns(meth, definitions)
 
     return RPCSpec(
         name=meth.__name__,
@@ -80,6 +430,25 @@ def _get_rpc_spec(rpc_wrapper):
     )
 
 
+def _unwrap(f):
+    """Return the function decorated by ``f``, e.g. a ``ReturnsValidator``.
+
+        >>> def f():
+        ...     pass
+        ...
+        >>> def g():
+        ...     pass
+        ...
+        >>> g.__wrapped__ = f
+        >>> _unwrap(g) is f
+        True
+
+    """
+    while getattr(f, '__wrapped__', None) is not None:
+        f = f.__wrapped__
+    return f
+
+
 def _get_args(f):
     """Extract argument positional and optional from function.
 
@@ -132,10 +501,8 @@ def _get_args(f):
     return args, kwargs
 
 
-def _get_returns(f):
-    if hasattr(f, '__annotations__'):
-        return f.__annotations__.get('return', {})
-    return {}
+def _get_returns(f, definitions=None):
+    return decorator._get_annotation(f, 'return', definitions)
 
 
 def _get_raises(f):
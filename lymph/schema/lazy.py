@@ -0,0 +1,196 @@
+"""Schema registries whose service versions are decoded on demand.
+
+Schemas loaded with :meth:`lymph.schema.schema.Schema.open` only read an
+index of the services and versions of the file at first, a service version
+is decoded the first time it's accessed and kept in a cache whose total size
+can be capped.
+
+JSON files are indexed once, the byte offsets of each service version are
+stored next to the file in ``<path>.index`` and reused as long as the file
+doesn't change.
+
+"""
+import collections
+import json
+import mmap
+import os
+import re
+import tempfile
+
+import six
+
+from lymph.schema.cache import SizedLRUCache
+
+
+_INDEX_VERSION = 1
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class LazyRegistry(collections.Mapping):
+    """A mapping of service name to versions whose specs are decoded on access.
+
+    :param index: ``{service: {version: location}}``.
+    :param decode: Function returning the spec at a location and its size in
+        bytes.
+    :param maxbytes: Maximum total size of the decoded specs to keep, None
+        for no limit. Specs evicted are decoded again when accessed.
+
+    """
+
+    def __init__(self, index, decode, maxbytes=None):
+        self.__decoded = SizedLRUCache(maxbytes)
+        self.__services = {
+            name: _LazyVersions(name, locations, decode, self.__decoded)
+            for name, locations in index.items()
+        }
+
+    def __getitem__(self, name):
+        return self.__services[name]
+
+    def __iter__(self):
+        return iter(self.__services)
+
+    def __len__(self):
+        return len(self.__services)
+
+    def __contains__(self, name):
+        return name in self.__services
+
+    def todict(self):
+        """Decode the whole registry, the result isn't cached."""
+        return {name: dict(versions) for name, versions in self.items()}
+
+
+class _LazyVersions(collections.Mapping):
+
+    def __init__(self, name, locations, decode, decoded):
+        self.__name = name
+        self.__locations = locations
+        self.__decode = decode
+        self.__decoded = decoded
+
+    def __getitem__(self, version):
+        key = (self.__name, version)
+        try:
+            return self.__decoded[key]
+        except KeyError:
+            spec, size = self.__decode(self.__locations[version])
+            self.__decoded.set(key, spec, size)
+            return spec
+
+    def __iter__(self):
+        return iter(self.__locations)
+
+    def __len__(self):
+        return len(self.__locations)
+
+    def __contains__(self, version):
+        return version in self.__locations
+
+
+def open_json(path, maxbytes=None):
+    """Return a :class:`LazyRegistry` of the JSON schema file at ``path``.
+
+    :raises ValueError: In case the file isn't a JSON schema.
+
+    """
+    index = _load_index(path)
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def decode(location):
+        start, end = location
+        return json.loads(buf[start:end].decode('utf-8')), end - start
+
+    return LazyRegistry(index, decode, maxbytes)
+
+
+def _load_index(path):
+    stat = os.stat(path)
+    index_path = path + '.index'
+    try:
+        with open(index_path) as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        cached = {}
+    if cached.get('version') == _INDEX_VERSION and cached.get('size') == stat.st_size and cached.get('mtime') == stat.st_mtime:
+        return cached['services']
+
+    with open(path, 'rb') as f:
+        services = index_json(f.read())
+
+    entry = {'version': _INDEX_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime, 'services': services}
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.rename(tmp, index_path)
+    except (IOError, OSError):
+        pass  # e.g. read-only directory, the file is indexed again next time.
+    return services
+
+
+def index_json(data):
+    """Return the byte offsets of each service version of a JSON schema.
+
+        >>> index_json(b'{"echo": {"": {"methods": {}}}, "users": {}}')['echo']
+        {u'': [14, 29]}
+
+    Versions are parsed to find where they end but not kept in memory.
+
+    :raises ValueError: In case ``data`` isn't a JSON schema.
+
+    """
+    # Latin-1 maps bytes to characters one to one, so that offsets in the
+    # text are offsets in the file.
+    scanner = _Scanner(data if six.PY2 else data.decode('latin-1'))
+    index = {}
+    for service in scanner.keys():
+        versions = index[service] = {}
+        for version in scanner.keys():
+            versions[version] = list(scanner.skip_value())
+    return index
+
+
+class _Scanner(object):
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def keys(self):
+        """Iterate over the keys of the object at the current position.
+
+        The value of each key must be consumed before getting the next one.
+
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            self._expect('"')
+            key, self.pos = json.decoder.scanstring(self.text, self.pos)
+            self._expect(':')
+            yield key if six.PY2 else key.encode('latin-1').decode('utf-8')
+            if self._peek() == ',':
+                self.pos += 1
+            else:
+                self._expect('}')
+                return
+
+    def skip_value(self):
+        """Skip the value at the current position, return its offsets."""
+        start = _WHITESPACE.match(self.text, self.pos).end()
+        _, self.pos = self.decoder.raw_decode(self.text, start)
+        return start, self.pos
+
+    def _peek(self):
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+        return self.text[self.pos:self.pos + 1]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError('expected %r at offset %d' % (char, self.pos))
+        self.pos += 1
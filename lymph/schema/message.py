@@ -1,9 +1,11 @@
+import datetime
 import decimal
 import functools
 import random
 import uuid
 
 import faker
+from faker.providers.person.en_US import Provider as _PersonProvider
 
 from lymph.schema import datastructure
 
@@ -24,27 +26,84 @@ _FACTORIES = {
     'null': lambda: None
 }
 
+# Maximum number of times a definition appears along a chain of nested objects
+# of a fake message, deeper references are built as None.
+_MAX_RECURSION = 2
+
+_FIRST_NAMES = list(_PersonProvider.first_names)
+_LAST_NAMES = list(_PersonProvider.last_names)
+_EPOCH = datetime.datetime(1970, 1, 1)
+# Seconds from the epoch to the latest fake datetime, fixed so that the same
+# seed always builds the same datetimes.
+_MAX_SECONDS = int((datetime.datetime(2020, 1, 1) - _EPOCH).total_seconds())
+
+
+def _names(rng, n):
+    return ['%s %s' % (rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)) for _ in range(n)]
+
+
+def _datetimes(rng, n):
+    return [_EPOCH + datetime.timedelta(seconds=rng.randint(0, _MAX_SECONDS)) for _ in range(n)]
+
+
+# Same as _FACTORIES but build a whole column of ``n`` values from ``rng``.
+_COLUMN_FACTORIES = {
+    'integer': lambda rng, n: [rng.randint(0, 1000000) for _ in range(n)],
+    'decimal': lambda rng, n: [decimal.Decimal(rng.randint(0, 10)) for _ in range(n)],
+    'date': lambda rng, n: [dt.date() for dt in _datetimes(rng, n)],
+    'time': lambda rng, n: [dt.time() for dt in _datetimes(rng, n)],
+    'date-time': _datetimes,
+    'uuid': lambda rng, n: [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(n)],
+    'string': _names,
+    'boolean': lambda rng, n: [rng.random() < 0.5 for _ in range(n)],
+    'float': lambda rng, n: [rng.uniform(-1000000, 1000000) for _ in range(n)],
+    'object': lambda rng, n: [dict(zip(_names(rng, 3), _names(rng, 3))) for _ in range(n)],
+    'array': lambda rng, n: [_names(rng, 3) for _ in range(n)],
+    'null': lambda rng, n: [None] * n,
+}
+
 
 class BuilderMixin(object):
 
-    def __init__(self):
+    def __init__(self, factories=None, definitions=None):
         self.__messages = {}
+        self.__factories = {} if factories is None else factories
+        self.__definitions = definitions or {}
+
+    @property
+    def definitions(self):
+        """Schemas that ``$ref`` in the returned types point to."""
+        return self.__definitions
 
     def set_message(self, func_name, msg):
         self.__messages[func_name] = msg
 
+    def build_message(self, name, rettype):
+        """Build a new fake message for ``name`` of type ``rettype``.
+
+        ``rettype`` is only compiled the first time a message is built for
+        ``name``, the factory is reused afterward.
+
+        """
+        try:
+            fact = self.__factories[name]
+        except KeyError:
+            fact = self.__factories[name] = _compile_factory(rettype, self.__definitions)
+        return fact()
+
     def _get_message(self, name, rettype):
         try:
             msg = self.__messages[name]
         except KeyError:
-            msg = self.__messages[name] = _build_from_type(rettype)
+            msg = self.__messages[name] = self.build_message(name, rettype)
         return msg
 
 
 def build(schema, name, method):
     """Build a fake message.
 
-    :param schema: Service schema generated by ``lymph schema-gen``.
+    :param schema: Service schema generated by ``lymph schema-gen``, message
+        factories are only cached when given a :class:`Schema` instance.
     :param name: Name of service.
     :param method: name for the rpc function.
 
@@ -53,6 +112,59 @@ def build(schema, name, method):
     :raises ValueError: In case given service name or version doesn't exist.
 
     """
+    service, returns = _get_returns(schema, name, method)
+    return service.build_message(method, returns)
+
+
+def build_many(schema, name, method, n, seed=None):
+    """Build ``n`` fake messages at once.
+
+    Unlike :func:`build`, values are generated column-wise: each field of
+    an object is filled for all ``n`` messages at once before the messages
+    are assembled.
+
+    :param schema: Service schema generated by ``lymph schema-gen``.
+    :param name: Name of service.
+    :param method: name for the rpc function.
+    :param n: Number of messages to build.
+    :param seed: Seed of the random generator, messages built with the same
+        seed are identical.
+
+    :return: List of ``n`` messages, see :func:`build`.
+
+    :raises ValueError: In case given service name or version doesn't exist.
+
+    """
+    service, returns = _get_returns(schema, name, method)
+    rng = random.Random(seed)
+    return _compile_column_factory(returns, service.definitions)(rng, n)
+
+
+def iter_many(schema, name, method, n=None, seed=None, chunk_size=1000):
+    """Same as :func:`build_many` but lazily yield the messages.
+
+    Messages are built ``chunk_size`` at a time so memory usage doesn't
+    depend on ``n``, if ``n`` is None messages are yielded forever.
+
+    :raises ValueError: In case given service name or version doesn't exist.
+
+    """
+    service, returns = _get_returns(schema, name, method)
+    rng = random.Random(seed)
+    fact = _compile_column_factory(returns, service.definitions)
+    return _iter_chunks(fact, rng, n, chunk_size)
+
+
+def _iter_chunks(fact, rng, n, chunk_size):
+    while n is None or n > 0:
+        size = chunk_size if n is None else min(chunk_size, n)
+        for msg in fact(rng, size):
+            yield msg
+        if n is not None:
+            n -= size
+
+
+def _get_returns(schema, name, method):
     from lymph.schema.schema import Schema
 
     if not isinstance(schema, Schema):
@@ -70,40 +182,166 @@ def build(schema, name, method):
             'cannot build message since returns was not set for'
             ' service %s method %s' % (name, method))
 
-    return _build_from_type(returns)
+    return service, returns
+
+
+def _compile_factory(returns, definitions=None, refs=()):
+    """Compile a jsonschema to a function that build fake messages of it.
+
+    :param definitions: Schemas that ``$ref`` point to.
+    :param refs: Names of the definitions being compiled, used to cut
+        recursive schemas.
+
+    """
+    compile_ = functools.partial(_compile_factory, definitions=definitions, refs=refs)
+    if '$ref' in returns:
+        name, target = _resolve_ref(returns['$ref'], definitions, refs)
+        if target is None:
+            return _FACTORIES['null']
+        return _compile_factory(target, definitions, refs + (name,))
+    elif 'anyOf' in returns:
+        facts = [compile_(s) for s in returns['anyOf']]
+        return lambda: random.choice(facts)()
+    type_ = returns['type']
+    if type_ == 'number':
+        return _FACTORIES[returns['format']]
+    elif type_ == 'string':
+        if 'format' in returns:
+            return _FACTORIES[returns['format']]
+        return _FACTORIES['string']
+    elif type_ == 'object':
+        if 'properties' in returns:
+            return _get_object_factory(returns['properties'], compile_)
+        elif 'additionalProperties' in returns:
+            return _get_mapping_factory(compile_(returns['additionalProperties']))
+        return _FACTORIES['object']
+    elif type_ == 'array':
+        if isinstance(returns.get('items'), list):  # Tuple.
+            return _get_tuple_factory([compile_(s) for s in returns['items']])
+        elif 'items' in returns:
+            return _get_array_factory(compile_(returns['items']))
+        return _FACTORIES['array']
+    elif isinstance(type_, list):  # e.g. ['array', 'null']
+        facts = [_FACTORIES[t] for t in type_]
+        return lambda: random.choice(facts)()
+    return _FACTORIES[type_]
+
+
+def _resolve_ref(ref, definitions, refs):
+    """Return the name and the schema that ``ref`` points to.
+
+    The schema is None once the definition already appears
+    ``_MAX_RECURSION`` times in ``refs``.
+
+        >>> _resolve_ref('#/definitions/User', {'User': {'type': 'object'}}, ())
+        ('User', {'type': 'object'})
+        >>> _resolve_ref('#/definitions/User', {'User': {'type': 'object'}}, ('User', 'User'))
+        ('User', None)
+        >>> _resolve_ref('#/definitions/Order', {}, ())
+        Traceback (most recent call last):
+            ...
+        ValueError: cannot resolve reference #/definitions/Order
+
+    """
+    name = ref.rpartition('/')[2]
+    if refs.count(name) >= _MAX_RECURSION:
+        return name, None
+    try:
+        return name, definitions[name]
+    except (KeyError, TypeError):
+        raise ValueError('cannot resolve reference %s' % ref)
+
+
+def _get_object_factory(properties, compile_=_compile_factory):
+    facts = [(field, compile_(meta)) for field, meta in properties.items()]
+
+    def _build():
+        msg = {field: fact() for field, fact in facts}
+        return datastructure.JsonSchemaDict(properties, msg)
+    return _build
+
+
+def _get_array_factory(items_fact):
+    return lambda: [items_fact() for _ in range(3)]
+
+
+def _get_tuple_factory(facts):
+    return lambda: [fact() for fact in facts]
+
 
+def _get_mapping_factory(values_fact):
+    return lambda: {_FAKER.name(): values_fact() for _ in range(3)}
 
-def _build_from_type(returns):
+
+def _compile_column_factory(returns, definitions=None, refs=()):
+    """Same as :func:`_compile_factory` but for column factories."""
+    compile_ = functools.partial(_compile_column_factory, definitions=definitions, refs=refs)
+    if '$ref' in returns:
+        name, target = _resolve_ref(returns['$ref'], definitions, refs)
+        if target is None:
+            return _COLUMN_FACTORIES['null']
+        return _compile_column_factory(target, definitions, refs + (name,))
+    elif 'anyOf' in returns:
+        return _get_choice_column_factory([compile_(s) for s in returns['anyOf']])
     type_ = returns['type']
     if type_ == 'number':
-        format = returns['format']
-        fact = _FACTORIES[format]
+        return _COLUMN_FACTORIES[returns['format']]
     elif type_ == 'string':
         if 'format' in returns:
-            fact = _FACTORIES[returns['format']]
-        else:
-            fact = _FACTORIES['string']
+            return _COLUMN_FACTORIES[returns['format']]
+        return _COLUMN_FACTORIES['string']
     elif type_ == 'object':
         if 'properties' in returns:
-            fact = functools.partial(_get_object_factory, returns['properties'])
-        else:
-            fact = _FACTORIES['object']
+            return _get_object_column_factory(returns['properties'], compile_)
+        elif 'additionalProperties' in returns:
+            return _get_mapping_column_factory(compile_(returns['additionalProperties']))
+        return _COLUMN_FACTORIES['object']
     elif type_ == 'array':
-        if 'items' in returns:
-            items_fact = _build_from_type(returns['items'])
-            fact = functools.partial(list, [items_fact() for _ in range(3)])
-        else:
-            fact = _FACTORIES['array']
+        if isinstance(returns.get('items'), list):  # Tuple.
+            return _get_tuple_column_factory([compile_(s) for s in returns['items']])
+        elif 'items' in returns:
+            return _get_array_column_factory(compile_(returns['items']))
+        return _COLUMN_FACTORIES['array']
     elif isinstance(type_, list):  # e.g. ['array', 'null']
-        fact = _FACTORIES[random.choice(type_)]
-    else:
-        fact = _FACTORIES[type_]
+        return _get_choice_column_factory([_COLUMN_FACTORIES[t] for t in type_])
+    return _COLUMN_FACTORIES[type_]
+
+
+def _get_object_column_factory(properties, compile_=_compile_column_factory):
+    fields = list(properties)
+    facts = [compile_(properties[field]) for field in fields]
+
+    def _build(rng, n):
+        columns = [fact(rng, n) for fact in facts]
+        rows = zip(*columns) if columns else [()] * n
+        return [datastructure.JsonSchemaDict(properties, dict(zip(fields, row))) for row in rows]
+    return _build
+
+
+def _get_array_column_factory(items_fact):
+    def _build(rng, n):
+        items = items_fact(rng, 3 * n)
+        return [items[i:i + 3] for i in range(0, 3 * n, 3)]
+    return _build
+
+
+def _get_tuple_column_factory(facts):
+    def _build(rng, n):
+        columns = [fact(rng, n) for fact in facts]
+        return [list(row) for row in zip(*columns)] if columns else [[] for _ in range(n)]
+    return _build
+
 
-    return fact()
+def _get_mapping_column_factory(values_fact):
+    def _build(rng, n):
+        keys = _names(rng, 3 * n)
+        values = values_fact(rng, 3 * n)
+        return [dict(zip(keys[i:i + 3], values[i:i + 3])) for i in range(0, 3 * n, 3)]
+    return _build
 
 
-def _get_object_factory(properties):
-    msg = {}
-    for field, meta in properties.items():
-        msg[field] = _build_from_type(meta)
-    return datastructure.JsonSchemaDict(properties, msg)
+def _get_choice_column_factory(facts):
+    def _build(rng, n):
+        columns = [fact(rng, n) for fact in facts]
+        return [rng.choice(columns)[i] for i in range(n)]
+    return _build
@@ -0,0 +1,124 @@
+"""Metrics of the calls made to hermetic services.
+
+A hook is a callable given a :class:`Call` after each call of a service
+method, errors it raises are logged and don't change the result of the call.
+Services are only instrumented when built with a hook, otherwise their
+methods are the same as without this module:
+
+    >>> from lymph.schema.schema import Schema
+    >>> metrics = CallMetrics()
+    >>> schema = Schema({'echo': {'': {'methods': {'ping': {
+    ...     'args': [], 'kwargs': {'text': ''}, 'returns': {'type': 'string'}}}}}},
+    ...     hook=metrics)
+    >>> echo = schema.build_service('echo')
+    >>> _ = echo.ping(text='a'), echo.ping(text='a'), echo.ping(text='b')
+    >>> metrics.calls
+    Counter({('echo', 'ping'): 3})
+    >>> metrics.cardinality('echo', 'ping', 'text')
+    2
+
+"""
+import bisect
+import collections
+import time
+
+
+# A call of a service method, ``service`` is its versioned name (e.g.
+# ``users@1.0.0``), ``kwargs`` must not be modified, ``duration`` is the time
+# spent in the call and ``build_duration`` the part of it spent building the
+# returned message, in seconds. ``error`` is the exception raised, if any.
+Call = collections.namedtuple('Call', 'service method kwargs duration build_duration error')
+
+clock = getattr(time, 'perf_counter', time.time)
+
+# Upper bounds of the latency histogram buckets, in seconds.
+BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1, float('inf'))
+
+
+class CallMetrics(object):
+    """A hook aggregating the calls per service method.
+
+    :param max_cardinality: Number of distinct values to count per argument,
+        bounds the memory used by arguments taking any value (e.g. ids).
+    :param buckets: Upper bounds of the latency histogram buckets.
+
+    """
+    def __init__(self, max_cardinality=1000, buckets=BUCKETS):
+        self.max_cardinality = max_cardinality
+        self.buckets = buckets
+        # (service, method) -> number of calls
+        self.calls = collections.Counter()
+        self.errors = collections.Counter()
+        # (service, method) -> seconds spent building messages
+        self.build_time = collections.Counter()
+        # (service, method) -> number of calls in each bucket
+        self.__latencies = {}
+        # (service, method, argument) -> distinct values
+        self.__values = {}
+
+    def __call__(self, call):
+        key = call.service, call.method
+        self.calls[key] += 1
+        if call.error is not None:
+            self.errors[key] += 1
+        self.build_time[key] += call.build_duration
+        try:
+            latencies = self.__latencies[key]
+        except KeyError:
+            latencies = self.__latencies[key] = [0] * len(self.buckets)
+        latencies[bisect.bisect_left(self.buckets, call.duration)] += 1
+        for arg, value in call.kwargs.items():
+            values = self.__values.setdefault(key + (arg,), set())
+            if len(values) < self.max_cardinality:
+                values.add(_hashable(value))
+
+    def cardinality(self, service, method, arg):
+        """Return the number of distinct values given to ``arg``.
+
+        Values stop being counted once ``max_cardinality`` is reached.
+
+        """
+        return len(self.__values.get((service, method, arg), ()))
+
+    def cardinalities(self):
+        """Return ``{(service, method, argument): number of distinct values}``."""
+        return {key: len(values) for key, values in self.__values.items()}
+
+    def histogram(self, service, method):
+        """Return the ``(upper bound, number of calls)`` of each latency bucket."""
+        latencies = self.__latencies.get((service, method), [0] * len(self.buckets))
+        return list(zip(self.buckets, latencies))
+
+    def clear(self):
+        self.calls.clear()
+        self.errors.clear()
+        self.build_time.clear()
+        self.__latencies.clear()
+        self.__values.clear()
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        # e.g. dicts and lists.
+        return repr(value)
+    return value
+
+
+def statsd_hook(client, prefix='lymph_schema'):
+    """Return a hook sending the calls to a statsd ``client``.
+
+    The client must have the ``incr(stat)`` and ``timing(stat, ms)`` methods
+    of e.g. the ``statsd`` package.
+
+    """
+    def hook(call):
+        stat = '%s.%s.%s' % (prefix, call.service.replace('.', '_'), call.method)
+        client.incr(stat + '.calls')
+        if call.error is not None:
+            client.incr(stat + '.errors')
+        client.timing(stat + '.latency', call.duration * 1000)
+        client.timing(stat + '.build', call.build_duration * 1000)
+    return hook
+
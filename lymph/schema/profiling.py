@@ -0,0 +1,172 @@
+"""Time and memory spent in the phases of schema generation.
+
+The generator marks its phases (loading configs, importing interfaces,
+inspecting methods, converting return types to JSON schema...) with
+:func:`phase`, which does nothing unless a :class:`Profiler` is running:
+
+    >>> profiler = Profiler()
+    >>> with profiler:
+    ...     with phase('import', 'orders.interfaces:Orders'):
+    ...         pass
+    >>> [(record.name, record.label) for record in profiler.records]
+    [('import', 'orders.interfaces:Orders')]
+
+The memory of a phase is the growth of the memory traced by ``tracemalloc``
+when it's available (Python 3), or of the peak resident memory otherwise.
+
+"""
+import collections
+import cProfile
+import json
+import os
+import resource
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+Record = collections.namedtuple('Record', 'name label start duration memory')
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# The running profiler, if any.
+_PROFILER = None
+
+
+class _NoPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name, label=''):
+    """Return a context manager recording ``name`` phase in the running profiler.
+
+    :param label: What the phase is about, e.g. the class path of the
+        imported interface.
+
+    """
+    if _PROFILER is None:
+        return _NO_PHASE
+    return _Phase(_PROFILER, name, label)
+
+
+class _Phase(object):
+
+    __slots__ = ('profiler', 'name', 'label', 'start', 'memory')
+
+    def __init__(self, profiler, name, label):
+        self.profiler = profiler
+        self.name = name
+        self.label = label
+
+    def __enter__(self):
+        self.memory = _get_memory()
+        self.start = _clock()
+
+    def __exit__(self, *exc_info):
+        duration = _clock() - self.start
+        self.profiler.records.append(Record(
+            self.name, self.label, self.start - self.profiler.started,
+            duration, _get_memory() - self.memory))
+
+
+def _get_memory():
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    # KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Profiler(object):
+    """Record the phases run while it's used as a context manager.
+
+    :param cprofile: Also run ``cProfile``, see :meth:`dump_stats`.
+
+    """
+    def __init__(self, cprofile=False):
+        self.records = []
+        self.started = None
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.__tracing = False
+
+    def __enter__(self):
+        global _PROFILER
+        if _PROFILER is not None:
+            raise RuntimeError('a profiler is already running')
+        if tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__tracing = True
+        self.started = _clock()
+        _PROFILER = self
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _PROFILER
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        _PROFILER = None
+        if self.__tracing:
+            tracemalloc.stop()
+            self.__tracing = False
+
+    def totals(self):
+        """Return ``{phase name: (calls, duration, memory)}`` in the order phases first ran."""
+        totals = collections.OrderedDict()
+        for record in sorted(self.records, key=lambda record: record.start):
+            calls, duration, memory = totals.get(record.name, (0, 0, 0))
+            totals[record.name] = (calls + 1, duration + record.duration, memory + record.memory)
+        return totals
+
+    def slowest(self, name, n=10):
+        """Return the ``n`` longest records of the ``name`` phase."""
+        records = [record for record in self.records if record.name == name]
+        return sorted(records, key=lambda record: record.duration, reverse=True)[:n]
+
+    def report(self, fp, slowest=10):
+        """Write the totals of each phase and the slowest interfaces to ``fp``."""
+        fp.write('%-40s %8s %12s %14s\n' % ('phase', 'calls', 'time (s)', 'memory (KiB)'))
+        for name, (calls, duration, memory) in self.totals().items():
+            if name != 'interface':
+                fp.write('%-40s %8d %12.3f %14d\n' % (name, calls, duration, memory // 1024))
+        records = self.slowest('interface', slowest)
+        if records:
+            fp.write('\n%-40s %8s %12s %14s\n' % ('slowest interfaces', '', 'time (s)', 'memory (KiB)'))
+            for record in records:
+                fp.write('%-40s %8s %12.3f %14d\n' % (record.label, '', record.duration, record.memory // 1024))
+
+    def dump_trace(self, fp):
+        """Write the phases to ``fp`` in the Chrome trace event format.
+
+        The file can be opened in ``chrome://tracing`` or Perfetto.
+
+        """
+        pid = os.getpid()
+        events = [{
+            'name': record.label or record.name,
+            'cat': record.name,
+            'ph': 'X',
+            'ts': int(record.start * 1e6),
+            'dur': int(record.duration * 1e6),
+            'pid': pid,
+            'tid': 0,
+            'args': {'memory': record.memory},
+        } for record in self.records]
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fp)
+
+    def dump_stats(self, path):
+        """Write the ``cProfile`` stats to ``path``, see :mod:`pstats`."""
+        if self.cprofile is None:
+            raise ValueError('profiler created without cprofile')
+        self.cprofile.dump_stats(path)
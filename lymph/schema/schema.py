@@ -1,45 +1,249 @@
+import bisect
+import hashlib
+import logging
+
 from semantic_version import Version
 
 from lymph.core.versioning import parse_versioned_name, compatible
 
-from lymph.schema import message
+from lymph.schema import binary, lazy, message, metrics
+from lymph.schema.cache import LRUCache
+from lymph.schema.diff import _canonical, diff_schemas
+from lymph.schema.signature import compile_args_checker
+
+
+logger = logging.getLogger(__name__)
 
 
 class Schema(object):
-    def __init__(self, raw):
+    """A registry of service schemas.
+
+    :param raw: Schema as generated by ``lymph gen-schema``.
+    :param cache_size: Number of resolved ``name@version`` to keep.
+    :param hook: Called with a :class:`lymph.schema.metrics.Call` after each
+        call of the services built, see :mod:`lymph.schema.metrics`.
+
+    """
+    def __init__(self, raw, cache_size=256, hook=None):
         self.__raw = raw
+        self.__hook = hook
+        self.__factories = {}
+        # Sorted versions of each service, built on first lookup.
+        self.__versions = {}
+        self.__resolved = LRUCache(cache_size)
+        # Path in the registry -> fingerprint, see fingerprint().
+        self.__fingerprints = {}
+
+    @classmethod
+    def open(cls, path, maxbytes=None, **kwargs):
+        """Load a schema from a file written by :meth:`dump` or a JSON file.
+
+        The file is memory mapped and only the index of its services and
+        versions is read, a service version is decoded the first time it's
+        built, see :mod:`lymph.schema.lazy`. Other keyword arguments are
+        passed to :class:`Schema`.
+
+        :param maxbytes: Maximum size of the decoded service versions to
+            keep, in bytes of the file. None for no limit.
+
+        :raises ValueError: In case the file isn't a binary or JSON schema.
+
+        """
+        with open(path, 'rb') as f:
+            magic = f.read(len(binary.MAGIC))
+        if magic == binary.MAGIC:
+            return cls(binary.open_mmap(path, maxbytes), **kwargs)
+        return cls(lazy.open_json(path, maxbytes), **kwargs)
+
+    def dump(self, fp):
+        """Write the schema to ``fp`` in binary format, see :mod:`lymph.schema.binary`."""
+        binary.dump(self.__raw, fp)
 
     @property
     def services(self):
         return self.__raw.keys()
 
-    def build_service(self, name):
-        name, version = parse_versioned_name(name)
-        if version:
-            version = self._get_best_match(name, version)
-        version = str(version) if version else ''
+    def build_service(self, name, hook=None):
+        """Build a hermetic service emulating ``name``.
 
-        try:
-            methods = self.__raw[name][version]['methods']
-        except KeyError:
-            raise ValueError("unknown service or version")
-        return Service(name, version, methods)
+        :param hook: Overrides the hook of the schema for this service.
+
+        """
+        name, version = self._resolve(name)
+        spec = self.__raw[name][version]
+        factories = self.__factories.setdefault((name, version), {})
+        return Service(name, version, spec['methods'], factories, spec.get('definitions'),
+                       self.__hook if hook is None else hook)
+
+    def resolve_many(self, names):
+        """Build a service for each of ``names``.
+
+        :raises ValueError: In case any of the given service names or versions
+            doesn't exist.
+
+        """
+        return [self.build_service(name) for name in names]
 
     def todict(self):
+        # e.g. lazily loaded or compacted registries.
+        todict = getattr(self.__raw, 'todict', None)
+        if todict is not None:
+            return todict()
+        return self.__raw
+
+    @property
+    def _registry(self):
+        """The registry as given, a mapping that may not be made of dicts."""
         return self.__raw
 
+    def fingerprint(self, name=None, method=None):
+        """Return the fingerprint of the registry, a service version or a method.
+
+        Fingerprints are SHA-1 hex digests of the content only, they don't
+        depend on key order or on where the schema was loaded from. They
+        form a Merkle tree: a method's fingerprint is the hash of its spec,
+        a service version's the hash of its methods' fingerprints and so on
+        up to the whole registry, so a change anywhere changes the
+        fingerprints of all its ancestors and only those.
+
+        :param name: Service name in ``name@version`` form, resolved like
+            :meth:`build_service`. The whole registry if None.
+        :param method: Method name of ``name``.
+
+        :raises ValueError: In case given service name, version or method
+            doesn't exist.
+
+        """
+        if name is None:
+            return self._get_fingerprint(())
+        service, version = self._resolve(name)
+        if method is None:
+            return self._get_fingerprint((service, version))
+        if method not in self.__raw[service][version]['methods']:
+            raise ValueError('unknown method %s for service %s' % (method, name))
+        return self._get_fingerprint((service, version, method))
+
+    def service_fingerprint(self, service):
+        """Return the fingerprint of all the versions of ``service``.
+
+        :raises ValueError: In case given service doesn't exist.
+
+        """
+        if service not in self.__raw:
+            raise ValueError("unknown service or version")
+        return self._get_fingerprint((service,))
+
+    def diff(self, other):
+        """Return the changes from this schema to ``other``.
+
+        See :func:`lymph.schema.diff.diff_schemas`.
+
+        """
+        return diff_schemas(self, other)
+
+    def _get_known_fingerprint(self, path):
+        """Return the fingerprint of ``path`` if already computed or None."""
+        return self.__fingerprints.get(path)
+
+    def _get_fingerprint(self, path):
+        try:
+            return self.__fingerprints[path]
+        except KeyError:
+            pass
+
+        if len(path) == 3:  # Method.
+            service, version, method = path
+            fingerprint = _hash(_canonical(self.__raw[service][version]['methods'][method]))
+        elif len(path) == 2:  # Service version.
+            service, version = path
+            spec = self.__raw[service][version]
+            children = [('methods.%s' % m, self._get_fingerprint(path + (m,))) for m in spec['methods']]
+            # e.g. definitions.
+            children.extend((k, _hash(_canonical(v))) for k, v in spec.items() if k != 'methods')
+            fingerprint = _hash_children(children)
+        elif len(path) == 1:  # Service.
+            fingerprint = _hash_children(
+                (v, self._get_fingerprint(path + (v,))) for v in self.__raw[path[0]])
+        else:
+            fingerprint = _hash_children((s, self._get_fingerprint((s,))) for s in self.__raw)
+
+        self.__fingerprints[path] = fingerprint
+        return fingerprint
+
+    def _resolve(self, name):
+        try:
+            return self.__resolved[name]
+        except KeyError:
+            pass
+
+        service, version = parse_versioned_name(name)
+        if version:
+            version = self._get_best_match(service, version)
+
+        resolved = (service, version or '')
+        # Membership only, lazily loaded versions are decoded when built.
+        if service not in self.__raw or resolved[1] not in self.__raw[service]:
+            raise ValueError("unknown service or version")
+        self.__resolved[name] = resolved
+        return resolved
+
     def _get_best_match(self, name, version):
+        try:
+            versions, keys = self.__versions[name]
+        except KeyError:
+            versions, keys = self.__versions[name] = self._index_versions(name)
+
         spec = compatible(version)
-        return spec.select(Version(v) for v in self.__raw[name])
+        # Compatible versions are below the next major, so only walk back
+        # from there and stop as soon as versions get lower than requested.
+        i = bisect.bisect_left(versions, version.next_major())
+        while i > 0 and versions[i - 1] >= version:
+            i -= 1
+            if spec.match(versions[i]):
+                return keys[i]
+        return None
+
+    def _index_versions(self, name):
+        try:
+            service = self.__raw[name]
+        except KeyError:
+            raise ValueError("unknown service or version")
+
+        index = []
+        for key in service:
+            try:
+                index.append((Version(key), key))
+            except ValueError:  # e.g. unversioned service.
+                continue
+        index.sort()
+        return [v for v, _ in index], [k for _, k in index]
+
+
+def _hash(data):
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def _hash_children(children):
+    return _hash(_canonical(sorted(children)))
 
 
 class Service(message.BuilderMixin):
-    """A hermetic service emulating a remote lymph interface."""
-    def __init__(self, name, version, methods):
-        super(Service, self).__init__()
+    """A hermetic service emulating a remote lymph interface.
+
+    Services built from the same :class:`Schema` share their compiled
+    message ``factories``, ``definitions`` are the schemas that ``$ref`` in
+    the methods return types point to. Methods are only instrumented when
+    given a ``hook``, see :mod:`lymph.schema.metrics`.
+
+    """
+    def __init__(self, name, version, methods, factories=None, definitions=None, hook=None):
+        super(Service, self).__init__(factories, definitions)
         self.__name = name
         self.__version = version
         self.__methods = methods
+        self.__hook = hook
 
     @property
     def methods(self):
@@ -57,37 +261,63 @@ class Service(message.BuilderMixin):
 
     @property
     def schema(self):
+        methods = {name: dict(method) for name, method in self.__methods.items()}
+        spec = {'methods': methods}
+        if self.definitions:
+            spec['definitions'] = self.definitions
         return {
             self.__name: {
-                self.__version: {
-                    'methods': self.__methods,
-                }
+                self.__version: spec,
             }
         }
 
     def __getattr__(self, meth):
         if meth not in self.__methods:
             raise AttributeError("unknown attribute %s" % meth)
-        return self._get_method(meth)
+        # Cache the proxy in the instance so next lookups don't get here.
+        proxy = self.__dict__[meth] = self._get_method(meth)
+        return proxy
 
     def _get_method(self, meth):
-        acc_args = self.__methods[meth]['args']
-        acc_kwargs = self.__methods[meth]['kwargs']
+        spec = self.__methods[meth]
+        check_args = compile_args_checker(meth, spec['args'], spec['kwargs'])
+        returns = spec['returns']
+
+        if self.__hook is not None:
+            return self._get_instrumented_method(meth, check_args, returns)
 
         def _inner(**kwargs):
-            self._validate_args(meth, kwargs, acc_args, acc_kwargs)
+            check_args(kwargs)
 
-            return self._get_message(meth, self.__methods[meth]['returns'])
+            return self._get_message(meth, returns)
         return _inner
 
-    @staticmethod
-    def _validate_args(func_name, passed_kwargs, acc_args, acc_kwargs):
-        for a in passed_kwargs:
-            if not (a in acc_kwargs or a in acc_args):
-                raise TypeError('%s() got an unexpected keyword argument %r' % (func_name, a))
+    def _get_instrumented_method(self, meth, check_args, returns):
+        hook = self.__hook
+        name = self.versionned_name
+        clock = metrics.clock
 
-        for a in acc_args:
-            if a not in passed_kwargs:
-                raise TypeError('%s() takes exactly %d argument (%d given)' % (func_name, (len(acc_args)), len(passed_kwargs)))
+        def _inner(**kwargs):
+            build_duration = 0.0
+            error = None
+            start = clock()
+            try:
+                check_args(kwargs)
+                build_start = clock()
+                msg = self._get_message(meth, returns)
+                build_duration = clock() - build_start
+                return msg
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                _call_hook(hook, metrics.Call(name, meth, kwargs, clock() - start, build_duration, error))
+        return _inner
 
 
+def _call_hook(hook, call):
+    # Errors of the hook must not replace the result of the call.
+    try:
+        hook(call)
+    except Exception:
+        logger.exception('error in the hook of %s.%s', call.service, call.method)
@@ -0,0 +1,97 @@
+"""Functions checking and wrapping call signatures.
+
+Unlike :mod:`lymph.schema.validation` this module doesn't import marshmallow
+or typing, hermetic services use it to check the arguments of their calls.
+
+"""
+import functools
+import inspect
+
+import six
+
+
+def compile_args_checker(name, args, kwargs, types=None):
+    """Compile the argument spec of a method to a function checking calls.
+
+    The function takes the arguments of a call by keyword, like lymph passes
+    them, and raises :class:`TypeError` when they don't match.
+
+        >>> check = compile_args_checker('get', ['id'], {'fields': None}, {'id': int})
+        >>> check({'id': 1, 'fields': ['name']})
+        >>> check({'fields': ['name']})
+        Traceback (most recent call last):
+            ...
+        TypeError: get() takes exactly 1 argument (1 given)
+        >>> check({'id': '1'})
+        Traceback (most recent call last):
+            ...
+        TypeError: get() argument id: expected number (integer), got '1'
+
+    :param args: Names of the required arguments.
+    :param kwargs: Optional arguments and their default values.
+    :param types: Types or JSON schemas of the arguments.
+
+    """
+    required = frozenset(args)
+    accepted = required.union(kwargs)
+    checks = []
+    if types:
+        # Compiling types needs marshmallow and typing, only import them then.
+        from lymph.schema.validation import _get_arg_check
+        checks = [(arg, _get_arg_check(name, arg, type_)) for arg, type_ in types.items()]
+
+    def _check(passed):
+        if not accepted.issuperset(passed):
+            arg = sorted(set(passed) - accepted)[0]
+            raise TypeError('%s() got an unexpected keyword argument %r' % (name, arg))
+        if not required.issubset(passed):
+            raise TypeError('%s() takes exactly %d argument (%d given)' % (name, len(required), len(passed)))
+        for arg, check in checks:
+            if arg in passed and (arg in required or passed[arg] is not kwargs[arg]):
+                check(passed[arg])
+    return _check
+
+
+def _get_argspec(func):
+    """Return the arguments of ``func``, the default values and the names
+    of its variadic arguments.
+
+        >>> _get_argspec(lambda a, b=1, *c, **d: None)
+        (['a', 'b'], (1,), 'c', 'd')
+
+    """
+    if six.PY2:
+        spec = inspect.getargspec(func)
+    else:
+        spec = inspect.getfullargspec(func)
+        if spec.kwonlyargs:
+            raise ValueError('unsupported function type')
+    return spec[0], spec[3] or (), spec[1], spec[2]
+
+
+def _wrap(func, body, namespace):
+    """Return a function with the same signature as ``func`` running ``body``.
+
+    ``body`` is the indented source of the function, in which ``__call``
+    stands for the call of ``func`` with all the arguments. The names in
+    ``namespace`` and ``__defaults``, the default values of ``func``, are
+    available to it.
+
+    """
+    args, defaults, varargs, varkw = _get_argspec(func)
+    first_default = len(args) - len(defaults)
+    params = args[:first_default] + ['%s=__defaults[%d]' % (a, i) for i, a in enumerate(args[first_default:])]
+    call = list(args)
+    if varargs:
+        params.append('*' + varargs)
+        call.append('*' + varargs)
+    if varkw:
+        params.append('**' + varkw)
+        call.append('**' + varkw)
+
+    source = 'def %s(%s):\n%s\n' % (func.__name__, ', '.join(params), body.replace('__call', '__func(%s)' % ', '.join(call)))
+    namespace = dict(namespace, __func=func, __defaults=defaults)
+    six.exec_(compile(source, '<%s wrapper>' % func.__name__, 'exec'), namespace)
+    wrapper = functools.update_wrapper(namespace[func.__name__], func)
+    wrapper.__wrapped__ = func
+    return wrapper
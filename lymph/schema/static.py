@@ -0,0 +1,284 @@
+"""Extract the rpc methods of an interface without importing its module.
+
+The module source is parsed with :mod:`ast` and only the constructs whose
+meaning can be known statically are accepted, anything else (e.g. a
+marshmallow schema as return type, an unknown decorator or base class)
+raises :class:`Unresolvable` so that the caller can fall back to importing
+the interface.
+
+"""
+import ast
+import importlib
+import os
+import sys
+
+from six.moves import builtins
+
+from lymph.schema.decorator import _to_jsonschema
+
+
+_INTERFACES = frozenset(['lymph.Interface', 'lymph.core.interfaces.Interface'])
+_RPC = frozenset(['lymph.rpc', 'lymph.core.decorators.rpc'])
+_RAW_RPC = frozenset(['lymph.raw_rpc', 'lymph.core.decorators.raw_rpc'])
+_SPEC = frozenset(['lymph.schema.spec', 'lymph.schema.decorator.spec'])
+# Decorators that don't turn a function into an rpc method.
+_NOT_RPC = frozenset([
+    'lymph.event', 'lymph.core.decorators.event',
+    'lymph.task', 'lymph.core.decorators.task',
+    'staticmethod', 'classmethod', 'property',
+])
+_NOT_RPC_MODULES = frozenset(['abc', 'contextlib', 'functools'])
+
+# Modules that can be imported to resolve return types, they are cheap to
+# import and don't have side effects.
+_TYPE_MODULES = frozenset(['datetime', 'decimal', 'uuid', 'typing', 'six'])
+
+
+class Unresolvable(ValueError):
+    """Raised when an interface can't be introspected statically."""
+
+
+def get_rpc_methods(class_path):
+    """Return the rpc methods specs of an interface from its source.
+
+    :param class_path: Interface class in ``module:Class`` form.
+
+    :return: The same methods as ``generator._get_rpc_methods``.
+
+    :raises Unresolvable: In case the interface can't be introspected
+        without importing it.
+
+    """
+    if ':' not in class_path:
+        raise Unresolvable('cannot import object %r' % class_path)
+    module_name, class_name = class_path.split(':', 1)
+
+    filename = _find_source(module_name)
+    with open(filename, 'rb') as f:
+        tree = ast.parse(f.read(), filename)
+
+    module = _Module(module_name, filename, tree)
+    return module.get_rpc_methods(class_name)
+
+
+def _find_source(module_name):
+    parts = module_name.split('.')
+    for path in sys.path:
+        base = os.path.join(path or os.curdir, *parts)
+        for filename in (base + '.py', os.path.join(base, '__init__.py')):
+            if os.path.isfile(filename):
+                return filename
+    raise Unresolvable('cannot find source of module %s' % module_name)
+
+
+class _Module(object):
+
+    def __init__(self, name, filename, tree):
+        self.name = name
+        self.package = name if filename.endswith('__init__.py') else name.rpartition('.')[0]
+        self.classes = {}
+        # Local name -> dotted name of the imported object.
+        self.imports = {}
+        # Other names bound at module level, they shadow builtins.
+        self.names = set()
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = alias.name
+                    else:
+                        top = alias.name.split('.')[0]
+                        self.imports[top] = top
+            elif isinstance(node, ast.ImportFrom):
+                module = self._get_import_module(node)
+                for alias in node.names:
+                    self.imports[alias.asname or alias.name] = '%s.%s' % (module, alias.name)
+            else:
+                self.names.update(_get_bound_names(node))
+
+    def _get_import_module(self, node):
+        if not node.level:
+            return node.module
+        package = self.package.split('.')
+        if node.level > 1:
+            package = package[:-(node.level - 1)]
+        return '.'.join(package + ([node.module] if node.module else []))
+
+    def get_rpc_methods(self, class_name):
+        try:
+            node = self.classes[class_name]
+        except KeyError:
+            raise Unresolvable('cannot find class %s in %s' % (class_name, self.name))
+
+        methods = {}
+        # Like lymph's InterfaceBase, later bases override earlier ones.
+        for base in node.bases:
+            if isinstance(base, ast.Name) and base.id in self.classes:
+                methods.update(self.get_rpc_methods(base.id))
+            elif self.resolve(base) not in _INTERFACES:
+                raise Unresolvable('cannot resolve base class of %s' % class_name)
+
+        for stmt in node.body:
+            if isinstance(stmt, ast.FunctionDef):
+                spec = self._get_rpc_spec(stmt)
+                if spec is not None:
+                    methods[spec['name']] = spec
+            elif isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Call):
+                func = stmt.value.func
+                if isinstance(func, ast.Call) or self.resolve(func) in _RPC | _RAW_RPC:
+                    raise Unresolvable('cannot resolve rpc method assignment in %s' % class_name)
+        return methods
+
+    def resolve(self, node):
+        """Return the dotted name of a name or attribute node, or None."""
+        if isinstance(node, ast.Name):
+            if node.id in self.imports:
+                return self.imports[node.id]
+            if node.id in self.names or node.id in self.classes:
+                return None
+            return node.id if hasattr(builtins, node.id) else None
+        elif isinstance(node, ast.Attribute):
+            value = self.resolve(node.value)
+            return '%s.%s' % (value, node.attr) if value else None
+        return None
+
+    def _get_rpc_spec(self, node):
+        if not node.decorator_list:
+            return None
+
+        decorators = []
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call):
+                decorators.append((self.resolve(decorator.func), decorator))
+            else:
+                decorators.append((self.resolve(decorator), None))
+
+        name, call = decorators[0]
+        if name not in _RPC | _RAW_RPC:
+            if all(_is_not_rpc(n) for n, _ in decorators):
+                return None
+            raise Unresolvable('cannot resolve decorators of %s' % node.name)
+        if call is None or len(decorators) > 2:
+            raise Unresolvable('cannot resolve decorators of %s' % node.name)
+
+        returns = {}
+        if len(decorators) == 2:
+            spec_name, spec_call = decorators[1]
+            if spec_name not in _SPEC or spec_call is None:
+                raise Unresolvable('cannot resolve decorators of %s' % node.name)
+            type_ = _get_argument(spec_call, 0, 'returns')
+            if type_ is None:
+                raise Unresolvable('missing return type of %s' % node.name)
+            returns = _to_jsonschema(self._eval_type(type_))
+        if getattr(node, 'returns', None) is not None:
+            # Python 3 annotations are stored as is by the function.
+            raise Unresolvable('cannot resolve annotations of %s' % node.name)
+
+        raises = None
+        if name in _RPC:
+            raises = _get_argument(call, 0, 'raises')
+
+        args, kwargs = self._get_args(node)
+        return {
+            'name': node.name,
+            'args': args[1:],  # Skip self.
+            'kwargs': kwargs,
+            'doc': ast.get_docstring(node, clean=False) or '',
+            'raises': self._get_raises(raises),
+            'returns': returns,
+        }
+
+    def _get_args(self, node):
+        spec = node.args
+        if spec.vararg or spec.kwarg or getattr(spec, 'kwonlyargs', None):
+            raise ValueError("unsupported function type")
+
+        names = []
+        for arg in spec.args:
+            if isinstance(arg, ast.Name):  # Python 2.
+                names.append(arg.id)
+            elif hasattr(arg, 'arg'):
+                names.append(arg.arg)
+            else:
+                raise Unresolvable('cannot resolve arguments of %s' % node.name)
+
+        try:
+            defaults = [ast.literal_eval(d) for d in spec.defaults]
+        except ValueError:
+            raise Unresolvable('cannot resolve default arguments of %s' % node.name)
+
+        pos_offset = len(names) - len(defaults)
+        return names[:pos_offset], dict(zip(names[pos_offset:], defaults))
+
+    def _get_raises(self, node):
+        if node is None:
+            return []
+        nodes = node.elts if isinstance(node, ast.Tuple) else [node]
+
+        raises = []
+        for n in nodes:
+            name = self.resolve(n)
+            if name is None and isinstance(n, ast.Name) and n.id in self.classes:
+                name = n.id
+            if name is None:
+                raise Unresolvable('cannot resolve raised exceptions')
+            name = name.rpartition('.')[2]
+            # Constants can't be told from classes, e.g. a tuple of errors.
+            if not name[0].isupper() or name.isupper():
+                raise Unresolvable('cannot resolve raised exception %s' % name)
+            raises.append(name)
+        return raises
+
+    def _eval_type(self, node):
+        if _is_none(node):
+            return None
+        elif isinstance(node, ast.Subscript):
+            generic = self._eval_type(node.value)
+            params = node.slice.value if isinstance(node.slice, ast.Index) else node.slice
+            if isinstance(params, ast.Tuple):
+                return generic[tuple(self._eval_type(p) for p in params.elts)]
+            return generic[self._eval_type(params)]
+
+        name = self.resolve(node)
+        if name is None:
+            raise Unresolvable('cannot resolve type of %s' % ast.dump(node))
+        module, _, attr = name.rpartition('.')
+        if not module:
+            return getattr(builtins, attr)
+        if module.split('.')[0] not in _TYPE_MODULES:
+            raise Unresolvable('cannot resolve type %s' % name)
+        return getattr(importlib.import_module(module), attr)
+
+
+def _get_argument(call, position, keyword):
+    for kw in call.keywords:
+        if kw.arg == keyword:
+            return kw.value
+    if len(call.args) > position:
+        return call.args[position]
+    return None
+
+
+def _get_bound_names(node):
+    """Return the names that a module level statement binds."""
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+        return [node.name]
+    elif isinstance(node, ast.Name):
+        return [node.id] if isinstance(node.ctx, ast.Store) else []
+    names = []
+    for child in ast.iter_child_nodes(node):
+        names.extend(_get_bound_names(child))
+    return names
+
+
+def _is_not_rpc(name):
+    return name in _NOT_RPC or (name or '').split('.')[0] in _NOT_RPC_MODULES
+
+
+def _is_none(node):
+    if isinstance(node, ast.Name):  # Python 2.
+        return node.id == 'None'
+    return getattr(node, 'value', False) is None and type(node).__name__ in ('NameConstant', 'Constant')
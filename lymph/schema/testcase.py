@@ -13,13 +13,17 @@ from lymph.schema import message
 @six.add_metaclass(abc.ABCMeta)
 class MockServiceTester(RpcMockTestCase):
 
+    # Called after each call of the mocked services, see lymph.schema.metrics.
+    # e.g. a CallMetrics instance, functions must be made static methods.
+    rpc_hook = None
+
     @abc.abstractproperty
     def rpc_schema(self):
         pass
 
     def setUp(self):
         super(MockServiceTester, self).setUp()
-        self.mocker = Mocker(self)
+        self.mocker = Mocker(self, hook=self.rpc_hook)
 
     # XXX: Arguments name are prefixed with '__' to not collide with **kwargs keys.
     def assert_called(self, __name, __meth, **kwargs):
@@ -37,9 +41,10 @@ class MockServiceTester(RpcMockTestCase):
 
 
 class Mocker(object):
-    def __init__(self, testcase):
+    def __init__(self, testcase, hook=None):
         self._testcase = testcase
         self._services = {}
+        self._hook = hook
 
     def on(self, name, meth, **kwargs):
         svc = self._get_service(name)
@@ -49,7 +54,7 @@ class Mocker(object):
         try:
             svc = self._services[name]
         except KeyError:
-            svc = self._testcase.rpc_schema.build_service(name)
+            svc = self._testcase.rpc_schema.build_service(name, hook=self._hook)
             self._services[name] = svc
 
             mocks = {}
@@ -80,7 +85,7 @@ class MockCall(object):
         # TODO: Check if type matches with what is expected to be returned.
         if isinstance(ret, dict):
             msg = message.build(
-                self._service.schema,
+                self._testcase.rpc_schema,
                 self._service.versionned_name,
                 self._meth)
             msg.update(ret)
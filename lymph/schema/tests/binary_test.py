@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lymph.schema import binary
+from lymph.schema.schema import Schema
+
+
+RAW = {
+    'users': {
+        '1.0.0': {
+            'methods': {
+                'get': {
+                    'args': ['id'],
+                    'kwargs': {'limit': 10, 'offset': -1, 'ratio': 0.5, 'name': None, 'active': True},
+                    'doc': u'Get a user – by id',
+                    'raises': ['NotFound'],
+                    'name': 'get',
+                    'returns': {
+                        'type': 'object',
+                        'properties': {
+                            'id': {'type': 'integer', 'maximum': 2 ** 70},
+                            'name': {'type': ['string', 'null']},
+                        },
+                    },
+                },
+            },
+        },
+        '2.0.0': {
+            'methods': {},
+            'definitions': {'User': {'type': 'object', 'properties': {}}},
+        },
+    },
+    'echo': {
+        '': {
+            'methods': {
+                'ping': {
+                    'args': [], 'kwargs': {}, 'doc': '', 'raises': [], 'name': 'ping',
+                    'returns': {'type': 'string'},
+                },
+            },
+        },
+    },
+}
+
+
+class BinaryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'schema.bin')
+        with open(self.path, 'wb') as f:
+            Schema(RAW).dump(f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        schema = Schema.open(self.path)
+        self.assertEqual(schema.todict(), RAW)
+        self.assertEqual(schema.fingerprint(), Schema(RAW).fingerprint())
+
+    def test_strings_interned(self):
+        data = binary.dumps(RAW)
+        self.assertEqual(data.count(b'NotFound'), 1)
+        self.assertEqual(data.count(b'methods'), 1)
+        self.assertLess(len(data), len(json.dumps(RAW, separators=(',', ':'))))
+
+    def test_lazy(self):
+        registry = binary.load(binary.dumps(RAW))
+        self.assertEqual(sorted(registry), ['echo', 'users'])
+        self.assertEqual(sorted(registry['users']), ['1.0.0', '2.0.0'])
+        self.assertIn('2.0.0', registry['users'])
+
+        schema = Schema(registry)
+        service = schema.build_service('users@1.0')
+        self.assertEqual(service.methods, RAW['users']['1.0.0']['methods'])
+        self.assertEqual(service.get(id=1)['name'], service.get(id=1)['name'])
+        # Only the built version was decoded.
+        self.assertEqual(registry._LazyRegistry__decoded.keys(), [('users', '1.0.0')])
+
+    def test_unknown_service(self):
+        schema = Schema.open(self.path)
+        for name in ('unknown', 'users@3.0.0', 'users@0.1.0'):
+            with self.assertRaises(ValueError):
+                schema.build_service(name)
+
+    def test_not_binary(self):
+        for data in (b'', b'{"users": {}}', b'LSCHEMA0' + b'\0' * 12):
+            with self.assertRaises(ValueError):
+                binary.load(data)
+
+    def test_unsupported_value(self):
+        with self.assertRaises(TypeError):
+            binary.dump({'users': {'': {'methods': object()}}}, io.BytesIO())
@@ -70,3 +70,91 @@ class GenSchemaCliTest(CliIntegrationTestCase):
                 },
             },
         })
+
+    def test_schema_generate_trace(self):
+        fp, trace_file = tempfile.mkstemp()
+        os.close(fp)
+        res = self.cli(['gen-schema', self.config_file, '--profile', '--trace', trace_file])
+
+        self.assertEqual(res.returncode, 0)
+        self.assertIn('users', json.loads(res.stdout))
+
+        with open(trace_file) as f:
+            events = json.load(f)['traceEvents']
+        self.assertEqual(
+            set(event['cat'] for event in events),
+            {'config', 'interface', 'import', 'inspect', 'jsonschema', 'merge', 'dump'})
+
+
+class GenFakeCliTest(CliIntegrationTestCase):
+
+    def setUp(self):
+        super(GenFakeCliTest, self).setUp()
+        fp, self.schema_file = tempfile.mkstemp()
+        os.close(fp)
+        with open(self.schema_file, 'w') as f:
+            json.dump({
+                'echo': {
+                    '': {
+                        'methods': {
+                            'ping': {
+                                'args': [],
+                                'kwargs': {'text': ''},
+                                'raises': [],
+                                'doc': '',
+                                'name': 'ping',
+                                'returns': {'type': 'string'},
+                            },
+                        },
+                    },
+                },
+            }, f)
+
+    def test_gen_fake(self):
+        res = self.cli(['gen-fake', self.schema_file, 'echo', 'ping', '--count=3'])
+
+        self.assertEqual(res.returncode, 0)
+
+        lines = res.stdout.splitlines()
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            self.assertTrue(isinstance(json.loads(line), type(u'')))
+
+
+class SchemaDiffCliTest(CliIntegrationTestCase):
+
+    def _write_schema(self, returns):
+        fp, filename = tempfile.mkstemp()
+        os.close(fp)
+        with open(filename, 'w') as f:
+            json.dump({
+                'echo': {
+                    '': {
+                        'methods': {
+                            'ping': {
+                                'args': [],
+                                'kwargs': {'text': ''},
+                                'raises': [],
+                                'doc': '',
+                                'name': 'ping',
+                                'returns': returns,
+                            },
+                        },
+                    },
+                },
+            }, f)
+        return filename
+
+    def test_schema_diff(self):
+        old = self._write_schema({'type': 'string'})
+        new = self._write_schema({'type': 'number', 'format': 'integer'})
+
+        res = self.cli(['schema-diff', old, old])
+        self.assertEqual(res.returncode, 0)
+        self.assertEqual(res.stdout, '')
+
+        res = self.cli(['schema-diff', old, new])
+        self.assertEqual(res.returncode, 1)
+        self.assertEqual(res.stdout.splitlines(), [
+            'BREAKING echo.ping (returns): type changed from string to number (integer)',
+        ])
@@ -0,0 +1,77 @@
+import copy
+import io
+import json
+import unittest
+
+from lymph.schema import binary
+from lymph.schema.compact import MethodSpec, compact, load
+from lymph.schema.schema import Schema
+from lymph.schema.tests.binary_test import RAW
+
+
+def _registry():
+    raw = copy.deepcopy(RAW)
+    raw['users']['1.1.0'] = copy.deepcopy(raw['users']['1.0.0'])
+    raw['users']['1.1.0']['methods']['get']['doc'] = 'Changed'
+    return raw
+
+
+class CompactTest(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = _registry()
+        self.registry = compact(self.raw)
+
+    def test_todict(self):
+        todict = self.registry.todict()
+        self.assertEqual(todict, self.raw)
+        self.assertIs(type(todict['users']['1.0.0']['methods']['get']), dict)
+        json.dumps(todict)
+
+    def test_shared(self):
+        first = self.registry['users']['1.0.0']['methods']['get']
+        second = self.registry['users']['1.1.0']['methods']['get']
+        self.assertIsInstance(first, MethodSpec)
+        self.assertIsNot(first, second)
+        self.assertIs(first['returns'], second['returns'])
+        self.assertIs(first['raises'], second['raises'])
+        # Equal strings are the same object.
+        self.assertIs(first['name'], second['name'])
+
+    def test_method_spec(self):
+        spec = self.registry['echo']['']['methods']['ping']
+        self.assertEqual(spec['args'], [])
+        self.assertEqual(spec.get('unknown', 1), 1)
+        self.assertIn('returns', spec)
+        self.assertNotIn('__class__', spec)
+        self.assertEqual(sorted(spec), ['args', 'doc', 'kwargs', 'name', 'raises', 'returns'])
+        self.assertEqual(spec, self.raw['echo']['']['methods']['ping'])
+        self.assertEqual(dict(spec), self.raw['echo']['']['methods']['ping'])
+        with self.assertRaises(KeyError):
+            spec['__class__']
+        with self.assertRaises(AttributeError):
+            spec.other = 1
+
+    def test_unknown_method_fields(self):
+        raw = {'echo': {'': {'methods': {'ping': {'args': [], 'deprecated': True}}}}}
+        registry = compact(raw)
+        self.assertEqual(registry['echo']['']['methods']['ping'], {'args': [], 'deprecated': True})
+        self.assertEqual(registry.todict(), raw)
+
+    def test_schema(self):
+        schema = Schema(self.registry)
+        self.assertEqual(schema.fingerprint(), Schema(self.raw).fingerprint())
+        self.assertEqual(schema.todict(), self.raw)
+        self.assertEqual(schema.diff(Schema(self.raw)), [])
+
+        service = schema.build_service('users@1.1.0')
+        self.assertIn('name', service.get(id=1))
+        json.dumps(service.schema)
+
+    def test_binary(self):
+        data = binary.dumps(self.registry)
+        self.assertEqual(Schema(binary.load(data)).todict(), self.raw)
+
+    def test_load(self):
+        registry = load(io.StringIO(json.dumps(self.raw, ensure_ascii=False)))
+        self.assertEqual(registry.todict(), self.raw)
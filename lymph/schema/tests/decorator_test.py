@@ -3,10 +3,14 @@ import decimal
 import unittest
 import uuid
 
+import mock
+import six
 import typing
 from marshmallow import fields, Schema
 
-from lymph.schema.decorator import spec
+from lymph.schema import _jsonschema
+from lymph.schema import decorator
+from lymph.schema.decorator import register_type, spec
 
 
 def _dummy():
@@ -140,3 +144,119 @@ class DecoratorTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             spec(returns=A)(_dummy)
 
+    def test_deferred_conversion(self):
+        with mock.patch('lymph.schema._jsonschema.dump_schema', return_value={'type': 'object'}) as dump:
+            spec(returns=NestedSchema())(_dummy)
+            self.assertFalse(dump.called)
+
+            self.assertEqual(_dummy.__annotations__['return'], {'type': 'object'})
+            self.assertEqual(_dummy.__annotations__.get('return'), {'type': 'object'})
+            self.assertEqual(dump.call_count, 1)
+
+    def test_deferred_generic(self):
+        spec(returns=typing.List[NestedSchema])(_dummy)
+        self.assertEqual(_dummy.__annotations__, {
+            'return': {'type': 'array', 'items': _jsonschema.dump_schema(NestedSchema())},
+        })
+
+    def test_deferred_accessors(self):
+        integers = {'type': 'array', 'items': {'type': 'number', 'format': 'integer'}}
+
+        def annotations():
+            spec(returns=typing.List[int])(_dummy)
+            return _dummy.__annotations__
+
+        self.assertIn('return', annotations())
+        self.assertEqual(dict(annotations()), {'return': integers})
+        self.assertEqual(list(annotations().items()), [('return', integers)])
+        self.assertEqual(list(annotations().values()), [integers])
+        self.assertEqual(annotations().copy(), {'return': integers})
+        self.assertEqual(annotations().setdefault('return'), integers)
+        self.assertEqual(annotations().pop('return'), integers)
+        self.assertEqual(annotations().popitem(), ('return', integers))
+        if six.PY3:  # The typing backport can't get type hints in Python 2.
+            self.assertEqual(typing.get_type_hints(_dummy), {'return': integers})
+
+    def test_argument_types(self):
+        spec(returns=int, values=typing.List[int], name=str)(_dummy)
+        self.assertEqual(_dummy.__annotations__, {
+            'return': {'type': 'number', 'format': 'integer'},
+            'values': {'type': 'array', 'items': {'type': 'number', 'format': 'integer'}},
+            'name': {'type': 'string'},
+        })
+        self.assertEqual(decorator._get_annotation(_dummy, 'return'), {'type': 'number', 'format': 'integer'})
+
+    def test_generic_types(self):
+        integer = {'type': 'number', 'format': 'integer'}
+        string = {'type': 'string'}
+        results = [
+            (typing.List[int], {'type': 'array', 'items': integer}),
+            (typing.Sequence[str], {'type': 'array', 'items': string}),
+            (typing.List, {'type': 'array'}),
+            (typing.Dict[str, int], {'type': 'object', 'additionalProperties': integer}),
+            (typing.Mapping[str, typing.List[int]], {
+                'type': 'object',
+                'additionalProperties': {'type': 'array', 'items': integer},
+            }),
+            (typing.Optional[int], {'anyOf': [integer, {'type': 'null'}]}),
+            (typing.Union[int, str], {'anyOf': [integer, string]}),
+            (typing.Tuple[int, str], {'type': 'array', 'items': [integer, string]}),
+            (typing.Tuple[int, ...], {'type': 'array', 'items': integer}),
+            (typing.Optional[NestedSchema], {
+                'anyOf': [_jsonschema.dump_schema(NestedSchema()), {'type': 'null'}],
+            }),
+        ]
+
+        for in_, out in results:
+            spec(returns=in_)(_dummy)
+            self.assertEqual(_dummy.__annotations__['return'], out)
+
+    def test_unsupported_generic(self):
+        with self.assertRaises(ValueError):
+            spec(returns=typing.List[object])(_dummy).__annotations__['return']
+        with self.assertRaises(ValueError):
+            spec(returns=typing.Any)(_dummy)
+
+    def test_memoized(self):
+        self.assertIs(decorator._get_jsonschema(typing.List[uuid.UUID]),
+                      decorator._get_jsonschema(typing.List[uuid.UUID]))
+
+    def test_returns_copies(self):
+        for type_ in (int, typing.List[uuid.UUID], NestedSchema()):
+            schema = decorator._to_jsonschema(type_)
+            expected = decorator._to_jsonschema(type_)
+            self.assertIsNot(schema, expected)
+            schema['type'] = 'mutated'
+            schema.pop('items', None)
+            self.assertEqual(decorator._to_jsonschema(type_), expected)
+        spec(returns=int)(_dummy)
+        _dummy.__annotations__['return']['format'] = 'float'
+        self.assertEqual(decorator._to_jsonschema(int), {'type': 'number', 'format': 'integer'})
+
+    def test_register_type(self):
+        class Money(object):
+            pass
+
+        with self.assertRaises(ValueError):
+            decorator._to_jsonschema(typing.List[Money])
+
+        self.addCleanup(decorator._CACHE.clear)
+        self.addCleanup(decorator._TYPES.pop, Money)
+        schema = {'type': 'string', 'format': 'decimal'}
+        register_type(Money, schema)
+        schema['format'] = 'float'
+        self.assertEqual(decorator._to_jsonschema(typing.List[Money]), {
+            'type': 'array',
+            'items': {'type': 'string', 'format': 'decimal'},
+        })
+
+    def test_dump_schema_cached(self):
+        schema = _jsonschema.dump_schema(ExampleSchema())
+
+        self.assertIs(_jsonschema.dump_schema(ExampleSchema()), schema)
+        self.assertIsNot(_jsonschema.dump_schema(ExampleSchema(exclude=('name',))), schema)
+        self.assertNotIn('name', _jsonschema.dump_schema(ExampleSchema(exclude=('name',)))['properties'])
+
+    def test_field_subclass(self):
+        self.assertIn(_jsonschema._get_pytype(Schema, FancyString), (six.text_type, six.binary_type))
+        self.assertIsNone(_jsonschema._get_pytype(Schema, fields.Nested))
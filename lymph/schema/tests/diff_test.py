@@ -0,0 +1,168 @@
+import copy
+import unittest
+
+from lymph.schema.schema import Schema
+
+
+def _method(name, args=(), kwargs=None, raises=(), returns=None):
+    return {
+        'name': name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'raises': list(raises),
+        'doc': '',
+        'returns': returns or {},
+    }
+
+
+ORDER = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'string', 'format': 'uuid'},
+        'price': {'type': 'number', 'format': 'decimal'},
+        'items': {'type': ['array', 'null'], 'items': {'type': 'string'}},
+    },
+    'required': ['id'],
+}
+
+RAW = {
+    'orders': {
+        '1.0.0': {
+            'methods': {
+                'get': _method('get', ['id'], raises=['NotFound'], returns=ORDER),
+                'search': _method('search', kwargs={'limit': 10}, returns={'type': 'array', 'items': ORDER}),
+            },
+        },
+        '2.0.0': {
+            'methods': {
+                'get': _method('get', ['id'], returns={'$ref': '#/definitions/Order'}),
+            },
+            'definitions': {'Order': ORDER},
+        },
+    },
+    'echo': {
+        '': {
+            'methods': {
+                'ping': _method('ping', returns={'type': 'string'}),
+            },
+        },
+    },
+}
+
+
+class DiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.new = copy.deepcopy(RAW)
+
+    def _diff(self):
+        return [(str(c), c.breaking) for c in Schema(RAW).diff(Schema(self.new))]
+
+    def _changes(self):
+        return set(str(c) for c in Schema(RAW).diff(Schema(self.new)))
+
+    def test_identical(self):
+        self.assertEqual(Schema(RAW).diff(Schema(copy.deepcopy(RAW))), [])
+
+    def test_canonical_options(self):
+        options = [{'type': 'string', 'enum': ['a', 'b']}, {'type': 'null'}]
+        self.new['echo']['']['methods']['ping']['returns'] = {'anyOf': options}
+        old = copy.deepcopy(self.new)
+        # Sets are compared like the sorted lists fingerprints encode them as.
+        self.new['echo']['']['methods']['ping']['returns']['anyOf'][0]['enum'] = set(['b', 'a'])
+
+        self.assertEqual(Schema(old).diff(Schema(self.new)), [])
+
+    def test_methods(self):
+        methods = self.new['orders']['1.0.0']['methods']
+        del methods['search']
+        methods['create'] = _method('create', ['values'])
+
+        self.assertEqual(self._changes(), set([
+            'BREAKING orders@1.0.0.search: method removed',
+            'compatible orders@1.0.0.create: method added',
+        ]))
+
+    def test_args(self):
+        get = self.new['orders']['1.0.0']['methods']['get']
+        get['args'] = ['id', 'user']
+        get['kwargs'] = {'lang': 'en'}
+        search = self.new['orders']['1.0.0']['methods']['search']
+        search['kwargs'] = {'limit': 20, 'offset': 0}
+
+        self.assertEqual(self._changes(), set([
+            "BREAKING orders@1.0.0.get (args): required argument 'user' added",
+            "compatible orders@1.0.0.get (kwargs): optional argument 'lang' added",
+            "compatible orders@1.0.0.search (kwargs): optional argument 'offset' added",
+            "compatible orders@1.0.0.search (kwargs): default of 'limit' changed from 10 to 20",
+        ]))
+
+    def test_arg_became_optional(self):
+        get = self.new['orders']['1.0.0']['methods']['get']
+        get['args'] = []
+        get['kwargs'] = {'id': None}
+
+        self.assertEqual(self._diff(), [
+            ("compatible orders@1.0.0.get (args): required argument 'id' became optional", False),
+        ])
+
+    def test_raises(self):
+        get = self.new['orders']['1.0.0']['methods']['get']
+        get['raises'] = ['Forbidden']
+
+        self.assertEqual(self._changes(), set([
+            'BREAKING orders@1.0.0.get (raises): may raise Forbidden',
+            'compatible orders@1.0.0.get (raises): no longer raises NotFound',
+        ]))
+
+    def test_returns(self):
+        order = self.new['orders']['1.0.0']['methods']['get']['returns'] = copy.deepcopy(ORDER)
+        del order['properties']['price']
+        order['properties']['id'] = {'type': 'number', 'format': 'integer'}
+        order['properties']['items']['type'] = 'array'
+        order['properties']['created'] = {'type': 'string', 'format': 'date-time'}
+
+        self.assertEqual(self._changes(), set([
+            'BREAKING orders@1.0.0.get (returns.properties.price): field removed',
+            'BREAKING orders@1.0.0.get (returns.properties.id): type changed from string (uuid) to number (integer)',
+            'compatible orders@1.0.0.get (returns.properties.items): type narrowed from array/null to array',
+            'compatible orders@1.0.0.get (returns.properties.created): field added',
+        ]))
+
+    def test_definitions(self):
+        self.new['orders']['2.0.0']['definitions']['Order'] = {'type': 'object', 'properties': {}}
+
+        self.assertEqual(self._changes(), set([
+            'BREAKING orders@2.0.0.get (returns.properties.id): field removed',
+            'BREAKING orders@2.0.0.get (returns.properties.items): field removed',
+            'BREAKING orders@2.0.0.get (returns.properties.price): field removed',
+        ]))
+
+    def test_versions(self):
+        self.new['orders']['1.1.0'] = self.new['orders'].pop('1.0.0')
+        self.new['orders']['3.0.0'] = self.new['orders']['2.0.0']
+        self.new['orders']['2.0.0'] = copy.deepcopy(self.new['orders']['2.0.0'])
+        self.new['orders']['2.0.0']['methods']['get']['raises'] = ['NotFound']
+        del self.new['echo']
+
+        self.assertEqual(self._diff(), [
+            ('BREAKING echo: service removed', True),
+            ('compatible orders@1.0.0: version removed, resolves to 1.1.0', False),
+            ('BREAKING orders@2.0.0.get (raises): may raise NotFound', True),
+            ('compatible orders@3.0.0: version added', False),
+        ])
+
+    def test_version_removed(self):
+        del self.new['orders']['1.0.0']
+
+        self.assertEqual(self._diff(), [('BREAKING orders@1.0.0: version removed', True)])
+
+    def test_fingerprints(self):
+        old, new = Schema(RAW), Schema(self.new)
+        self.new['orders']['1.0.0']['methods']['get']['raises'] = []
+        old.fingerprint()
+        new.fingerprint()
+
+        self.assertEqual([str(c) for c in old.diff(new)], [
+            'compatible orders@1.0.0.get (raises): no longer raises NotFound',
+        ])
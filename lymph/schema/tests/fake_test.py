@@ -1,4 +1,9 @@
+import itertools
+import json
 import unittest
+import uuid
+
+import six
 
 from lymph.schema import fake
 
@@ -41,3 +46,56 @@ class StubTest(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             fake.build(self.schema, 'users@11.0.4')
+
+
+class NDJSONTest(unittest.TestCase):
+
+    schema = {
+        'orders': {
+            '1.0.0': {
+                'methods': {
+                    'get': {
+                        'returns': {
+                            'type': 'object',
+                            'properties': {
+                                'id': {'type': 'string', 'format': 'uuid'},
+                                'price': {'type': 'number', 'format': 'decimal'},
+                                'created': {'type': 'string', 'format': 'date-time'},
+                                'lines': {
+                                    'type': 'array',
+                                    'items': {
+                                        'type': 'object',
+                                        'properties': {
+                                            'name': {'type': 'string'},
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    }
+
+    def test_dump_ndjson(self):
+        fp = six.StringIO()
+
+        fake.dump_ndjson(self.schema, 'orders@1.0.0', 'get', fp, count=5, seed=1)
+
+        lines = fp.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        for line in lines:
+            msg = json.loads(line)
+            self.assertEqual(set(msg), {'id', 'price', 'created', 'lines'})
+            uuid.UUID(msg['id'])
+            self.assertEqual(len(msg['lines']), 3)
+
+    def test_iter_ndjson_infinite(self):
+        lines = fake.iter_ndjson(self.schema, 'orders@1.0.0', 'get')
+
+        self.assertEqual(len(list(itertools.islice(lines, 2500))), 2500)
+
+    def test_iter_ndjson_unknown_method(self):
+        with self.assertRaises(ValueError):
+            fake.iter_ndjson(self.schema, 'orders@1.0.0', 'unknown')
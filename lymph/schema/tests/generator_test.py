@@ -1,11 +1,21 @@
+import gzip
+import io
+import json
 import os
+import shutil
+import sys
 import tempfile
+import textwrap
 import unittest
 
 import mock
+import typing
+from marshmallow import fields, Schema
 
 import lymph
 from lymph.schema import generator as gen
+from lymph.schema.decorator import spec
+from lymph.schema.message import build
 
 
 CONFIG = """
@@ -37,6 +47,28 @@ class DummyV1(lymph.Interface):
         return
 
 
+class Address(Schema):
+    street = fields.String()
+
+
+class Customer(Schema):
+    name = fields.String()
+    address = fields.Nested(Address)
+    referrer = fields.Nested('self')
+
+
+class Shop(lymph.Interface):
+    @lymph.rpc()
+    @spec(returns=Customer())
+    def get_customer(self, id):
+        return
+
+    @lymph.rpc()
+    @spec(returns=typing.List[Address])
+    def get_addresses(self):
+        return
+
+
 class GeneratorTestCase(unittest.TestCase):
 
     maxDiff = None
@@ -100,6 +132,75 @@ class GeneratorTestCase(unittest.TestCase):
             }
         })
 
+    @mock.patch.dict(gen._INTERFACE_SCHEMAS, clear=True)
+    @mock.patch.dict(gen._SERIALIZED_SCHEMAS, clear=True)
+    def test_generate_from_interface_cached(self):
+        interface = Dummy(mock.MagicMock(), 'dummy', version='0.1.0', builtin=True)
+
+        with mock.patch.object(gen, '_get_rpc_methods', wraps=gen._get_rpc_methods) as get_methods:
+            schema = gen.generate_from_interface(interface)
+            other = Dummy(mock.MagicMock(), 'dummy', version='0.1.0', builtin=True)
+            self.assertIs(gen.generate_from_interface(other), schema)
+            self.assertEqual(get_methods.call_count, 1)
+
+        cached = gen.get_cached_schema(interface)
+        self.assertIs(cached.schema, schema)
+        self.assertEqual(json.loads(cached.json.decode('utf-8')), schema.todict())
+        self.assertEqual(gzip.GzipFile(fileobj=io.BytesIO(cached.gzip)).read(), cached.json)
+        self.assertIs(gen.get_cached_schema(interface), cached)
+
+    @mock.patch.dict(gen._INTERFACE_SCHEMAS, clear=True)
+    @mock.patch.dict(gen._SERIALIZED_SCHEMAS, clear=True)
+    def test_get_schema_response(self):
+        interface = Dummy(mock.MagicMock(), 'dummy', version='0.1.0', builtin=True)
+
+        response = gen.get_schema_response(interface)
+        etag = response['etag']
+        self.assertEqual(response['schema'], gen.get_cached_schema(interface).json)
+        self.assertEqual(gen.get_schema_response(interface, etag), {'etag': etag, 'schema': None})
+        self.assertEqual(gen.get_schema_response(interface, 'outdated', compress=True), {
+            'etag': etag,
+            'schema': gen.get_cached_schema(interface).gzip,
+        })
+
+    def test_generate_refs(self):
+        schema = gen.generate(Shop, 'shop@1.0.0', refs=True).todict()['shop']['1.0.0']
+
+        def ref(name):
+            return {'$ref': '#/definitions/%s' % name}
+
+        self.assertEqual(schema['methods']['get_customer']['returns'], ref('Customer'))
+        self.assertEqual(schema['methods']['get_addresses']['returns'], {
+            'type': 'array',
+            'items': ref('Address'),
+        })
+        self.assertEqual(sorted(schema['definitions']), ['Address', 'Customer'])
+        customer = schema['definitions']['Customer']['properties']
+        self.assertEqual(customer['address'], ref('Address'))
+        self.assertEqual(customer['referrer'], ref('Customer'))
+
+    def test_build_from_refs(self):
+        schema = gen.generate(Shop, 'shop@1.0.0', refs=True)
+
+        customer = build(schema, 'shop@1.0.0', 'get_customer')
+        self.assertEqual(set(customer), set(['name', 'address', 'referrer']))
+        self.assertEqual(set(customer['address']), set(['street']))
+        # Recursion is cut after a couple of levels.
+        self.assertEqual(set(customer['referrer']), set(['name', 'address', 'referrer']))
+        self.assertIsNone(customer['referrer']['referrer'])
+        # Generated values can be assigned back.
+        other = build(schema, 'shop@1.0.0', 'get_customer')
+        customer['referrer']['referrer'] = other['referrer']['referrer']
+        customer['referrer'] = other['referrer']
+        customer['address'] = other['address']
+        self.assertIs(customer['referrer'], other['referrer'])
+        customer['referrer'] = {}
+        with self.assertRaises(TypeError):
+            customer['referrer'] = 'foo'
+
+        addresses = build(schema, 'shop@1.0.0', 'get_addresses')
+        self.assertEqual(len(addresses), 3)
+
     def test_generate_from_config(self):
         fd, filepath = tempfile.mkstemp()
         os.close(fd)
@@ -145,3 +246,184 @@ class GeneratorTestCase(unittest.TestCase):
                 },
             }
         })
+
+
+class GenerateFromConfigsTestCase(unittest.TestCase):
+
+    configs = [
+        """
+        interfaces:
+            dummy@0.1.0:
+                class: lymph.schema.tests.generator_test:Dummy
+        """,
+        """
+        interfaces:
+            dummy@1.0.2:
+                class: lymph.schema.tests.generator_test:DummyV1
+            echo:
+                class: lymph.schema.tests.interfaces:Echo
+        """,
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write_configs(self, configs):
+        config_files = []
+        for i, config in enumerate(configs):
+            config_file = os.path.join(self.tmpdir, '%d.yml' % i)
+            with open(config_file, 'w') as f:
+                f.write(textwrap.dedent(config))
+            config_files.append(config_file)
+        return config_files
+
+    def test_generate_from_configs(self):
+        config_files = self._write_configs(self.configs)
+
+        schema = gen.generate_from_configs(config_files)
+
+        self.assertEqual(sorted(schema.todict()), ['dummy', 'echo'])
+        self.assertEqual(sorted(schema.todict()['dummy']), ['0.1.0', '1.0.2'])
+
+    def test_generate_from_configs_parallel(self):
+        config_files = self._write_configs(self.configs)
+
+        schema = gen.generate_from_configs(config_files, jobs=2)
+
+        self.assertEqual(schema.todict(), gen.generate_from_configs(config_files).todict())
+
+    def test_generate_from_configs_conflict(self):
+        config_files = self._write_configs(self.configs + [
+            """
+            interfaces:
+                dummy@0.1.0:
+                    class: lymph.schema.tests.generator_test:DummyV1
+            """,
+        ])
+
+        with self.assertRaises(ValueError):
+            gen.generate_from_configs(config_files)
+
+
+class GenerateCacheTestCase(unittest.TestCase):
+
+    MODULES = ('cached_interfaces', 'shared_interface_a', 'shared_interface_b', 'shared_helper', 'shared_types')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        self.module_file = os.path.join(self.tmpdir, 'cached_interfaces.py')
+        self.config_file = os.path.join(self.tmpdir, 'config.yml')
+        self._write_module('ping')
+        with open(self.config_file, 'w') as f:
+            f.write(textwrap.dedent("""
+                interfaces:
+                    echo@1.0.0:
+                        class: cached_interfaces:Echo
+            """))
+        sys.path.insert(0, self.tmpdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        for name in self.MODULES:
+            sys.modules.pop(name, None)
+        shutil.rmtree(self.tmpdir)
+
+    def _write_module(self, meth):
+        self._write_source('cached_interfaces', """
+            import lymph
+
+
+            class Echo(lymph.Interface):
+                @lymph.rpc()
+                def %s(self, text):
+                    return text
+        """ % meth)
+
+    def _write_source(self, name, source):
+        filename = os.path.join(self.tmpdir, name + '.py')
+        if os.path.exists(filename + 'c'):
+            os.remove(filename + 'c')
+        with open(filename, 'w') as f:
+            f.write(textwrap.dedent(source))
+
+    def test_generate_from_config_cached(self):
+        schema = gen.generate_from_config(self.config_file, cache_dir=self.cache_dir)
+
+        self.assertEqual(list(schema.todict()['echo']['1.0.0']['methods']), ['ping'])
+
+        with mock.patch('lymph.schema.generator.import_object') as import_object:
+            cached = gen.generate_from_config(self.config_file, cache_dir=self.cache_dir)
+
+        self.assertFalse(import_object.called)
+        self.assertEqual(cached.todict(), schema.todict())
+
+        self._write_module('pong')
+        sys.modules.pop('cached_interfaces')
+
+        schema = gen.generate_from_config(self.config_file, cache_dir=self.cache_dir)
+
+        self.assertEqual(list(schema.todict()['echo']['1.0.0']['methods']), ['pong'])
+
+    def test_shared_dependencies(self):
+        # Both interfaces use shared_helper, which is already imported when
+        # the second one is, and depends itself on shared_types.
+        for name in ('shared_interface_a', 'shared_interface_b'):
+            self._write_source(name, """
+                import lymph
+
+                from lymph.schema.decorator import spec
+                import shared_helper
+
+
+                class Interface(lymph.Interface):
+                    @lymph.rpc()
+                    @spec(returns=shared_helper.Result())
+                    def get(self):
+                        pass
+            """)
+        self._write_source('shared_helper', """
+            from shared_types import Result
+        """)
+        self._write_source('shared_types', """
+            from marshmallow import Schema, fields
+
+
+            class Result(Schema):
+                id = fields.Integer()
+        """)
+        with open(self.config_file, 'w') as f:
+            f.write(textwrap.dedent("""
+                interfaces:
+                    a@1.0.0:
+                        class: shared_interface_a:Interface
+                    b@1.0.0:
+                        class: shared_interface_b:Interface
+            """))
+
+        def get_properties():
+            schema = gen.generate_from_config(self.config_file, cache_dir=self.cache_dir).todict()
+            return [sorted(schema[name]['1.0.0']['methods']['get']['returns']['properties']) for name in 'ab']
+
+        self.assertEqual(get_properties(), [['id'], ['id']])
+
+        import shared_interface_a
+        import shared_interface_b
+        types_file = os.path.join(self.tmpdir, 'shared_types.py')
+        self.assertIn(types_file, gen._get_source_files(shared_interface_a.Interface))
+        self.assertIn(types_file, gen._get_source_files(shared_interface_b.Interface))
+
+        self._write_source('shared_types', """
+            from marshmallow import Schema, fields
+
+
+            class Result(Schema):
+                id = fields.Integer()
+                name = fields.String()
+        """)
+        for name in self.MODULES:
+            sys.modules.pop(name, None)
+        self.assertEqual(get_properties(), [['id', 'name'], ['id', 'name']])
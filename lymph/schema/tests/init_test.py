@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+
+import lymph.schema
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_import_does_not_load_submodules(self):
+        out = subprocess.check_output([sys.executable, '-c', (
+            'import sys, lymph.schema; '
+            'print(sorted(m for m in sys.modules if m.startswith("lymph.schema.") and sys.modules[m]))'
+        )])
+        self.assertEqual(out.strip(), b'[]')
+
+    def test_services_do_not_load_marshmallow(self):
+        out = subprocess.check_output([sys.executable, '-c', (
+            'import sys; '
+            'from lymph.schema.schema import Schema; '
+            'import lymph.schema.fake, lymph.schema.testcase; '
+            'Schema({"echo": {"": {"methods": {"ping": {'
+            '"args": [], "kwargs": {"text": ""}, "returns": {"type": "string"}}}}}}).build_service("echo").ping(); '
+            'print(sorted(m for m in ("marshmallow", "typing") if sys.modules.get(m)))'
+        )])
+        self.assertEqual(out.strip(), b'[]')
+
+    def test_exported_names(self):
+        from lymph.schema import decorator, generator
+        self.assertIs(lymph.schema.spec, decorator.spec)
+        self.assertIs(lymph.schema.generate, generator.generate)
+        self.assertIs(lymph.schema.generate_from_config, generator.generate_from_config)
+        self.assertIn('generate_from_configs', dir(lymph.schema))
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            lymph.schema.unknown
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from lymph.schema import lazy
+from lymph.schema.schema import Schema
+from lymph.schema.tests.binary_test import RAW
+
+
+class LazyJSONTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'schema.json')
+        self._write(RAW)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, raw):
+        with open(self.path, 'w') as f:
+            json.dump(raw, f, indent=4)
+
+    def test_index_json(self):
+        data = json.dumps(RAW, indent=4).encode('utf-8')
+        index = lazy.index_json(data)
+        self.assertEqual(sorted(index), ['echo', 'users'])
+        for service, versions in index.items():
+            for version, (start, end) in versions.items():
+                self.assertEqual(json.loads(data[start:end].decode('utf-8')), RAW[service][version])
+
+    def test_index_json_invalid(self):
+        for data in (b'', b'[]', b'{"users": []}', b'{"users": {"1.0.0": {]}}', b'{"users": {"1.0.0": {}'):
+            with self.assertRaises(ValueError):
+                lazy.index_json(data)
+
+    def test_open(self):
+        schema = Schema.open(self.path)
+        self.assertEqual(sorted(schema.services), ['echo', 'users'])
+        self.assertEqual(schema.build_service('echo').methods, RAW['echo']['']['methods'])
+        self.assertEqual(schema.todict(), RAW)
+
+    def test_index_cached(self):
+        lazy.open_json(self.path)
+        self.assertTrue(os.path.exists(self.path + '.index'))
+        with mock.patch.object(lazy, 'index_json') as index_json:
+            registry = lazy.open_json(self.path)
+        self.assertFalse(index_json.called)
+        self.assertEqual(registry['echo'][''], RAW['echo'][''])
+
+    def test_index_stale(self):
+        lazy.open_json(self.path)
+        self._write({'echo': RAW['echo']})
+        registry = lazy.open_json(self.path)
+        self.assertEqual(list(registry), ['echo'])
+        self.assertEqual(registry['echo'][''], RAW['echo'][''])
+
+    def test_index_not_writable(self):
+        with mock.patch('tempfile.mkstemp', side_effect=OSError):
+            registry = lazy.open_json(self.path)
+        self.assertEqual(registry['echo'][''], RAW['echo'][''])
+        self.assertFalse(os.path.exists(self.path + '.index'))
+
+    def test_maxbytes(self):
+        with open(self.path, 'rb') as f:
+            index = lazy.index_json(f.read())
+        start, end = index['users']['1.0.0']
+        registry = lazy.open_json(self.path, maxbytes=end - start)
+        decoded = registry._LazyRegistry__decoded
+
+        registry['echo']['']
+        registry['users']['1.0.0']
+        self.assertEqual(decoded.keys(), [('users', '1.0.0')])
+        self.assertLessEqual(decoded.size, end - start)
+        # Evicted versions are decoded again.
+        self.assertEqual(registry['echo'][''], RAW['echo'][''])
+        self.assertNotIn(('users', '1.0.0'), decoded)
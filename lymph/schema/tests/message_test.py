@@ -4,9 +4,12 @@ import decimal
 import unittest
 import uuid
 
+import mock
 import six
 
-from lymph.schema.message import build
+from lymph.schema import message
+from lymph.schema.message import build, build_many
+from lymph.schema.schema import Schema
 
 
 class MessageTest(unittest.TestCase):
@@ -139,3 +142,111 @@ class MessageTest(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             build(schema, 'users@1.0.1', 'get')
+
+    def test_factory_cached_per_schema(self):
+        schema = Schema({
+            'users': {
+                '1.0.1': {
+                    'methods': {
+                        'get': {
+                            'args': [],
+                            'kwargs': {},
+                            'returns': {'type': 'string', 'format': 'uuid'},
+                        },
+                    },
+                },
+            },
+        })
+
+        with mock.patch('lymph.schema.message._compile_factory', wraps=message._compile_factory) as compile_:
+            first = build(schema, 'users@1.0.1', 'get')
+            second = build(schema, 'users@1.0.1', 'get')
+            schema.build_service('users@1.0.1').get()
+
+        self.assertEqual(compile_.call_count, 1)
+        self.assertTrue(isinstance(first, uuid.UUID))
+        self.assertNotEqual(first, second)
+
+
+class BuildManyTest(unittest.TestCase):
+
+    returns = {
+        'type': 'object',
+        'properties': {
+            'id': {'title': 'id', 'type': 'string', 'format': 'uuid'},
+            'name': {'title': 'name', 'type': 'string'},
+            'price': {'title': 'price', 'type': 'number', 'format': 'decimal'},
+            'created': {'title': 'created', 'type': 'string', 'format': 'date-time'},
+            'tags': {'type': ['array', 'null']},
+            'items': {
+                'type': 'array',
+                'items': {'type': 'number', 'format': 'integer'},
+            },
+            'discount': {'anyOf': [{'type': 'number', 'format': 'float'}, {'type': 'null'}]},
+            'position': {
+                'type': 'array',
+                'items': [{'type': 'number', 'format': 'float'}, {'type': 'string'}],
+            },
+            'counts': {
+                'type': 'object',
+                'additionalProperties': {'type': 'number', 'format': 'integer'},
+            },
+        },
+    }
+
+    schema = {
+        'orders': {
+            '1.0.0': {
+                'methods': {
+                    'get': {
+                        'returns': returns,
+                    },
+                },
+            },
+        },
+    }
+
+    def test_build_many(self):
+        msgs = build_many(self.schema, 'orders@1.0.0', 'get', 50)
+
+        self.assertEqual(len(msgs), 50)
+        for msg in msgs:
+            self.assertTrue(isinstance(msg, collections.Mapping))
+            self.assertEqual(set(msg), set(self.returns['properties']))
+            self.assertTrue(isinstance(msg['id'], uuid.UUID))
+            self.assertTrue(isinstance(msg['name'], six.string_types))
+            self.assertTrue(isinstance(msg['price'], decimal.Decimal))
+            self.assertTrue(isinstance(msg['created'], datetime.datetime))
+            self.assertTrue(isinstance(msg['tags'], (list, type(None))))
+            self.assertEqual(len(msg['items']), 3)
+            self._assert_composed(msg)
+        self.assertEqual(len(set(msg['id'] for msg in msgs)), 50)
+
+    def test_build(self):
+        msg = build(self.schema, 'orders@1.0.0', 'get')
+
+        self.assertEqual(set(msg), set(self.returns['properties']))
+        self._assert_composed(msg)
+
+    def _assert_composed(self, msg):
+        self.assertTrue(isinstance(msg['discount'], (float, type(None))))
+        self.assertTrue(isinstance(msg['position'][0], float))
+        self.assertTrue(isinstance(msg['position'][1], six.string_types))
+        self.assertEqual(len(msg['position']), 2)
+        self.assertTrue(all(isinstance(v, int) for v in msg['counts'].values()))
+        self.assertEqual(len(msg['counts']), 3)
+        with self.assertRaises(TypeError):
+            msg['discount'] = 'foo'
+        msg['discount'] = None
+
+    def test_build_many_seed(self):
+        with mock.patch('time.time', return_value=1500000000):
+            first = build_many(self.schema, 'orders@1.0.0', 'get', 10, seed=42)
+        with mock.patch('time.time', return_value=1500000001):
+            second = build_many(self.schema, 'orders@1.0.0', 'get', 10, seed=42)
+
+        self.assertEqual([dict(m) for m in first], [dict(m) for m in second])
+
+    def test_build_many_unknown_method(self):
+        with self.assertRaises(ValueError):
+            build_many(self.schema, 'orders@1.0.0', 'unknown', 10)
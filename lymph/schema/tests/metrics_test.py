@@ -0,0 +1,108 @@
+import unittest
+
+import mock
+
+from lymph.schema import fake
+from lymph.schema.metrics import BUCKETS, Call, CallMetrics, statsd_hook
+from lymph.schema.schema import Schema
+
+
+SCHEMA = {
+    'users': {
+        '1.0.0': {
+            'methods': {
+                'get': {
+                    'name': 'get',
+                    'args': ['id'],
+                    'kwargs': {'fields': None},
+                    'doc': '',
+                    'raises': [],
+                    'returns': {'type': 'object', 'properties': {'name': {'type': 'string'}}},
+                },
+            },
+        },
+    },
+}
+
+
+class CallMetricsTest(unittest.TestCase):
+
+    def test_service_calls(self):
+        metrics = CallMetrics()
+        users = Schema(SCHEMA, hook=metrics).build_service('users@1.0')
+
+        users.get(id=1)
+        users.get(id=2, fields=['name'])
+        users.get(id=2, fields=['name'])
+        with self.assertRaises(TypeError):
+            users.get(name='joe')
+
+        key = ('users@1.0.0', 'get')
+        self.assertEqual(metrics.calls, {key: 4})
+        self.assertEqual(metrics.errors, {key: 1})
+        self.assertGreater(metrics.build_time[key], 0)
+        self.assertEqual(metrics.cardinalities(), {
+            key + ('id',): 2,
+            key + ('fields',): 1,
+            key + ('name',): 1,
+        })
+        self.assertEqual(sum(n for _, n in metrics.histogram(*key)), 4)
+        self.assertEqual(metrics.histogram('users@1.0.0', 'unknown'), [(b, 0) for b in BUCKETS])
+
+        metrics.clear()
+        self.assertEqual(metrics.calls, {})
+        self.assertEqual(metrics.cardinality('users@1.0.0', 'get', 'id'), 0)
+
+    def test_max_cardinality(self):
+        metrics = CallMetrics(max_cardinality=2)
+        for i in range(5):
+            metrics(Call('users', 'get', {'id': i}, 0.1, 0, None))
+        self.assertEqual(metrics.cardinality('users', 'get', 'id'), 2)
+
+    def test_no_hook(self):
+        users = Schema(SCHEMA).build_service('users@1.0')
+        with mock.patch('lymph.schema.metrics.Call') as call:
+            self.assertIn('name', users.get(id=1))
+        self.assertFalse(call.called)
+
+    def test_hook_error(self):
+        hook = mock.Mock(side_effect=RuntimeError)
+        users = Schema(SCHEMA, hook=hook).build_service('users@1.0')
+
+        with mock.patch('lymph.schema.schema.logger') as logger:
+            self.assertIn('name', users.get(id=1))
+            with self.assertRaises(TypeError):
+                users.get(name='joe')
+        self.assertEqual(hook.call_count, 2)
+        self.assertEqual(logger.exception.call_count, 2)
+
+    def test_build_service_hook(self):
+        schema_hook, service_hook = mock.Mock(), mock.Mock()
+        Schema(SCHEMA, hook=schema_hook).build_service('users@1.0', hook=service_hook).get(id=1)
+        self.assertFalse(schema_hook.called)
+        call, = service_hook.call_args[0]
+        self.assertEqual((call.service, call.method, call.kwargs, call.error), ('users@1.0.0', 'get', {'id': 1}, None))
+
+    def test_falsy_hook(self):
+        class Hook(list):
+            def __call__(self, call):
+                pass
+
+        hook = mock.Mock()
+        # An empty Hook is falsy but it's still the service's hook.
+        users = Schema(SCHEMA, hook=hook).build_service('users@1.0', hook=Hook())
+        users.get(id=1)
+        self.assertFalse(hook.called)
+
+    def test_fake_build(self):
+        hook = mock.Mock()
+        fake.build(SCHEMA, 'users@1.0', hook=hook).get(id=1)
+        self.assertEqual(hook.call_count, 1)
+
+    def test_statsd_hook(self):
+        client = mock.Mock()
+        hook = statsd_hook(client)
+        hook(Call('users@1.0.0', 'get', {}, 0.002, 0.001, None))
+        client.incr.assert_called_once_with('lymph_schema.users@1_0_0.get.calls')
+        client.timing.assert_any_call('lymph_schema.users@1_0_0.get.latency', 2.0)
+        client.timing.assert_any_call('lymph_schema.users@1_0_0.get.build', 1.0)
@@ -0,0 +1,79 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+import six
+
+from lymph.schema import generator as gen, profiling
+
+
+CONFIG = """
+interfaces:
+    users@0.5.1:
+       class: lymph.schema.tests.interfaces:Users
+    echo:
+       class: lymph.schema.tests.interfaces:Echo
+"""
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.config_file = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.config_file)
+        with open(self.config_file, 'w') as f:
+            f.write(CONFIG)
+
+    def test_disabled(self):
+        self.assertIs(profiling.phase('import'), profiling._NO_PHASE)
+        with profiling.phase('import'):
+            pass
+
+    def test_generate(self):
+        with profiling.Profiler() as profiler:
+            gen.generate_from_configs([self.config_file])
+        self.assertIs(profiling.phase('import'), profiling._NO_PHASE)
+
+        totals = profiler.totals()
+        self.assertEqual(list(totals), ['config', 'interface', 'import', 'inspect', 'jsonschema', 'merge'])
+        self.assertEqual(totals['import'][0], 2)
+        self.assertEqual(totals['inspect'][0], 3)
+        self.assertEqual(
+            sorted(record.label for record in profiler.slowest('interface')),
+            ['lymph.schema.tests.interfaces:Echo', 'lymph.schema.tests.interfaces:Users'])
+
+        out = six.StringIO()
+        profiler.report(out)
+        self.assertIn('jsonschema', out.getvalue())
+        self.assertIn('slowest interfaces', out.getvalue())
+
+    def test_nested(self):
+        with profiling.Profiler():
+            with self.assertRaises(RuntimeError):
+                profiling.Profiler().__enter__()
+
+    def test_dump_trace(self):
+        with profiling.Profiler() as profiler:
+            with profiling.phase('import', 'orders'):
+                pass
+        out = six.StringIO()
+        profiler.dump_trace(out)
+        event, = json.loads(out.getvalue())['traceEvents']
+        self.assertEqual(event['name'], 'orders')
+        self.assertEqual(event['cat'], 'import')
+        self.assertEqual(event['ph'], 'X')
+
+    def test_dump_stats(self):
+        with profiling.Profiler(cprofile=True) as profiler:
+            gen.generate_from_configs([self.config_file])
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        profiler.dump_stats(path)
+        self.assertTrue(pstats.Stats(path).total_calls)
+
+        with self.assertRaises(ValueError):
+            profiling.Profiler().dump_stats(path)
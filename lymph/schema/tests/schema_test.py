@@ -0,0 +1,177 @@
+import copy
+import json
+import unittest
+
+from lymph.schema.schema import Schema
+
+
+def _methods(name):
+    return {
+        'methods': {
+            name: {
+                'args': [],
+                'kwargs': {},
+                'doc': '',
+                'raises': [],
+                'name': name,
+                'returns': {'type': 'string'},
+            },
+        },
+    }
+
+
+class SchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = Schema({
+            'users': {
+                '0.9.0': _methods('get'),
+                '1.0.0': _methods('get'),
+                '1.2.0': _methods('get'),
+                '1.10.1': _methods('get'),
+                '2.0.0': _methods('get'),
+            },
+            'echo': {
+                '': _methods('ping'),
+            },
+        })
+
+    def test_build_service_best_match(self):
+        cases = {
+            'users@0.9.0': '0.9.0',
+            'users@1.0.0': '1.10.1',
+            'users@1.2.0': '1.10.1',
+            'users@1.10.1': '1.10.1',
+            'users@2.0.0': '2.0.0',
+        }
+        for name, version in cases.items():
+            self.assertEqual(self.schema.build_service(name).versionned_name, 'users@%s' % version)
+
+    def test_build_service_unversioned(self):
+        self.assertEqual(self.schema.build_service('echo').versionned_name, 'echo')
+
+    def test_build_service_unknown(self):
+        for name in ('unknown', 'unknown@1.0.0', 'users@1.11.0', 'users@3.0.0', 'users'):
+            with self.assertRaises(ValueError):
+                self.schema.build_service(name)
+
+    def test_build_service_cached(self):
+        first = self.schema.build_service('users@1.0.0')
+        second = self.schema.build_service('users@1.0.0')
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.methods, second.methods)
+
+    def test_resolve_many(self):
+        services = self.schema.resolve_many(['users@1.0.0', 'echo'])
+
+        self.assertEqual([s.versionned_name for s in services], ['users@1.10.1', 'echo'])
+
+        with self.assertRaises(ValueError):
+            self.schema.resolve_many(['users@1.0.0', 'unknown'])
+
+
+class ServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = Schema({
+            'users': {
+                '1.0.0': {
+                    'methods': {
+                        'get': {
+                            'args': ['id'],
+                            'kwargs': {'name': None},
+                            'doc': '',
+                            'raises': [],
+                            'name': 'get',
+                            'returns': {'type': 'number', 'format': 'integer'},
+                        },
+                    },
+                },
+            },
+        }).build_service('users@1.0.0')
+
+    def test_method_proxy_cached(self):
+        self.assertIs(self.service.get, self.service.get)
+
+    def test_method_call(self):
+        self.assertTrue(isinstance(self.service.get(id=1), int))
+        self.assertTrue(isinstance(self.service.get(id=1, name='foo'), int))
+
+    def test_method_call_bad_arguments(self):
+        with self.assertRaises(TypeError):
+            self.service.get()
+
+        with self.assertRaises(TypeError):
+            self.service.get(name='foo')
+
+        with self.assertRaises(TypeError):
+            self.service.get(id=1, unknown=2)
+
+
+class FingerprintTest(unittest.TestCase):
+
+    raw = {
+        'users': {
+            '1.0.0': _methods('get'),
+            '2.0.0': dict(_methods('get'), definitions={'User': {'type': 'object'}}),
+        },
+        'echo': {
+            '': _methods('ping'),
+        },
+    }
+
+    def test_stable(self):
+        schema = Schema(self.raw)
+        loaded = Schema(json.loads(json.dumps(self.raw, indent=2)))
+
+        self.assertEqual(schema.fingerprint(), loaded.fingerprint())
+        self.assertEqual(schema.fingerprint('users@2.0.0', 'get'), loaded.fingerprint('users@2.0.0', 'get'))
+        self.assertEqual(len(schema.fingerprint()), 40)
+
+    def test_non_json_values(self):
+        raw = copy.deepcopy(self.raw)
+        kwargs = raw['users']['2.0.0']['methods']['get']['kwargs']
+        kwargs['tags'] = ('a', 'b')
+        kwargs['fields'] = set(['name', 'id', 'email'])
+        loaded = copy.deepcopy(self.raw)
+        loaded['users']['2.0.0']['methods']['get']['kwargs'].update(tags=['a', 'b'], fields=['email', 'id', 'name'])
+        self.assertEqual(Schema(raw).fingerprint(), Schema(loaded).fingerprint())
+
+        kwargs['default'] = object()
+        schema = Schema(raw)
+        with self.assertRaises(TypeError):
+            schema.fingerprint()
+        # Schemas compare and hash by identity, whatever their content.
+        self.assertEqual(schema, schema)
+        self.assertNotEqual(schema, Schema(raw))
+        self.assertIn(schema, {schema})
+
+    def test_change_propagates(self):
+        raw = copy.deepcopy(self.raw)
+        raw['users']['2.0.0']['methods']['get']['returns'] = {'type': 'object'}
+        schema, changed = Schema(self.raw), Schema(raw)
+
+        self.assertNotEqual(schema.fingerprint('users@2.0.0', 'get'), changed.fingerprint('users@2.0.0', 'get'))
+        self.assertNotEqual(schema.fingerprint('users@2.0.0'), changed.fingerprint('users@2.0.0'))
+        self.assertNotEqual(schema.service_fingerprint('users'), changed.service_fingerprint('users'))
+        self.assertNotEqual(schema.fingerprint(), changed.fingerprint())
+
+        self.assertEqual(schema.fingerprint('users@1.0.0'), changed.fingerprint('users@1.0.0'))
+        self.assertEqual(schema.service_fingerprint('echo'), changed.service_fingerprint('echo'))
+
+    def test_definitions(self):
+        raw = copy.deepcopy(self.raw)
+        raw['users']['2.0.0']['definitions']['User']['type'] = 'string'
+
+        self.assertNotEqual(Schema(self.raw).fingerprint('users@2.0.0'), Schema(raw).fingerprint('users@2.0.0'))
+        self.assertEqual(Schema(self.raw).fingerprint('users@2.0.0', 'get'), Schema(raw).fingerprint('users@2.0.0', 'get'))
+
+    def test_unknown(self):
+        schema = Schema(self.raw)
+        with self.assertRaises(ValueError):
+            schema.fingerprint('users@1.0.0', 'unknown')
+        with self.assertRaises(ValueError):
+            schema.fingerprint('unknown@1.0.0')
+        with self.assertRaises(ValueError):
+            schema.service_fingerprint('unknown')
@@ -0,0 +1,199 @@
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from lymph.utils import import_object
+
+from lymph.schema import generator as gen
+from lymph.schema import static
+
+
+class StaticTest(unittest.TestCase):
+
+    maxDiff = None
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        sys.path.insert(0, self.tmpdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        shutil.rmtree(self.tmpdir)
+
+    def _write_module(self, name, source):
+        with open(os.path.join(self.tmpdir, '%s.py' % name), 'w') as f:
+            f.write(textwrap.dedent(source))
+
+    def test_same_as_import(self):
+        for class_path in (
+            'lymph.schema.tests.interfaces:Users',
+            'lymph.schema.tests.interfaces:Echo',
+            'lymph.schema.tests.generator_test:Dummy',
+            'lymph.schema.tests.generator_test:DummyV1',
+        ):
+            self.assertEqual(
+                static.get_rpc_methods(class_path),
+                gen._get_rpc_methods(import_object(class_path)))
+
+    def test_types(self):
+        self._write_module('static_types', """
+            import datetime
+            from uuid import UUID as Id
+
+            import lymph
+            import typing
+            from lymph.schema import spec
+
+            from errors import NotFound, Conflict as Taken
+
+
+            class Base(lymph.Interface):
+                @lymph.rpc(raises=(NotFound, Taken))
+                @spec(returns=typing.List[Id])
+                def search(self, query, limit=10, tags=('a', 'b')):
+                    '''Search things.'''
+
+
+            class Things(Base):
+                @lymph.rpc()
+                @spec(returns=datetime.datetime)
+                def now(self):
+                    pass
+
+                @lymph.raw_rpc()
+                def raw(self, channel, values):
+                    pass
+
+                @property
+                def other(self):
+                    pass
+        """)
+
+        methods = static.get_rpc_methods('static_types:Things')
+
+        self.assertEqual(methods, {
+            'search': {
+                'name': 'search',
+                'args': ['query'],
+                'kwargs': {'limit': 10, 'tags': ('a', 'b')},
+                'doc': 'Search things.',
+                'raises': ['NotFound', 'Conflict'],
+                'returns': {'type': 'array', 'items': {'type': 'string', 'format': 'uuid'}},
+            },
+            'now': {
+                'name': 'now',
+                'args': [],
+                'kwargs': {},
+                'doc': '',
+                'raises': [],
+                'returns': {'type': 'string', 'format': 'date-time'},
+            },
+            'raw': {
+                'name': 'raw',
+                'args': ['channel', 'values'],
+                'kwargs': {},
+                'doc': '',
+                'raises': [],
+                'returns': {},
+            },
+        })
+
+    def test_multiple_bases(self):
+        self._write_module('static_bases', """
+            import lymph
+
+
+            class A(lymph.Interface):
+                @lymph.rpc()
+                def get(self, id):
+                    pass
+
+
+            class B(lymph.Interface):
+                @lymph.rpc()
+                def get(self, name, limit=10):
+                    pass
+
+                @lymph.rpc()
+                def search(self, query):
+                    pass
+
+
+            class C(A, B):
+                pass
+        """)
+        self.addCleanup(sys.modules.pop, 'static_bases', None)
+        methods = static.get_rpc_methods('static_bases:C')
+        self.assertEqual(methods, gen._get_rpc_methods(import_object('static_bases:C')))
+        self.assertEqual(methods['get']['args'], ['name'])
+        self.assertEqual(methods['get']['kwargs'], {'limit': 10})
+        self.assertIn('search', methods)
+
+    def test_unresolvable(self):
+        self._write_module('static_unresolvable', """
+            import lymph
+            from lymph.schema import spec
+
+            from schemas import OrderSchema
+            from interfaces import BaseInterface
+            from errors import ERRORS
+
+
+            def cached(func):
+                return func
+
+
+            class Schema(lymph.Interface):
+                @lymph.rpc()
+                @spec(returns=OrderSchema())
+                def get(self, id):
+                    pass
+
+
+            class Inherited(BaseInterface):
+                pass
+
+
+            class Decorated(lymph.Interface):
+                @cached
+                @lymph.rpc()
+                def get(self, id):
+                    pass
+
+
+            class Raises(lymph.Interface):
+                @lymph.rpc(raises=ERRORS)
+                def get(self, id):
+                    pass
+
+
+            class Default(lymph.Interface):
+                @lymph.rpc()
+                def get(self, id, limit=DEFAULT_LIMIT):
+                    pass
+        """)
+
+        for name in ('Schema', 'Inherited', 'Decorated', 'Raises', 'Default', 'Unknown'):
+            with self.assertRaises(static.Unresolvable):
+                static.get_rpc_methods('static_unresolvable:%s' % name)
+
+        with self.assertRaises(static.Unresolvable):
+            static.get_rpc_methods('unknown_module:Interface')
+
+    def test_generate_from_config(self):
+        config_file = os.path.join(self.tmpdir, 'config.yml')
+        with open(config_file, 'w') as f:
+            f.write(textwrap.dedent("""
+                interfaces:
+                    users@0.5.1:
+                        class: lymph.schema.tests.interfaces:Users
+                    a@0.1.0:
+                        class: lymph.schema.tests.testcase_test:A
+            """))
+
+        schema = gen.generate_from_config(config_file, static=True)
+
+        self.assertEqual(schema.todict(), gen.generate_from_config(config_file).todict())
@@ -9,6 +9,7 @@ from lymph.testing import RPCServiceTestCase
 
 from lymph.schema.decorator import spec
 from lymph.schema.generator import generate
+from lymph.schema.metrics import CallMetrics
 from lymph.schema.testcase import MockServiceTester
 
 
@@ -67,3 +68,19 @@ class TestTestCase(RPCServiceTestCase, MockServiceTester):
     def test_raises_unsupported_exception(self):
         with self.assertRaises(ValueError):
             self.mocker.on('a@0.1.0', 'get').raises(Exception('bla'))
+
+
+class TestTestCaseMetrics(RPCServiceTestCase, MockServiceTester):
+    service_class = B
+    rpc_schema = generate(A, 'a@0.1.0')
+    rpc_hook = CallMetrics()
+
+    def test_a_get(self):
+        self.rpc_hook.clear()
+        self.mocker.on('a@0.1.0', 'get').returns({'price': decimal.Decimal(10)})
+
+        self.service.a_get()
+        self.service.a_get()
+
+        self.assertEqual(self.rpc_hook.calls, {('a@0.1.0', 'get'): 2})
+        self.assertEqual(self.rpc_hook.cardinality('a@0.1.0', 'get', 'id'), 1)
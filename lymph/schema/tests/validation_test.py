@@ -0,0 +1,289 @@
+import datetime
+import decimal
+import inspect
+import unittest
+import uuid
+
+import mock
+import typing
+from marshmallow import fields, Schema
+
+import lymph
+from lymph.schema import generator as gen
+from lymph.schema.decorator import spec
+from lymph.schema.validation import ReturnsValidator, compile_args_checker, compile_validator, validate_args
+
+
+class User(Schema):
+    id = fields.Integer(required=True)
+    name = fields.String()
+    created = fields.DateTime()
+
+
+VALIDATOR = ReturnsValidator(sample_rate=1)
+
+
+class Users(lymph.Interface):
+    @lymph.rpc()
+    @VALIDATOR
+    @spec(returns=User())
+    def get(self, id, name=None):
+        return {'id': id, 'name': name}
+
+    @lymph.rpc()
+    @validate_args
+    @spec(returns=int, ids=typing.List[int], limit=int)
+    def count(self, ids, limit=None):
+        return len(ids[:limit])
+
+
+class Products(lymph.Interface):
+    @lymph.rpc()
+    @validate_args
+    @spec(returns=decimal.Decimal, price=decimal.Decimal)
+    def set_price(self, price):
+        return price
+
+
+class CompileValidatorTest(unittest.TestCase):
+
+    def assertValid(self, schema, *values):
+        check = compile_validator(schema)
+        for value in values:
+            self.assertIsNone(check(value, 'returns'), value)
+
+    def assertInvalid(self, schema, *values):
+        check = compile_validator(schema)
+        for value in values:
+            self.assertIsNotNone(check(value, 'returns'), value)
+
+    def test_numbers(self):
+        integer = {'type': 'number', 'format': 'integer'}
+        self.assertValid(integer, 1, 2 ** 70)
+        self.assertInvalid(integer, 1.5, '1', True, None)
+        self.assertValid({'type': 'number', 'format': 'float'}, 1.5, 1)
+        self.assertValid({'type': 'number', 'format': 'decimal'}, decimal.Decimal('1.5'), 1)
+
+    def test_spec_decimal(self):
+        validator = ReturnsValidator(sample_rate=1)
+
+        @validator
+        @spec(returns=decimal.Decimal)
+        def get_price():
+            return decimal.Decimal('1.5')
+
+        self.assertEqual(get_price(), decimal.Decimal('1.5'))
+        self.assertEqual(validator.validated['get_price'], 1)
+        self.assertEqual(validator.mismatches['get_price'], 0)
+        self.assertValid(gen.decorator._to_jsonschema(decimal.Decimal), decimal.Decimal('1.5'), '1.5')
+        self.assertInvalid(gen.decorator._to_jsonschema(decimal.Decimal), 1.5)
+
+    def test_strings(self):
+        self.assertValid({'type': 'string'}, 'a', u'a')
+        self.assertInvalid({'type': 'string'}, 1, None)
+        date_time = {'type': 'string', 'format': 'date-time'}
+        self.assertValid(date_time, datetime.datetime.now(), '2016-01-01T00:00:00')
+        self.assertInvalid(date_time, 1)
+        self.assertValid({'type': 'string', 'format': 'uuid'}, uuid.uuid4())
+        self.assertValid({'type': 'string', 'format': 'unknown'}, 'a')
+
+    def test_containers(self):
+        self.assertValid({'type': 'array', 'items': {'type': 'boolean'}}, [], [True, False], (True,))
+        self.assertInvalid({'type': 'array', 'items': {'type': 'boolean'}}, [1], {})
+        pair = {'type': 'array', 'items': [{'type': 'string'}, {'type': 'boolean'}]}
+        self.assertValid(pair, ['a', True])
+        self.assertInvalid(pair, ['a'], [True, 'a'])
+        mapping = {'type': 'object', 'additionalProperties': {'type': 'number', 'format': 'integer'}}
+        self.assertValid(mapping, {}, {'a': 1})
+        self.assertInvalid(mapping, {'a': 'b'}, [])
+
+    def test_any_of(self):
+        self.assertValid({'type': ['array', 'null'], 'items': {'type': 'string'}}, None, ['a'])
+        self.assertInvalid({'type': ['array', 'null'], 'items': {'type': 'string'}}, [1], 'a')
+        any_of = {'anyOf': [{'type': 'string'}, {'type': 'null'}]}
+        self.assertValid(any_of, 'a', None)
+        self.assertInvalid(any_of, 1)
+
+    def test_ref(self):
+        check = compile_validator({'$ref': '#/definitions/Node'}, {
+            'Node': {
+                'type': 'object',
+                'properties': {
+                    'value': {'type': 'string'},
+                    'next': {'anyOf': [{'$ref': '#/definitions/Node'}, {'type': 'null'}]},
+                },
+            },
+        })
+        self.assertIsNone(check({'value': 'a', 'next': {'value': 'b', 'next': None}}, 'returns'))
+        self.assertIn('returns.next.value', check({'value': 'a', 'next': {'value': 1}}, 'returns'))
+        with self.assertRaises(ValueError):
+            compile_validator({'$ref': '#/definitions/Unknown'})
+
+    def test_spec_types(self):
+        self.assertValid({}, object())
+        self.assertValid(gen.decorator._to_jsonschema(typing.Dict[str, typing.List[int]]), {'a': [1]})
+        self.assertInvalid(gen.decorator._to_jsonschema(typing.Dict[str, typing.List[int]]), {'a': ['1']})
+
+
+class ReturnsValidatorTest(unittest.TestCase):
+
+    def test_validate(self):
+        validator = ReturnsValidator(sample_rate=1, on_mismatch=mock.Mock())
+
+        @validator
+        @spec(returns=User())
+        def get(id, **extra):
+            return dict(extra, id=id)
+
+        self.assertEqual(get(1), {'id': 1})
+        self.assertEqual(get('1'), {'id': '1'})
+        self.assertEqual(get(None), {'id': None})
+        self.assertEqual(get(1, name=None), {'id': 1, 'name': None})
+        self.assertEqual(validator.validated['get'], 4)
+        self.assertEqual(validator.mismatches['get'], 2)
+        self.assertEqual(validator.errors['get'], 'returns.id: expected number (integer), got None')
+        validator.on_mismatch.assert_called_with('get', 'returns.id: expected number (integer), got None')
+
+    def test_annotation(self):
+        validator = ReturnsValidator(sample_rate=1)
+
+        def get(id):
+            return {'id': id}
+        # Python 3 annotation, not converted by @spec.
+        get.__annotations__ = {'return': User()}
+        get = validator(get)
+
+        self.assertEqual(get('1'), {'id': '1'})
+        self.assertEqual(validator.mismatches['get'], 1)
+        self.assertEqual(validator.failures['get'], 0)
+
+    def test_failures(self):
+        validator = ReturnsValidator(sample_rate=1, on_mismatch=mock.Mock(side_effect=RuntimeError))
+
+        @validator
+        @spec(returns=int)
+        def get():
+            return 'a'
+
+        def search():
+            return []
+        search.__annotations__ = {'return': {'$ref': '#/definitions/Unknown'}}
+        search = validator(search)
+
+        with mock.patch('lymph.schema.validation.logger') as logger:
+            self.assertEqual(get(), 'a')
+            self.assertEqual(search(), [])
+            self.assertEqual(search(), [])
+        self.assertEqual(validator.mismatches['get'], 1)
+        self.assertEqual(validator.failures, {'get': 1, 'search': 2})
+        self.assertEqual(logger.exception.call_count, 3)
+
+    def test_not_sampled(self):
+        validator = ReturnsValidator(sample_rate=0)
+
+        @validator
+        @spec(returns=int)
+        def get():
+            return 'a'
+
+        with mock.patch('lymph.schema.validation.compile_validator') as compile_:
+            self.assertEqual(get(), 'a')
+        self.assertFalse(compile_.called)
+        self.assertEqual(validator.validated['get'], 0)
+
+    def test_sampled(self):
+        validator = ReturnsValidator(sample_rate=0.5)
+
+        def get():
+            return 1
+
+        with mock.patch('random.random', side_effect=[0.1, 0.9, 0.4, 0.5]):
+            get = validator(get)
+            for _ in range(4):
+                get()
+        self.assertEqual(validator.validated['get'], 2)
+
+    def test_generate(self):
+        methods = gen.generate(Users, 'users').todict()['users']['']['methods']
+        self.assertEqual(methods['get']['args'], ['id'])
+        self.assertEqual(methods['get']['kwargs'], {'name': None})
+        self.assertEqual(methods['get']['returns']['required'], ['id'])
+
+        Users(mock.Mock()).get(1)
+        self.assertEqual(VALIDATOR.mismatches['get'], 0)
+        self.assertEqual(VALIDATOR.validated['get'], 1)
+
+    def test_signature(self):
+        def get(self, id, name=None, *args, **kwargs):
+            return id, name, args, kwargs
+
+        wrapper = ReturnsValidator(sample_rate=1)(get)
+        self.assertEqual(inspect.getargspec(wrapper), inspect.getargspec(get))
+        self.assertEqual(wrapper.__name__, 'get')
+        self.assertEqual(wrapper(None, 1, 'a', 2, b=3), (1, 'a', (2,), {'b': 3}))
+        self.assertEqual(Users.get.args.args, ['id', 'name'])
+
+
+class ValidateArgsTest(unittest.TestCase):
+
+    def test_validate_args(self):
+        body = mock.Mock(return_value=1)
+
+        @validate_args
+        @spec(returns=int, id=int, fields=typing.List[str])
+        def get(id, fields=None, limit=10):
+            return body(id, fields, limit)
+
+        self.assertEqual(get(1), 1)
+        self.assertEqual(get(id=1, fields=['name'], limit='a'), 1)
+        body.assert_called_with(1, ['name'], 'a')
+        body.reset_mock()
+
+        for kwargs in ({'id': '1'}, {'id': 1, 'fields': 'name'}, {}, {'id': 1, 'unknown': 1}):
+            with self.assertRaises(TypeError):
+                get(**kwargs)
+        self.assertFalse(body.called)
+        with self.assertRaisesRegexp(TypeError, r"get\(\) argument fields.0: expected string, got 1"):
+            get(1, [1])
+
+    def test_decimal(self):
+        @validate_args
+        @spec(returns=decimal.Decimal, price=decimal.Decimal)
+        def set_price(price):
+            return price
+
+        self.assertEqual(set_price(decimal.Decimal('1.5')), decimal.Decimal('1.5'))
+        with self.assertRaises(TypeError):
+            set_price(1.5)
+
+        check = compile_args_checker('set_price', ['price'], {}, {'price': decimal.Decimal})
+        check({'price': decimal.Decimal('1.5')})
+
+        schema = gen.generate(Products, 'products@1.0.0')
+        products = schema.build_service('products@1.0.0')
+        self.assertIsInstance(products.set_price(price=decimal.Decimal('1.5')), decimal.Decimal)
+
+    def test_no_types(self):
+        def get(id):
+            pass
+        self.assertIs(validate_args(get), get)
+        self.assertIs(validate_args(spec(returns=int)(get)), get)
+
+    def test_rpc(self):
+        self.assertEqual(Users.count.args.args, ['ids', 'limit'])
+        methods = gen.generate(Users, 'users').todict()['users']['']['methods']
+        self.assertEqual(methods['count']['args'], ['ids'])
+
+        users = Users(mock.Mock())
+        self.assertEqual(users.count(ids=[1, 2], limit=1), 1)
+        with self.assertRaises(TypeError):
+            users.count(ids=['1'])
+
+    def test_compile_args_checker(self):
+        check = compile_args_checker('get', ['id'], {'limit': None}, {'limit': int})
+        check({'id': 1})
+        check({'id': 1, 'limit': None})
+        with self.assertRaises(TypeError):
+            check({'id': 1, 'limit': 'a'})
+        with self.assertRaisesRegexp(TypeError, "unexpected keyword argument 'other'"):
+            check({'id': 1, 'other': 1})
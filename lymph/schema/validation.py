@@ -0,0 +1,367 @@
+"""Validation of the values returned by rpc methods in production.
+
+:class:`ReturnsValidator` wraps rpc methods and checks a sample of the
+values they return against the type given to ``@spec``, e.g.::
+
+    validator = ReturnsValidator(sample_rate=0.01)
+
+    class Users(lymph.Interface):
+        @lymph.rpc()
+        @validator
+        @spec(returns=UserSchema())
+        def get(self, id):
+            ...
+
+Calls that aren't sampled only cost a random number and a comparison, the
+return type is compiled to a validator the first time a call is sampled.
+Mismatches are counted in :attr:`ReturnsValidator.mismatches`, they are
+never raised, nor are the errors raised while validating.
+
+:func:`validate_args` rejects calls whose arguments don't match their
+types before the method runs.
+
+Wrappers have the same signature as the decorated functions, which lymph
+relies on to describe its rpc methods.
+
+"""
+import collections
+import decimal
+import functools
+import logging
+import random
+
+import six
+
+from lymph.schema import _jsonschema
+from lymph.schema.decorator import _get_annotation, _to_jsonschema
+# compile_args_checker is also available from this module.
+from lymph.schema.signature import _get_argspec, _wrap, compile_args_checker  # noqa
+
+
+# (type, format) -> python types of values, built from the types that
+# ``@spec`` converts to each JSON schema type.
+_PYTHON_TYPES = {}
+for _pytype, _schema in _jsonschema.TYPE_MAP.items():
+    _key = (_schema['type'], _schema.get('format'))
+    # Formatted strings may already be serialized, e.g. by marshmallow.
+    _default = six.string_types if _schema['type'] == 'string' else ()
+    _PYTHON_TYPES[_key] = _PYTHON_TYPES.get(_key, _default) + (_pytype,)
+del _pytype, _schema, _key, _default
+_PYTHON_TYPES.update({
+    ('number', 'integer'): six.integer_types,
+    ('number', 'float'): (float,) + six.integer_types,
+    ('number', 'decimal'): (decimal.Decimal, float) + six.integer_types,
+    # ``@spec`` describes ``decimal.Decimal`` as a string.
+    ('string', 'decimal'): six.string_types + (decimal.Decimal,),
+    ('object', None): (collections.Mapping,),
+    ('null', None): (type(None),),
+})
+
+_MAX_REPR = 80
+
+logger = logging.getLogger(__name__)
+
+
+class ReturnsValidator(object):
+    """Decorator validating a sample of the values returned by rpc methods.
+
+    Must be applied above ``@spec``, the schema generator still sees the
+    decorated function.
+
+    :param sample_rate: Fraction of the calls whose return value is
+        validated, between 0 and 1.
+    :param on_mismatch: Function called with the method name and the error
+        message of each mismatch, e.g. to log it.
+
+    """
+
+    def __init__(self, sample_rate=0.01, on_mismatch=None):
+        self.sample_rate = sample_rate
+        self.on_mismatch = on_mismatch
+        # Method name -> number of validated calls.
+        self.validated = collections.Counter()
+        # Method name -> number of invalid return values.
+        self.mismatches = collections.Counter()
+        # Method name -> error message of its last mismatch.
+        self.errors = {}
+        # Method name -> number of calls that couldn't be validated, e.g.
+        # because the return type isn't supported.
+        self.failures = collections.Counter()
+
+    def __call__(self, func):
+        name = func.__name__
+        # The validator, compiled the first time a call is sampled.
+        compiled = []
+        return _wrap(func, _RETURNS_BODY, {
+            '__rand': random.random,
+            '__self': self,
+            '__validate': functools.partial(self._validate, func, name, compiled),
+        })
+
+    def _validate(self, func, name, compiled, value):
+        try:
+            if not compiled:
+                compiled.append(_compile_returns(func))
+            error = compiled[0](value, 'returns')
+            self.validated[name] += 1
+            if error is not None:
+                self.mismatches[name] += 1
+                self.errors[name] = error
+                if self.on_mismatch is not None:
+                    self.on_mismatch(name, error)
+        except Exception:
+            # Never fail the call being observed.
+            self.failures[name] += 1
+            logger.exception('cannot validate the value returned by %s()', name)
+
+
+def _compile_returns(func):
+    schema = _get_annotation(func, 'return')
+    if not isinstance(schema, dict):  # e.g. Python 3 annotation.
+        schema = _to_jsonschema(schema)
+    return compile_validator(schema)
+
+
+def validate_args(func):
+    """Decorator rejecting calls whose arguments don't match their types.
+
+    Types are the argument annotations, given to ``@spec`` in Python 2::
+
+        class Users(lymph.Interface):
+            @lymph.rpc()
+            @validate_args
+            @spec(returns=UserSchema(), id=int)
+            def get(self, id, fields=None):
+                ...
+
+    The returned function has the same signature as ``func`` so that missing
+    or unexpected arguments are rejected by Python itself, and the types are
+    checked by code compiled for ``func`` before it runs. Arguments left to
+    their default value aren't checked.
+
+    :raises TypeError: From the decorated function when an argument doesn't
+        match its type.
+
+    """
+    args, defaults = _get_argspec(func)[0:2]
+    annotations = getattr(func, '__annotations__', None) or {}
+
+    lines = []
+    namespace = {}
+    first_default = len(args) - len(defaults)
+    for i, arg in enumerate(args):
+        if arg not in annotations or arg == 'return':
+            continue
+        namespace['__check_%d' % i] = _get_arg_check(func.__name__, arg, annotations[arg])
+        if i >= first_default:
+            lines.append('    if %s is not __defaults[%d]:' % (arg, i - first_default))
+            lines.append('        __check_%d(%s)' % (i, arg))
+        else:
+            lines.append('    __check_%d(%s)' % (i, arg))
+    if not lines:
+        return func
+    lines.append('    return __call')
+    return _wrap(func, '\n'.join(lines), namespace)
+
+
+def _get_arg_check(name, arg, type_):
+    if not isinstance(type_, dict):  # e.g. Python 3 annotation.
+        type_ = _to_jsonschema(type_)
+    validate = compile_validator(type_)
+
+    def _check(value):
+        error = validate(value, arg)
+        if error is not None:
+            raise TypeError('%s() argument %s' % (name, error))
+    return _check
+
+
+_RETURNS_BODY = """\
+    __result = __call
+    if __rand() < __self.sample_rate:
+        __validate(__result)
+    return __result"""
+
+
+def compile_validator(schema, definitions=None):
+    """Compile a JSON schema to a validation function.
+
+    The function takes a value and its path and returns an error message or
+    None if the value is valid.
+
+        >>> check = compile_validator({'type': 'object', 'properties': {
+        ...     'id': {'type': 'number', 'format': 'integer'}}, 'required': ['id']})
+        >>> check({'id': 1}, 'returns') is None
+        True
+        >>> check({'id': '1'}, 'returns')
+        "returns.id: expected number (integer), got '1'"
+        >>> check({}, 'returns')
+        'returns.id: missing'
+
+    Properties that aren't required may be None, like marshmallow dumps
+    them when they are missing.
+
+    :param definitions: Schemas that ``$ref`` point to.
+
+    """
+    return _Compiler(definitions or {}).compile(schema)
+
+
+def _valid(value, path):
+    return None
+
+
+class _Compiler(object):
+
+    def __init__(self, definitions):
+        self.definitions = definitions
+        # Definition name -> validator, filled before compiling the
+        # definition so that recursive schemas are supported.
+        self.refs = {}
+
+    def compile(self, schema):
+        if not schema:
+            return _valid
+        elif '$ref' in schema:
+            return self._compile_ref(schema['$ref'])
+        elif 'anyOf' in schema:
+            return _get_any_of_validator([self.compile(s) for s in schema['anyOf']])
+
+        type_ = schema.get('type')
+        if isinstance(type_, list):  # e.g. ['array', 'null']
+            return _get_any_of_validator([self.compile(dict(schema, type=t)) for t in type_])
+        check = _get_type_validator(type_, schema.get('format'))
+        if type_ == 'object':
+            if 'properties' in schema:
+                return _get_object_validator(check, self._compile_properties(schema), schema.get('required', ()))
+            elif 'additionalProperties' in schema:
+                return _get_mapping_validator(check, self.compile(schema['additionalProperties']))
+        elif type_ == 'array':
+            if isinstance(schema.get('items'), list):  # Tuple.
+                return _get_tuple_validator(check, [self.compile(s) for s in schema['items']])
+            elif 'items' in schema:
+                return _get_array_validator(check, self.compile(schema['items']))
+        return check
+
+    def _compile_properties(self, schema):
+        return [(name, self.compile(s)) for name, s in schema['properties'].items()]
+
+    def _compile_ref(self, ref):
+        name = ref.rpartition('/')[2]
+        try:
+            return self.refs[name]
+        except KeyError:
+            pass
+        try:
+            target = self.definitions[name]
+        except KeyError:
+            raise ValueError('cannot resolve reference %s' % ref)
+
+        compiled = []
+
+        def _check(value, path):
+            return compiled[0](value, path)
+        self.refs[name] = _check
+        compiled.append(self.compile(target))
+        return _check
+
+
+def _get_type_validator(type_, format_):
+    # Only check the type of unknown formats.
+    types = _PYTHON_TYPES.get((type_, format_)) or _PYTHON_TYPES.get((type_, None))
+    if not types:
+        return _valid
+    description = '%s (%s)' % (type_, format_) if format_ else type_
+    # bool is an int but is never a valid number.
+    reject_bool = type_ == 'number'
+
+    def _check(value, path):
+        if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+            return '%s: expected %s, got %s' % (path, description, _repr(value))
+        return None
+    return _check
+
+
+def _repr(value):
+    """Return the repr of ``value`` shortened to a length fit for messages.
+
+        >>> _repr(list(range(100)))
+        '[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 2...'
+
+    """
+    r = repr(value)
+    if len(r) > _MAX_REPR:
+        return r[:_MAX_REPR] + '...'
+    return r
+
+
+def _get_object_validator(check, properties, required):
+    required = frozenset(required)
+
+    def _check(value, path):
+        error = check(value, path)
+        if error is not None:
+            return error
+        for name, check_property in properties:
+            if name in value:
+                item = value[name]
+                # Marshmallow dumps missing optional fields as None.
+                if item is None and name not in required:
+                    continue
+                error = check_property(item, '%s.%s' % (path, name))
+                if error is not None:
+                    return error
+            elif name in required:
+                return '%s.%s: missing' % (path, name)
+        return None
+    return _check
+
+
+def _get_mapping_validator(check, check_value):
+    def _check(value, path):
+        error = check(value, path)
+        if error is not None:
+            return error
+        for key, item in value.items():
+            error = check_value(item, '%s.%s' % (path, key))
+            if error is not None:
+                return error
+        return None
+    return _check
+
+
+def _get_array_validator(check, check_item):
+    def _check(value, path):
+        error = check(value, path)
+        if error is not None:
+            return error
+        for i, item in enumerate(value):
+            error = check_item(item, '%s.%d' % (path, i))
+            if error is not None:
+                return error
+        return None
+    return _check
+
+
+def _get_tuple_validator(check, checks):
+    def _check(value, path):
+        error = check(value, path)
+        if error is not None:
+            return error
+        if len(value) != len(checks):
+            return '%s: expected %d items, got %d' % (path, len(checks), len(value))
+        for i, (check_item, item) in enumerate(zip(checks, value)):
+            error = check_item(item, '%s.%d' % (path, i))
+            if error is not None:
+                return error
+        return None
+    return _check
+
+
+def _get_any_of_validator(checks):
+    def _check(value, path):
+        errors = [check(value, path) for check in checks]
+        if None in errors:
+            return None
+        return ' or '.join(errors)
+    return _check
@@ -34,10 +34,19 @@ service_dir=$(pwd)
 pure_service_name=${service#dhh-}
 schema_file_name="${service}-schema.py"
 schema_file_name="${schema_file_name//-/_}"
+schema_json=$(mktemp)
+lymph gen-schema conf/${pure_service_name}.yml > ${schema_json}
+
+# the fingerprint only depends on the schema content, consumers whose stored
+# schema has the same fingerprint are already up-to-date and are skipped
+fingerprint=$(python -c "import json, sys; from lymph.schema.schema import Schema; print(Schema(json.load(open(sys.argv[1]))).fingerprint())" ${schema_json})
+fingerprint_line="# schema-fingerprint: ${fingerprint}"
+
 touch ${schema_file_name}
-printf "# -*- coding=utf-8 -*-\n\nimport json\n\nschema = json.loads(r'''" >> ${schema_file_name}
-lymph gen-schema conf/${pure_service_name}.yml >> ${schema_file_name}
+printf "# -*- coding=utf-8 -*-\n${fingerprint_line}\n\nimport json\n\nschema = json.loads(r'''" >> ${schema_file_name}
+cat ${schema_json} >> ${schema_file_name}
 printf "''')" >> ${schema_file_name}
+rm -f ${schema_json}
 schema_file="$(pwd)/${schema_file_name}"
 
 
@@ -69,6 +78,13 @@ update_repo () {
     # clone repo to path
     git clone git@github.com:${repo}.git ${repo_path}
 
+    # skip the consumer if its stored schema is already up-to-date
+    if grep -qxF "${fingerprint_line}" "${full_path_to_schema}/${schema_file_name}" 2>/dev/null; then
+        echo "schema of ${service} is up-to-date in ${1}, skipping"
+        rm -rf ${repo_path}
+        return
+    fi
+
     # go to path and copy the new schema here and set name and email for github
     cd ${full_path_to_schema}
     git config --local user.email "travis@dhh-docs.com"
@@ -26,6 +26,8 @@ setup(
     entry_points={
         'lymph.cli': [
             'gen-schema = lymph.schema.cli.generator:SchemaGenerator',
+            'gen-fake = lymph.schema.cli.fake:FakeGenerator',
+            'schema-diff = lymph.schema.cli.diff:SchemaDiff',
         ],
     },
     classifiers=[